@@ -4,6 +4,7 @@ from src.loaders.config_loader import get_config
 from src.state.app_state import AppState
 #from src.data_model.subject_factory import create_subjects_from_nested_dicts # surplus?
 from src.pipelines.pipeline_orchestrator import PipelineOrchestrator
+from src.loaders.native_converter import convert_study
 from src.visuals.plots import Plots
 
 import matplotlib.pyplot as plt
@@ -14,6 +15,11 @@ def main():
     # Parse cmd line args and load config
     config = get_config()
     verbosity = config['outputs']['print_verbosity']
+
+    # Convert text logs to native sensor containers and stop
+    if config.get('command') == "convert":
+        convert_study(config)
+        return
     
     # Get app state (initialise or load)
     app_state = AppState(config=config, checkpoint_config=config["checkpoint"]["app_state"]).load()
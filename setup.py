@@ -5,4 +5,7 @@ setup(
     package_dir={"": "src"},
     packages=find_packages(where="src"),
     version="0.1.0",
+    extras_require={
+        "test": ["pytest", "pyarrow"],
+    },
 )
@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+
+def group_offsets(groups):
+    """
+    Row order that makes each group contiguous (identity when the rows are
+    already grouped in ascending order) and the start/stop offsets of each
+    group in that order. Groups come out sorted, as with groupby.
+
+    Args:
+        groups (array-like): Group id of each row, e.g. global_beat_index
+
+    Returns:
+        numpy.ndarray: rows, positions to reorder the data by
+        numpy.ndarray: starts
+        numpy.ndarray: stops
+    """
+    groups = np.asarray(groups)
+    if len(groups) > 1 and np.any(groups[1:] < groups[:-1]):
+        rows = np.argsort(groups, kind='stable')
+    else:
+        rows = np.arange(len(groups))
+    groups = groups[rows]
+
+    new_group = np.ones(len(groups), dtype=bool)
+    new_group[1:] = groups[1:] != groups[:-1]
+    starts = np.flatnonzero(new_group)
+    stops = np.append(starts[1:], len(groups))
+
+    return rows, starts, stops
+
+
+class BeatIndex:
+    """
+    Compact store of segmented heart beats.
+
+    Holds one contiguous array per signal column plus start/stop row offsets
+    for each beat, so beat i is rows starts[i]:stops[i] of every column.
+    Indexing a beat or slicing a range of beats returns numpy views of the
+    shared arrays, no per-beat DataFrames are created unless asked for.
+    Every beat keeps its id (its position in the index it was built as)
+    through slicing.
+    """
+    __slots__ = ("columns", "starts", "stops", "section_ids", "group_ids", "beat_ids")
+
+    def __init__(self,
+                 columns: dict,
+                 starts,
+                 stops,
+                 section_ids=None,
+                 group_ids=None,
+                 beat_ids=None
+        ):
+        """
+        Args:
+            columns (dict): Column name -> 1D numpy.ndarray, all equal length
+            starts (array-like of int): First row of each beat
+            stops (array-like of int): Row after the last row of each beat
+            section_ids (array-like of int, optional): Section of each beat
+            group_ids (array-like of int, optional): n-beat group of each beat
+            beat_ids (array-like of int, optional): Global id of each beat,
+                defaults to 0..n_beats-1
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("[BeatIndex] All columns must be the same length")
+
+        self.columns = dict(columns)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops = np.asarray(stops, dtype=np.int64)
+        if self.starts.shape != self.stops.shape:
+            raise ValueError("[BeatIndex] starts and stops must be the same length")
+
+        n_beats = len(self.starts)
+        self.section_ids = (np.zeros(n_beats, dtype=np.int64) if section_ids is None
+                            else np.asarray(section_ids, dtype=np.int64))
+        self.group_ids = None if group_ids is None else np.asarray(group_ids, dtype=np.int64)
+        self.beat_ids = (np.arange(n_beats, dtype=np.int64) if beat_ids is None
+                         else np.asarray(beat_ids, dtype=np.int64))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, starts, stops, section_ids=None, columns=None):
+        """
+        Build from a DataFrame and beat row offsets (positional, not labels).
+        Column arrays are taken with to_numpy() so they share memory with the
+        DataFrame where pandas allows it.
+
+        Args:
+            df (pd.DataFrame): Annotated signal, e.g. combined sections
+            starts, stops (array-like of int): Beat row offsets into df
+            section_ids (array-like of int, optional): Section of each beat
+            columns (list of str, optional): Columns to keep, defaults to all
+
+        Returns:
+            BeatIndex
+        """
+        columns = df.columns if columns is None else columns
+        arrays = {column: df[column].to_numpy() for column in columns}
+
+        return cls(arrays, starts, stops, section_ids=section_ids)
+
+    @classmethod
+    def from_annotated(cls, df: pd.DataFrame, columns=None):
+        """
+        Build from a DataFrame annotated by HeartBeatDetector, beats are the
+        contiguous runs of rows with the same (section_id, beat), beat -1 is
+        not part of any beat.
+
+        Returns:
+            BeatIndex
+        """
+        beat = df['beat'].to_numpy()
+        section = df['section_id'].to_numpy()
+
+        change = np.ones(len(df), dtype=bool)
+        change[1:] = (beat[1:] != beat[:-1]) | (section[1:] != section[:-1])
+        run_starts = np.flatnonzero(change)
+        run_stops = np.append(run_starts[1:], len(df))
+
+        in_beat = beat[run_starts] != -1
+        starts = run_starts[in_beat]
+
+        return cls.from_frame(df, starts, run_stops[in_beat],
+                              section_ids=section[starts], columns=columns)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, key):
+        """
+        Int: dict of column name -> view of that beat's rows
+        Slice: BeatIndex over the selected beats sharing the same arrays
+        """
+        if isinstance(key, slice):
+            return BeatIndex(
+                self.columns, self.starts[key], self.stops[key],
+                section_ids=self.section_ids[key],
+                group_ids=None if self.group_ids is None else self.group_ids[key],
+                beat_ids=self.beat_ids[key]
+            )
+
+        start, stop = self._bounds(key)
+        return {name: values[start:stop] for name, values in self.columns.items()}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"BeatIndex(beats={len(self)}, columns={list(self.columns)})"
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """ Number of samples in each beat """
+        return self.stops - self.starts
+
+    def beat(self, i: int, column: str) -> np.ndarray:
+        """ View of one column for beat i """
+        start, stop = self._bounds(i)
+        return self.columns[column][start:stop]
+
+    def iter_column(self, column: str):
+        """ Yield a view of `column` for every beat in order """
+        values = self.columns[column]
+        for start, stop in zip(self.starts, self.stops):
+            yield values[start:stop]
+
+    def with_groups(self, group_ids):
+        """
+        Same beats and arrays with n-beat group ids attached
+
+        Returns:
+            BeatIndex
+        """
+        return BeatIndex(self.columns, self.starts, self.stops,
+                         section_ids=self.section_ids, group_ids=group_ids, beat_ids=self.beat_ids)
+
+    def to_frame(self, i: int = None) -> pd.DataFrame:
+        """
+        Materialise beats as a DataFrame, one beat if i is given otherwise
+        all beats in order. Adds 'global_beat_index' (the beat ids, which
+        a slice keeps from the index it was taken from) and 'group_id' when
+        group ids are set, unless the columns already contain them.
+
+        Returns:
+            pd.DataFrame
+        """
+        if i is not None:
+            return pd.DataFrame(self[i])
+
+        if len(self) == 0:
+            return pd.DataFrame({name: values[:0] for name, values in self.columns.items()})
+
+        # Gather all beat rows at once rather than concatenating per beat
+        lengths = self.lengths
+        rows = np.repeat(self.starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        frame = pd.DataFrame({name: values[rows] for name, values in self.columns.items()})
+
+        beat_numbers = np.repeat(np.arange(len(self)), lengths)
+        if 'global_beat_index' not in frame:
+            frame['global_beat_index'] = self.beat_ids[beat_numbers]
+        if self.group_ids is not None and 'group_id' not in frame:
+            frame['group_id'] = self.group_ids[beat_numbers]
+
+        return frame
+
+    def to_frames(self) -> list:
+        """ One DataFrame per beat, the old list of beats layout """
+        return [self.to_frame(i) for i in range(len(self))]
+
+    def _bounds(self, i: int):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"[BeatIndex] Beat {i} out of range for {len(self)} beats")
+
+        return self.starts[i], self.stops[i]
@@ -0,0 +1,150 @@
+import os
+import json
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+
+class SensorHandle(ABC):
+    """
+    Placeholder for sensor data that is not in memory, SensorMapping calls
+    load() on first access
+    """
+
+    @abstractmethod
+    def load(self) -> pd.DataFrame:
+        """ The sensor data """
+        pass
+
+
+class StoredFrame(SensorHandle):
+    """
+    Handle on a DataFrame written by SensorStore, only the directory path
+    is held (and pickled). load() opens each column as a memory-mapped
+    array, so only the pages a pipeline touches are read from disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+
+    def __repr__(self) -> str:
+        return f"StoredFrame({self.path!r})"
+
+    def load(self) -> pd.DataFrame:
+        """
+        Open the stored columns, numeric and datetime columns are
+        copy-on-write memory maps (in place edits never reach the file),
+        object columns are read in full
+
+        Returns:
+            pd.DataFrame: With a default RangeIndex
+        """
+        with open(os.path.join(self.path, SensorStore.META_FILE)) as f:
+            meta = json.load(f)
+
+        columns = {}
+        for column in meta["columns"]:
+            file_path = os.path.join(self.path, column["file"])
+            if column["mmap"]:
+                # Plain ndarray view of the map, pandas keeps memmap subclasses
+                columns[column["name"]] = np.load(file_path, mmap_mode="c").view(np.ndarray)
+            else:
+                columns[column["name"]] = np.load(file_path, allow_pickle=True)
+
+        return pd.DataFrame(columns, copy=False)
+
+
+class SensorStore:
+    """
+    Backing store of sensor DataFrames, one directory per
+    subject/session/sensor holding a .npy file per column and a JSON list
+    of the columns. Written once at load time, then opened lazily through
+    StoredFrame.
+    """
+    META_FILE = "columns.json"
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): Directory to write sessions under
+        """
+        self.root = str(root)
+
+    def write(self, subject_id: str, session_name: str, sensor_type: str, data: pd.DataFrame) -> StoredFrame:
+        """
+        Write a DataFrame's columns, the index is not kept
+
+        Returns:
+            StoredFrame
+        """
+        path = os.path.join(self.root, str(subject_id), str(session_name), str(sensor_type))
+        os.makedirs(path, exist_ok=True)
+
+        columns = []
+        for i, name in enumerate(data.columns):
+            values = data[name].to_numpy()
+            file_name = f"{i}.npy"
+            mmap = values.dtype != object
+            np.save(os.path.join(path, file_name), values, allow_pickle=not mmap)
+            columns.append({"name": name, "file": file_name, "mmap": bool(mmap)})
+
+        # Column list last, a partly written entry has none
+        with open(os.path.join(path, self.META_FILE), "w") as f:
+            json.dump({"columns": columns}, f, indent=2)
+
+        return StoredFrame(path)
+
+
+class SensorMapping(dict):
+    """
+    Sensor type -> DataFrame. Values may be SensorHandles (e.g.
+    StoredFrame), which are loaded on first access and kept until
+    release(); pickling keeps the handles only.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded = {}
+
+    def __getitem__(self, sensor_type):
+        value = super().__getitem__(sensor_type)
+        if not isinstance(value, SensorHandle):
+            return value
+
+        frame = self._loaded.get(sensor_type)
+        if frame is None:
+            frame = self._loaded[sensor_type] = value.load()
+
+        return frame
+
+    def __setitem__(self, sensor_type, value):
+        self._loaded.pop(sensor_type, None)
+        super().__setitem__(sensor_type, value)
+
+    def __delitem__(self, sensor_type):
+        self._loaded.pop(sensor_type, None)
+        super().__delitem__(sensor_type)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(super().items()),))
+
+    def get(self, sensor_type, default=None):
+        return self[sensor_type] if sensor_type in self else default
+
+    def items(self):
+        return [(sensor_type, self[sensor_type]) for sensor_type in self]
+
+    def values(self):
+        return [self[sensor_type] for sensor_type in self]
+
+    def release(self):
+        """ Drop loaded handle data, it is loaded again on next access """
+        self._loaded.clear()
+
+    def raw(self, sensor_type):
+        """ Stored value without loading it, DataFrame or SensorHandle """
+        return super().__getitem__(sensor_type)
+
+    def is_loaded(self, sensor_type) -> bool:
+        """ False for a SensorHandle that has not been loaded yet """
+        return (not isinstance(self.raw(sensor_type), SensorHandle)
+                or sensor_type in self._loaded)
@@ -1,6 +1,8 @@
 import pandas as pd
 from typing import Dict, Any
 
+from .sensor_store import SensorMapping
+
 
 class EpochData:
     """
@@ -43,11 +45,11 @@ class SessionData:
         self.session_name = session_name
         self.subject_id = subject_id
 
-        # Sensor data
-        self.sensors: Dict[str, pd.DataFrame] = {}
+        # Sensor data, DataFrames or StoredFrame handles opened on access
+        self.sensors: Dict[str, pd.DataFrame] = SensorMapping()
 
-        # pipeline outputs
-        self.processed: Dict[str, pd.DataFrame] = {}
+        # pipeline outputs, DataFrames or StoredFrame handles once spilled
+        self.processed: Dict[str, pd.DataFrame] = SensorMapping()
 
         # Epochs - segmented analysis results
         self.epochs: Dict[str, EpochData] = {}
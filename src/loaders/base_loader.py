@@ -3,6 +3,9 @@ import pandas as pd
 
 class BaseLoader(ABC):
 
+    # Whether load_sensor_tail() can read rows appended to a file
+    SUPPORTS_TAIL = False
+
     @abstractmethod
     def load_sensor_data(self, sensor, files):
         """ Load and pre-process data from input files """
@@ -11,3 +14,15 @@ class BaseLoader(ABC):
     def standardise(self, data):
         """ Optional standardisation method """
         return data
+
+    def standardise_options(self) -> dict:
+        """ Settings standardise() depends on, part of the cache key """
+        return {}
+
+    def select_files(self, sensor, files):
+        """ Source files a sensor is loaded from, all files by default """
+        return list(files)
+
+    def load_sensor_tail(self, sensor, file_path, offset=0, **kwargs):
+        """ Rows of one file from a byte offset on, and the offset to resume from """
+        raise NotImplementedError(f"[{type(self).__name__}] Incremental loading is not supported")
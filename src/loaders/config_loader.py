@@ -28,6 +28,11 @@ def get_config():
 	args = get_arguments()
 	config = load_config_file(args.config)
 	config = apply_arg_overrides(config, args)
+
+	# Sub command and its options
+	config['command'] = args.command
+	if args.command == "convert" and args.native_dir:
+		config['data_source'].setdefault('native', {})['dir'] = args.native_dir
 	
 	return config
 	
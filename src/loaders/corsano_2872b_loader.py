@@ -1,37 +1,95 @@
+import csv
 import pandas as pd
 from .base_loader import BaseLoader
+from .time_window import TimeWindow
+
+# Multi-threaded CSV parser, optional, pandas is used without it
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
 
 class Corsano2872bLoader(BaseLoader):
-    def __init__(self, config):
+
+    # Columns a portal export must have
+    REQUIRED_COLUMNS = [
+        "timestamp", "date", "metric_id", "chunk_index",
+        "quality", "body_pose", "led_pd_pos", "offset",
+        "exp", "led", "gain", "value"
+    ]
+
+    # Columns standardise() uses, the only ones parsed
+    PROJECTED_COLUMNS = ["timestamp", "value"]
+
+    # Types of the known columns for both engines, so every file (and every
+    # record batch of a streamed file) is parsed to the same schema whether
+    # its values are integers or decimals. Missing quality values are NaN
+    # with pandas, so it is only pinned for pyarrow
+    COLUMN_TYPES = {"timestamp": "int64", "value": "float64"}
+    PYARROW_TYPES = dict(COLUMN_TYPES, quality="int64")
+
+    # Map specifically for Corsano 287-2b from corsano portal
+    #TODO change timestamp_ms to sensor_clock_ms for all codebase
+    RENAME_MAP = {
+        'value': 'ppg',
+        'timestamp': 'timestamp_ms',
+    }
+
+    # Timestamps are unix epoch ms
+    EPOCH_OFFSET_MS = 0
+
+    def __init__(self, config, engine: str = "auto"):
+        """
+        Args:
+            config (dict)
+            engine (str): CSV parser, "pyarrow", "pandas" or "auto" for
+                pyarrow when installed
+        """
+        if engine not in ("auto", "pyarrow", "pandas"):
+            raise ValueError(f"[Corsano2872bLoader] Unknown engine {engine}")
+        if engine == "pyarrow" and pa_csv is None:
+            raise ImportError("[Corsano2872bLoader] pyarrow engine requested but pyarrow is not installed")
+
+        if engine == "auto":
+            engine = "pandas" if pa_csv is None else "pyarrow"
+
         self.config = config
+        self.engine = engine
+        # Rows per chunk (pandas) and bytes per record batch (pyarrow) when
+        # filtering by a time window
+        self.window_chunk_size = 500000
+        self.window_block_size = 1 << 24
 
-    def load_sensor_data(self, sensor, file_paths):
+    def load_sensor_data(self, sensor, file_paths, include_quality: bool = False,
+                         window: TimeWindow = None, columns: list = None):
         """
         Load data from Corsano 2872b - note the columns may change based
-        on options of importing the data from api or portal
-        
+        on options of importing the data from api or portal. Each header is
+        checked against the required columns before any data is parsed,
+        then only timestamp and value (and quality if asked) are read.
+
         :params file_path: List of file paths to load
+        :params include_quality: Also read the quality column
+        :params window: TimeWindow, rows outside it are dropped chunk by
+            chunk as the file is parsed
+        :params columns: Extra columns to read, raw or standardised names,
+            e.g. ["quality"]
         :return concatenated pandas dataframe
         """
+        columns = self._projection(include_quality, columns)
 
-        data_frames = []
-        
-        required_columns = [
-        "timestamp", "date", "metric_id", "chunk_index",
-        "quality", "body_pose", "led_pd_pos", "offset",
-        "exp", "led", "gain", "value"
-        ]
-        
         for file_path in file_paths:
-            data = pd.read_csv(file_path)
+            self._validate_header(file_path)
 
-            # Validate columns
-            if not set(required_columns).issubset(data.columns):
-                raise ValueError(f"File {file_path} is missing required columns. Expected {required_columns}")
+        if not file_paths:
+            return pd.DataFrame(columns=columns)
 
-            data_frames.append(data)
+        if self.engine == "pyarrow":
+            return self._read_pyarrow(file_paths, columns, window)
 
-        return pd.concat(data_frames, ignore_index=True)
+        return self._read_pandas(file_paths, columns, window)
 
     def standardise(self, sensor, data):
         """
@@ -44,26 +102,109 @@ class Corsano2872bLoader(BaseLoader):
         #TODO Check datetime against the date column in corsano data
         # Better to have 2 cols - sensor_clock_ms and datetime rather than timestamp
         data['datetime'] = pd.to_datetime(data['timestamp_ms'], unit='ms')
-        
+
         # Make df standardised, drop non numeric columns
-        data = data[['datetime','timestamp_ms', 'ppg']]
+        # Extra projected columns (e.g. quality) follow
+        columns = ['datetime','timestamp_ms', 'ppg']
+        columns += [col for col in data.columns if col not in columns]
+        data = data[columns]
+
+        return data
+
+    def _validate_header(self, file_path):
+        """
+        Check the header line holds the required columns, reading only the
+        first line of the file
+        """
+        with open(file_path, newline="") as f:
+            header = next(csv.reader(f), None)
+
+        if header is None:
+            raise pd.errors.EmptyDataError(f"[Corsano2872bLoader] File {file_path} is empty")
+        if not set(self.REQUIRED_COLUMNS).issubset(header):
+            raise ValueError(f"[Corsano2872bLoader] File {file_path} is missing required columns. Expected {self.REQUIRED_COLUMNS}")
+
+    def _projection(self, include_quality: bool, columns: list = None) -> list:
+        """ Columns to parse, timestamp and value always """
+        extra = (["quality"] if include_quality else []) + list(columns or [])
+        raw_names = {new: raw for raw, new in self.RENAME_MAP.items()}
+        projected = list(self.PROJECTED_COLUMNS)
+        for column in extra:
+            column = raw_names.get(column, column)
+            if column not in projected:
+                projected.append(column)
+
+        return projected
+
+    def _read_pyarrow(self, file_paths, columns, window=None):
+        """
+        Parse with pyarrow's multi-threaded reader, tables are concatenated
+        without copying and converted to pandas once. Only the projected
+        columns are converted. With a time window each file is streamed as
+        record batches that are filtered as they are read, reading stops
+        once a batch ends past the window end. Known columns have pinned
+        types, other columns are promoted when files infer different ones
+        """
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pa.type_for_alias(alias) for column, alias in self.PYARROW_TYPES.items()
+                          if column in columns}
+        )
+        tables = []
+        for file_path in file_paths:
+            if window is None:
+                tables.append(pa_csv.read_csv(file_path, convert_options=convert_options))
+                continue
+
+            read_options = pa_csv.ReadOptions(block_size=self.window_block_size)
+            with pa_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options) as reader:
+                batches = list(self._window_batches(reader, window))
+                tables.append(pa.Table.from_batches(batches, schema=reader.schema))
+
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def _window_batches(self, reader, window: TimeWindow):
+        """ Filter record batches by the window, stop once past its end """
+        for batch in reader:
+            timestamps = batch.column("timestamp").to_numpy(zero_copy_only=False)
+            keep = window.mask(timestamps)
+            if keep.any():
+                yield batch.filter(pa.array(keep))
+            if len(timestamps) and window.is_past(timestamps[-1]):
+                break
+
+    def _read_pandas(self, file_paths, columns, window=None):
+        """ Fallback, pandas C parser on the projected columns only """
+        data_frames = [self._read_pandas_file(file_path, columns, window) for file_path in file_paths]
+        if len(data_frames) == 1:
+            return data_frames[0]
+
+        return pd.concat(data_frames, ignore_index=True)
+
+    def _read_pandas_file(self, file_path, columns, window=None):
+        read_options = {"usecols": columns, "dtype": self.COLUMN_TYPES}
+        if window is None:
+            return pd.read_csv(file_path, **read_options)[columns]
+
+        # Filter as the file is parsed, stop once past the window end
+        chunks = []
+        for chunk in pd.read_csv(file_path, chunksize=self.window_chunk_size, **read_options):
+            timestamps = chunk["timestamp"].to_numpy()
+            chunks.append(chunk[window.mask(timestamps)])
+            if len(timestamps) and window.is_past(timestamps[-1]):
+                break
+        if not chunks:
+            return pd.read_csv(file_path, nrows=0, **read_options)[columns]
 
-        return data   
+        return pd.concat(chunks, ignore_index=True)[columns]
 
     def _col_rename_map(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Renanme columns to standardise column names for corsano 287-2b
         """
 
-        # Map specifically for Corsano 287-2b from corsano portal
-        #TODO change timestamp_ms to sensor_clock_ms for all codebase
-        rename_map = {
-            'value': 'ppg',
-            'timestamp': 'timestamp_ms',    
-        }
-        
         # If col exist rename them into new mapping
-        rename_dict = {col: rename_map[col] for col in df.columns
-                       if col in rename_map}
+        rename_dict = {col: self.RENAME_MAP[col] for col in df.columns
+                       if col in self.RENAME_MAP}
 
         return df.rename(columns=rename_dict)
@@ -1,11 +1,17 @@
 from .polar_verity_loader import PolarVerityLoader
 from .corsano_2872b_loader import Corsano2872bLoader
+from .native_loader import NativeLoader
 
 class DataLoaderFactory:
     @staticmethod
     def get_loader(config): 
         device = config["data_source"]["device"]
 
+        # Converted sensor containers, any device
+        if config["data_source"].get("format", "text") == "native":
+            print("[DataLoaderFactory] NativeLoader selected")
+            return NativeLoader(config=config)
+
         if device == 'polar-verity':
             print("[DataLoaderFactory] PolarVerityLoader selected")
             return PolarVerityLoader(config=config)
@@ -1,10 +1,17 @@
 import os
 import glob
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from typing import List
 import pandas as pd
 
 from src.data_model.study_data import StudyData, Subject, SessionData
+from src.data_model.sensor_store import SensorStore
+from .base_loader import BaseLoader
 from .loader_factory import DataLoaderFactory
+from .sensor_cache import SensorCache
+from .pending_sensor import PendingSensor
+from .time_window import TimeWindow
 
 class LoaderOrchestrator:
     """
@@ -18,48 +25,285 @@ class LoaderOrchestrator:
         self.sessions = ds["multi_condition"]["conditions"]
         self.device = ds["device"]
         self.sensor_types = ds["sensor_type"]
+        # Rows (time window) and columns (per sensor) pushed into the loaders
+        self.time_window = TimeWindow.from_config(ds.get("time_window"))
+        self.sensor_columns = ds.get("columns", {})
+        # Rows per chunk to stream ppg in, None loads whole files
+        self.stream_chunk_size = ds.get("stream_chunk_size")
+        # Standardised sensor data cached on disk, keyed by source files
+        cache = ds.get("cache", {})
+        self.cache = (SensorCache(cache["dir"], fmt=cache.get("format", "parquet"))
+                      if cache.get("enabled", False) else None)
+        # Growing files are ingested from where the last run stopped
+        self.incremental = cache.get("incremental", False)
+        # Sensor data written to memory-mapped .npy files, opened lazily
+        store = ds.get("store", {})
+        self.store = SensorStore(store["dir"]) if store.get("enabled", False) else None
+        # Concurrent loading of subjects, "thread" or "process" workers
+        self.n_workers = ds.get("n_workers", 1)
+        self.executor = ds.get("executor", "thread")
+        if self.executor not in ("thread", "process"):
+            raise ValueError(f"[LoaderOrchestrator] Unknown executor {self.executor}")
+        # Leave out subjects that fail to load instead of raising
+        self.skip_failed_subjects = ds.get("skip_failed_subjects", False)
+        self.load_errors = {}
+        self._loader = None
 
     def load_study_data(self) -> StudyData:
-        study_data = StudyData()
+        """
+        Load every subject, in series or on a pool of `n_workers` threads
+        (I/O bound parsing) or processes (CPU bound standardisation) set by
+        data_source.executor. Subjects are added in the same order either
+        way.
 
-        if "all" in self.subjects_to_load:
-            all_dirs = os.listdir(self.subjects_dir)
-            subject_dirs = [
-                d for d in all_dirs
-                if os.path.isdir(os.path.join(self.subjects_dir, d))
-            ]
+        A subject that fails to load raises. In series the error is raised
+        as is, in parallel the other subjects finish first and one
+        RuntimeError lists every failure. With
+        data_source.skip_failed_subjects set, failed subjects are left out
+        instead and their errors kept in self.load_errors.
+
+        Returns:
+            StudyData
+        """
+        study_data = StudyData()
+        self.load_errors = {}
+        subject_dirs = self._subject_dirs()
 
+        if self.n_workers > 1 and len(subject_dirs) > 1:
+            results = self._load_parallel(subject_dirs)
+        elif self.skip_failed_subjects:
+            results = [self._try_load_subject(subject_id) for subject_id in subject_dirs]
         else:
-            subject_dirs = self.subjects_to_load
-
-        for subject_id in subject_dirs:
-            subject_path = os.path.join(self.subjects_dir, subject_id)
-            subject_obj = Subject(subject_id)
-
-            for session_name in self.sessions:
-                session_path = os.path.join(subject_path, session_name)
-                if not os.path.isdir(session_path):
-                    print(f"[LoaderOrchestrator] Session path '{session_path}' can't be found")
-                    continue
-                
-                session_data = SessionData(session_name, subject_id)
-
-                # Device loader
-                loader = DataLoaderFactory.get_loader(self.config)
-    
-                # Colelct files
-                files = glob.glob(os.path.join(session_path, "*"))
-
-                for sensor_type in self.sensor_types:
-                    df = loader.load_sensor_data(sensor_type, files)
-                    if not df.empty:
-                        df = loader.standardise(sensor_type, df)
-                    session_data.add_sensor_data(sensor_type, df)
-
-                # add session to subject
-                subject_obj.add_session(session_name, session_data)
+            results = [(self._load_subject(subject_id), None) for subject_id in subject_dirs]
+
+        errors = {}
+        for subject_id, (subject_obj, error) in zip(subject_dirs, results):
+            if error is not None:
+                errors[subject_id] = error
+                continue
 
             # Add subject to study
             study_data.add_subject(subject_obj)
 
+        self.load_errors = {subject_id: repr(error) for subject_id, error in errors.items()}
+        if errors and not self.skip_failed_subjects:
+            failures = "; ".join(f"{subject_id}: {error!r}" for subject_id, error in errors.items())
+            raise RuntimeError(f"[LoaderOrchestrator] Failed to load {len(errors)} subject(s), {failures}") \
+                from next(iter(errors.values()))
+
+        for subject_id, error in self.load_errors.items():
+            print(f"[LoaderOrchestrator] Failed to load subject {subject_id}, skipped: {error}")
+
+        return study_data
+
+    def _subject_dirs(self) -> list:
+        """
+        Subjects to load, "all" or ids which may be shell style patterns
+        (e.g. "S*", "P0[1-5]") matched against the subject directories
+        """
+        patterns = [s for s in self.subjects_to_load if s == "all" or any(c in s for c in "*?[")]
+        if not patterns:
+            return list(self.subjects_to_load)
+
+        all_dirs = sorted(
+            d for d in os.listdir(self.subjects_dir)
+            if os.path.isdir(os.path.join(self.subjects_dir, d))
+        )
+        if "all" in self.subjects_to_load:
+            return all_dirs
+
+        return [d for d in all_dirs
+                if d in self.subjects_to_load or any(fnmatch.fnmatchcase(d, p) for p in patterns)]
+
+    def _load_parallel(self, subject_dirs: list) -> list:
+        """ (Subject, error) per subject, in subject order """
+        if self.executor == "process":
+            pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        else:
+            # Threads share one loader, create it before they start
+            self._get_loader()
+            pool = ThreadPoolExecutor(max_workers=self.n_workers)
+
+        print(f"[LoaderOrchestrator] Loading {len(subject_dirs)} subjects on {self.n_workers} {self.executor} workers")
+        with pool:
+            futures = [pool.submit(self._try_load_subject, subject_id) for subject_id in subject_dirs]
+            return [future.result() for future in futures]
+
+    def _try_load_subject(self, subject_id: str):
+        """ (Subject, None) or (None, the exception raised loading it) """
+        try:
+            return self._load_subject(subject_id), None
+        except Exception as error:
+            return None, error
+
+    def discover_study_data(self) -> StudyData:
+        """
+        Lazy StudyData, subjects and sessions are found on disk but every
+        sensor is a PendingSensor descriptor (its files and their size)
+        that is loaded the first time it is accessed and can be released
+        again with SessionData.sensors.release()
+
+        Returns:
+            StudyData
+        """
+        study_data = StudyData()
+        for subject_id in self._subject_dirs():
+            study_data.add_subject(self._load_subject(subject_id, lazy=True))
+
         return study_data
+
+    def _load_subject(self, subject_id: str, lazy: bool = False) -> Subject:
+        """ All sessions of one subject, as PendingSensors when lazy """
+        subject_path = os.path.join(self.subjects_dir, subject_id)
+        subject_obj = Subject(subject_id)
+
+        for session_name in self.sessions:
+            session_path = os.path.join(subject_path, session_name)
+            if not os.path.isdir(session_path):
+                print(f"[LoaderOrchestrator] Session path '{session_path}' can't be found")
+                continue
+
+            session_data = SessionData(session_name, subject_id)
+
+            # Colelct files
+            files = glob.glob(os.path.join(session_path, "*"))
+
+            for sensor_type in self.sensor_types:
+                if lazy:
+                    data = PendingSensor(self, subject_id, session_name, sensor_type, files)
+                else:
+                    data = self.sensor_data(subject_id, session_name, sensor_type, files)
+                session_data.add_sensor_data(sensor_type, data)
+
+            # add session to subject
+            subject_obj.add_session(session_name, session_data)
+
+        return subject_obj
+
+    def sensor_data(self, subject_id: str, session_name: str, sensor_type: str, files: list):
+        """
+        Sensor data as it is held in SessionData: a DataFrame, a
+        SensorStream when streaming or a StoredFrame when a store is set
+        """
+        # Device loader
+        loader = self._get_loader()
+
+        if self._streams(loader, sensor_type):
+            return self._stream(loader, sensor_type, files)
+
+        df = self._load_sensor(loader, subject_id, session_name, sensor_type, files)
+        if self.store is not None and isinstance(df, pd.DataFrame):
+            return self.store.write(subject_id, session_name, sensor_type, df)
+
+        return df
+
+    def _get_loader(self):
+        """ Device loader, created once on first use """
+        if self._loader is None:
+            self._loader = DataLoaderFactory.get_loader(self.config)
+
+        return self._loader
+
+    def _load_sensor(self, loader, subject_id, session_name, sensor_type, files):
+        """
+        Load and standardise one sensor, from the cache when its source
+        files are unchanged. The time window and column selection are
+        pushed down to the loader.
+        """
+        predicates = self._predicates(sensor_type)
+        variant = self._cache_variant(loader, predicates)
+        sensor_files = loader.select_files(sensor_type, files) if self.cache else []
+        loader_name = type(loader).__name__
+        if sensor_files and self.incremental and getattr(loader, "SUPPORTS_TAIL", False) is True:
+            return self._load_incremental(loader, subject_id, session_name, sensor_type,
+                                          sensor_files, predicates, variant)
+        if sensor_files:
+            df = self.cache.load(subject_id, session_name, sensor_type, sensor_files, loader_name, variant)
+            if df is not None:
+                return df
+
+        df = loader.load_sensor_data(sensor_type, files, **predicates)
+        if not df.empty:
+            df = loader.standardise(sensor_type, df)
+
+        if sensor_files:
+            self.cache.save(subject_id, session_name, sensor_type, sensor_files, df, loader_name, variant)
+
+        return df
+
+    def _load_incremental(self, loader, subject_id, session_name, sensor_type, files, predicates, variant):
+        """
+        Cached rows plus the rows appended to each file since the last
+        ingestion, only the new tail of a file is parsed and only the new
+        rows are written to the cache. New rows follow the cached ones in
+        file order. A file whose last timestamp is already past the time
+        window end is not read again.
+        """
+        loader_name = type(loader).__name__
+        cached, state = self.cache.load_incremental(subject_id, session_name, sensor_type, files,
+                                                    loader_name, variant)
+        epoch_offset_ms = getattr(loader, "EPOCH_OFFSET_MS", 0)
+
+        tails = []
+        for path in files:
+            file_state = state.get(path, {"offset": 0, "last_timestamp_ms": None})
+            last = file_state["last_timestamp_ms"]
+            if (last is not None and self.time_window is not None
+                    and self.time_window.is_past(last + epoch_offset_ms)):
+                continue
+
+            tail, offset = loader.load_sensor_tail(sensor_type, path, file_state["offset"], **predicates)
+            if not tail.empty:
+                tail = loader.standardise(sensor_type, tail)
+                tails.append(tail)
+                last = tail["timestamp_ms"].iloc[-1]
+            state[path] = {"offset": offset, "last_timestamp_ms": last}
+
+        new_rows = pd.concat(tails, ignore_index=True) if tails else pd.DataFrame()
+        self.cache.append(subject_id, session_name, sensor_type, new_rows, state,
+                          loader_name, variant, new=cached is None)
+        print(f"[LoaderOrchestrator] Ingested {len(new_rows)} new rows for {subject_id}/{session_name}/{sensor_type}")
+
+        frames = [df for df in (cached, new_rows) if df is not None and not df.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _cache_variant(loader, predicates: dict) -> str:
+        """
+        Cache key part for what shapes the cached frame besides the source
+        files: the row/column selection and the loader's standardisation
+        settings
+        """
+        options = loader.standardise_options() if isinstance(loader, BaseLoader) else {}
+        key = sorted(predicates.items()) + sorted(options.items())
+        return repr(key) if key else ""
+
+    def _predicates(self, sensor_type: str) -> dict:
+        """ Loader keyword arguments for the configured row/column selection """
+        predicates = {}
+        if self.time_window is not None:
+            predicates["window"] = self.time_window
+        if sensor_type in self.sensor_columns:
+            predicates["columns"] = self.sensor_columns[sensor_type]
+
+        return predicates
+
+    def _streams(self, loader, sensor_type: str) -> bool:
+        """ Stream ppg in chunks when configured and the loader supports it """
+        return (self.stream_chunk_size is not None and sensor_type == "ppg"
+                and hasattr(loader, "stream_sensor_data"))
+
+    def _stream(self, loader, sensor_type: str, files):
+        """
+        Chunked ppg, only the channels the ppg average needs are read, the
+        ambient channel and phone timestamp are dropped at read time
+        """
+        return loader.stream_sensor_data(
+            sensor_type, files,
+            chunk_size=self.stream_chunk_size,
+            columns=self.sensor_columns.get(sensor_type, ["channel 0", "channel 1", "channel 2"]),
+            window=self.time_window
+        )
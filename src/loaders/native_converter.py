@@ -0,0 +1,62 @@
+import os
+import copy
+
+from .loader_orchestrator import LoaderOrchestrator
+from .native_loader import NativeLoader, DEVICE_LOADERS
+from .sensor_container import SensorContainer
+
+def convert_study(config: dict) -> list:
+    """
+    Convert a study's text logs into sensor containers, one per
+    subject/session/sensor under data_source.native.dir, laid out as the
+    subjects directory so it can be loaded back with
+    data_source.format = "native" and subjects_dir pointing at it.
+    Sessions are loaded and released one at a time.
+
+    Columns the device loader derives (timestamp_ms from the sensor clock)
+    are not stored, and Polar ppg is stored as its raw integer channels and
+    fused by NativeLoader, so channel weights can change after conversion.
+
+    Args:
+        config (dict)
+
+    Returns:
+        list of str: Container paths written
+    """
+    native = config["data_source"].get("native", {})
+    out_dir = native.get("dir", "data/native/")
+
+    # Read the text logs whatever format is configured
+    text_config = copy.deepcopy(config)
+    text_config["data_source"].update(format="text", lazy=True, store={}, stream_chunk_size=None,
+                                      time_window=None, columns={})
+    text_config["data_source"]["polar"] = dict(text_config["data_source"].get("polar", {}),
+                                               keep_raw_channels=True)
+    study_data = LoaderOrchestrator(text_config).discover_study_data()
+    loader = DEVICE_LOADERS.get(config["data_source"].get("device"))
+    derived = getattr(loader, "DERIVED_COLUMNS", {})
+
+    written = []
+    for subject_id, subject in study_data.subjects.items():
+        for session_name, session_data in subject.sessions.items():
+            session_dir = os.path.join(out_dir, subject_id, session_name)
+            for sensor_type in session_data.sensors:
+                data = session_data.sensors[sensor_type]
+                if data.empty:
+                    continue
+                if sensor_type == "ppg" and "ppg_ch0" in data.columns:
+                    # Fused on load from the raw channels
+                    data = data.drop(columns=["ppg"])
+
+                os.makedirs(session_dir, exist_ok=True)
+                path = os.path.join(session_dir, f"{subject_id}_{sensor_type}{NativeLoader.EXTENSION}")
+                SensorContainer.write(path, data,
+                                      chunk_rows=native.get("chunk_rows", 65536),
+                                      compression=native.get("compression", "zlib"),
+                                      derived=derived)
+                print(f"[convert_study] Wrote {path}")
+                written.append(path)
+
+            session_data.sensors.release()
+
+    return written
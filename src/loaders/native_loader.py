@@ -0,0 +1,93 @@
+import os
+import re
+import pandas as pd
+
+from .base_loader import BaseLoader
+from .sensor_container import SensorContainer
+from .time_window import TimeWindow
+from .polar_verity_loader import PolarVerityLoader
+from .corsano_2872b_loader import Corsano2872bLoader
+
+# Text loader of each device, its clock and standardisation
+DEVICE_LOADERS = {
+    "polar-verity": PolarVerityLoader,
+    "corsano-2872b": Corsano2872bLoader,
+}
+
+# Offset of each device's timestamp_ms from the unix epoch
+DEVICE_EPOCH_OFFSET_MS = {device: loader.EPOCH_OFFSET_MS for device, loader in DEVICE_LOADERS.items()}
+
+class NativeLoader(BaseLoader):
+    """
+    Loads sensor containers written by `main.py convert`, data is already
+    standardised. Polar ppg containers hold the raw integer channels, they
+    are fused on load with the configured channel weights. Files are named
+    <subject>_<sensor>.wsc, e.g. S6_ppg.wsc
+    """
+    EXTENSION = ".wsc"
+
+    def __init__(self, config):
+        self.config = config
+        # Containers keep the device clock, needed to apply time windows
+        device = config["data_source"].get("device")
+        self.epoch_offset_ms = DEVICE_EPOCH_OFFSET_MS.get(device, 0)
+        # ppg fusion settings of the device
+        self.polar = PolarVerityLoader(config) if device == "polar-verity" else None
+
+    def load_sensor_data(self, sensor_type: str, files, start_ms: float = None, end_ms: float = None,
+                         window: TimeWindow = None, columns: list = None):
+        """
+        Read a sensor's containers, optionally only start_ms <= timestamp_ms
+        < end_ms (device clock) and rows inside a TimeWindow, seeking to the
+        overlapping chunks
+
+        Args:
+            columns (list, optional): Columns to decode, timestamp_ms is
+                always kept
+
+        Returns:
+            pd.DataFrame
+        """
+        sensor_files = self.select_files(sensor_type, files)
+        if not sensor_files:
+            return pd.DataFrame() # Empty df
+
+        if window is not None:
+            # Absolute bounds seek, the daily range is applied to the rows
+            if window.start_ms is not None:
+                start_ms = max(v for v in (start_ms, window.start_ms - self.epoch_offset_ms) if v is not None)
+            if window.end_ms is not None:
+                end_ms = min(v for v in (end_ms, window.end_ms - self.epoch_offset_ms) if v is not None)
+        if columns is not None and "timestamp_ms" not in columns:
+            columns = ["timestamp_ms"] + list(columns)
+        if columns is not None and "ppg" in columns and self.polar is not None:
+            # Raw channels ppg is fused from
+            columns = list(columns) + list(self.polar.channel_weights) + ["ppg_amb"]
+
+        dataframes = []
+        for file_path in sensor_files:
+            data = SensorContainer(file_path).read(start_ms=start_ms, end_ms=end_ms, columns=columns)
+            if window is not None and window.daily is not None:
+                keep = window.mask(data["timestamp_ms"].to_numpy() + self.epoch_offset_ms)
+                data = data[keep].reset_index(drop=True)
+            dataframes.append(data)
+
+        if len(dataframes) == 1:
+            return dataframes[0]
+
+        return pd.concat(dataframes, ignore_index=True)
+
+    def standardise(self, sensor_type: str, data: pd.DataFrame) -> pd.DataFrame:
+        """ Containers hold standardised data, Polar ppg is fused here """
+        if sensor_type == "ppg" and self.polar is not None and "ppg" not in data.columns:
+            self.polar.fuse_ppg(data)
+
+        return data
+
+    def standardise_options(self) -> dict:
+        return self.polar.standardise_options() if self.polar is not None else {}
+
+    def select_files(self, sensor_type: str, files) -> list:
+        """ Containers of the sensor type """
+        pattern = rf"(^|_){re.escape(sensor_type)}{re.escape(self.EXTENSION)}$"
+        return sorted(f for f in files if re.search(pattern, os.path.basename(str(f))))
@@ -0,0 +1,52 @@
+import os
+
+from src.data_model.sensor_store import SensorHandle
+
+class PendingSensor(SensorHandle):
+    """
+    Lightweight descriptor of a sensor that has not been loaded yet, the
+    files it will be read from and their size. load() reads it through the
+    LoaderOrchestrator that discovered it, so the cache, store and
+    streaming settings still apply.
+    """
+
+    def __init__(self, orchestrator, subject_id: str, session_name: str, sensor_type: str, files: list):
+        """
+        Args:
+            orchestrator (LoaderOrchestrator)
+            subject_id (str)
+            session_name (str)
+            sensor_type (str)
+            files (list): All files in the session directory
+        """
+        self.orchestrator = orchestrator
+        self.subject_id = subject_id
+        self.session_name = session_name
+        self.sensor_type = sensor_type
+        self.files = list(files)
+
+    def __repr__(self) -> str:
+        return (f"PendingSensor(subject={self.subject_id}, session={self.session_name}, "
+                f"sensor={self.sensor_type}, bytes={self.size})")
+
+    @property
+    def sensor_files(self) -> list:
+        """ Files the device loader reads this sensor from """
+        return self.orchestrator._get_loader().select_files(self.sensor_type, self.files)
+
+    @property
+    def size(self) -> int:
+        """ Bytes on disk of the sensor files """
+        return sum(os.path.getsize(path) for path in self.sensor_files)
+
+    def load(self):
+        """
+        Returns:
+            pd.DataFrame, or a SensorStream when streaming
+        """
+        print(f"[PendingSensor] Loading {self.subject_id}/{self.session_name}/{self.sensor_type}")
+        data = self.orchestrator.sensor_data(self.subject_id, self.session_name, self.sensor_type, self.files)
+        if isinstance(data, SensorHandle):
+            data = data.load()
+
+        return data
@@ -1,11 +1,25 @@
 import os
 import re
+import csv
+import numpy as np
 import pandas as pd
 
 from .base_loader import BaseLoader
+from .time_window import TimeWindow
+from .tail_reader import read_csv_tail
 
 class PolarVerityLoader(BaseLoader):
 
+    # Sensor clock counts ns from 2000-01-01T00:00:00Z
+    EPOCH_OFFSET_MS = 946684800000
+
+    # Polar Sensor Logger appends to its files while recording
+    SUPPORTS_TAIL = True
+
+    # Columns standardise() derives as source / divisor, sensor containers
+    # store the source only
+    DERIVED_COLUMNS = {"timestamp_ms": ("sensor_clock_ns", 1_000_000)}
+
     def __init__(self, config):
         self.config = config
 
@@ -25,30 +39,80 @@ class PolarVerityLoader(BaseLoader):
             "gyro": ["Phone timestamp", "sensor timestamp [ns]", "X [dps]", "Y [dps]", "Z [dps]"]
         }
 
+        # Compact dtypes, sensor clock is int64 ns, raw channels fit in int32
+        self.column_dtypes = {
+            "sensor timestamp [ns]": np.int64,
+            "channel 0": np.int32,
+            "channel 1": np.int32,
+            "channel 2": np.int32,
+            "ambient": np.int32,
+            "X [mg]": np.int32,
+            "Y [mg]": np.int32,
+            "Z [mg]": np.int32,
+            "X [dps]": np.float32,
+            "Y [dps]": np.float32,
+            "Z [dps]": np.float32,
+            "HR [bpm]": np.int16,
+        }
+
+        self.phone_timestamp_format = "%Y-%m-%dT%H:%M:%S.%f"
+
+        # ppg channel fusion, weights need not sum to 1. Raw channels are
+        # dropped after fusion unless kept
+        polar = config.get("data_source", {}).get("polar", {}) if isinstance(config, dict) else {}
+        self.channel_weights = polar.get("channel_weights", {"ppg_ch0": 1, "ppg_ch1": 1, "ppg_ch2": 1})
+        self.keep_raw_channels = polar.get("keep_raw_channels", False)
+
+        # Rows per chunk when filtering by a time window
+        self.window_chunk_size = 500000
 
-    def load_sensor_data(self, sensor_type: str, files):
+        # Map specifically for Polar Verity Sense - Polar Logger App (Android)
+        self.rename_map = {
+            'Phone timestamp': 'phone_datetime',
+            'sensor timestamp [ns]': 'sensor_clock_ns',
+            'channel 0': 'ppg_ch0',
+            'channel 1': 'ppg_ch1',
+            'channel 2': 'ppg_ch2',
+            'ambient': 'ppg_amb',
+            'X [mg]': 'acc_x_mg',
+            'Y [mg]': 'acc_y_mg',
+            'Z [mg]': 'acc_z_mg',
+            'X [dps]': 'gyr_x_dps',
+            'Y [dps]': 'gyr_y_dps',
+            'Z [dps]': 'gyr_z_dps',
+            'HR [bpm]': 'hr_bpm',
+        }
+
+
+    def load_sensor_data(self, sensor_type: str, files, window: TimeWindow = None, columns: list = None):
         """
         For a sensor type and list of file paths, filter files using device
         specific regex and load the data into a DataFrame - Combining all files
         with same sensor type
+
+        Args:
+            window (TimeWindow, optional): Only rows inside the window are
+                kept, files are parsed in chunks and reading stops once a
+                time ordered file is past the window end
+            columns (list, optional): Data columns to read, raw or
+                standardised names (e.g. "ppg_ch1"), the timestamps are
+                always read
         """
         
-        # Get sensor file names
-        pattern =self.sensor_patterns.get(sensor_type)
-        if pattern is None:
-            return pd.DataFrame()
-
-        sensor_files = [f for f in files if re.search(pattern, os.path.basename(f))]
+        sensor_files = self.select_files(sensor_type, files)
         if not sensor_files:
             return pd.DataFrame() # Empty df
 
         dataframes = []
         req_cols = self.required_columns.get(sensor_type, [])
+        usecols = self._usecols(req_cols, columns, parse_timestamps=True)
 
         for file_path in sensor_files:
-            df = pd.read_csv(file_path, delimiter=";", usecols=req_cols)
-            if not set(req_cols).issubset(df.columns):
-                raise ValueError(f"[PolarVerityLoader] {file_path} is missing required columns for sensor: {sensor}. Expected {req_cols}")
+            self._validate_header(file_path, req_cols, sensor_type)
+            if window is None:
+                df = pd.read_csv(file_path, delimiter=";", usecols=usecols)
+            else:
+                df = self._read_window(file_path, usecols, window)
             dataframes.append(df)
 
         if not dataframes:
@@ -56,50 +120,232 @@ class PolarVerityLoader(BaseLoader):
         
         return pd.concat(dataframes, ignore_index=True)
     
+    def load_sensor_tail(self, sensor_type: str, file_path, offset: int = 0,
+                         window: TimeWindow = None, columns: list = None):
+        """
+        Rows appended to one file since a byte offset, for incremental
+        ingestion of files the logger is still writing. Only complete lines
+        after the offset are parsed.
+
+        Args:
+            sensor_type (str): hr, ppg, acc or gyro
+            file_path (str): One file of the sensor type
+            offset (int): Offset returned by the previous call, 0 to read
+                the whole file
+            window (TimeWindow, optional): Drop rows outside the window
+            columns (list, optional): As load_sensor_data()
+
+        Returns:
+            tuple: (pd.DataFrame of raw rows as load_sensor_data() reads
+                them, byte offset to resume from)
+        """
+        req_cols = self.required_columns.get(sensor_type, [])
+        usecols = self._usecols(req_cols, columns, parse_timestamps=True)
+        self._validate_header(file_path, req_cols, sensor_type)
+
+        data, end = read_csv_tail(file_path, offset, delimiter=";", usecols=usecols)
+        data = data[usecols]
+        if window is not None and not data.empty:
+            unix_ms = data["sensor timestamp [ns]"].to_numpy() / 1e6 + self.EPOCH_OFFSET_MS
+            data = data[window.mask(unix_ms)].reset_index(drop=True)
+
+        return data, end
+
+    def iter_sensor_data(self,
+                         sensor_type: str,
+                         files,
+                         chunk_size: int = 500000,
+                         columns: list = None,
+                         parse_timestamps: bool = False,
+                         standardise: bool = True,
+                         window: TimeWindow = None
+        ):
+        """
+        Stream a sensor's files in fixed size chunks instead of loading
+        them whole. Columns are read with compact dtypes, unused columns are
+        never parsed and the phone timestamp is only read (and parsed to
+        datetime64) when asked for.
+
+        Args:
+            sensor_type (str): hr, ppg, acc or gyro
+            files (list): File paths, filtered by the sensor regex
+            chunk_size (int): Rows per chunk
+            columns (list, optional): Data columns to keep, e.g.
+                ["channel 0", "channel 1"] or ["ppg_ch0"], defaults to all
+                required columns. The sensor clock is always kept
+            parse_timestamps (bool): Read 'Phone timestamp' as datetime64
+            standardise (bool): Apply standardise() to each chunk
+            window (TimeWindow, optional): Drop rows outside the window
+
+        Yields:
+            pd.DataFrame: One chunk of rows, files in the given order
+        """
+        req_cols = self.required_columns.get(sensor_type, [])
+        usecols = self._usecols(req_cols, columns, parse_timestamps)
+
+        for file_path in self.select_files(sensor_type, files):
+            self._validate_header(file_path, req_cols, sensor_type)
+            reader = pd.read_csv(file_path, delimiter=";", usecols=usecols,
+                                 dtype=self._dtypes(usecols), chunksize=chunk_size)
+            for chunk in self._window_chunks(reader, window):
+                if parse_timestamps:
+                    chunk["Phone timestamp"] = pd.to_datetime(
+                        chunk["Phone timestamp"], format=self.phone_timestamp_format)
+                # read_csv keeps the file order, restore the required order
+                chunk = chunk[usecols]
+                yield self.standardise(sensor_type, chunk) if standardise else chunk
+
+    def stream_sensor_data(self, sensor_type: str, files, **kwargs):
+        """
+        Re-iterable, picklable handle on iter_sensor_data(), can be stored
+        in place of a DataFrame and handed to the preprocessor
+
+        Returns:
+            SensorStream
+        """
+        from .sensor_stream import SensorStream
+        return SensorStream(self, sensor_type, self.select_files(sensor_type, files), **kwargs)
+
+    def standardise_options(self) -> dict:
+        """ ppg fusion settings, a change invalidates cached ppg """
+        return {"channel_weights": self.channel_weights, "keep_raw_channels": self.keep_raw_channels}
+
     def standardise(self, sensor_type: str, data: pd.DataFrame) -> pd.DataFrame:
         """
-        Standardise Polar Verity Sense data
+        Standardise Polar Verity Sense data in place. Columns are renamed
+        without copying, the integer ns clock is kept as sensor_clock_ns and
+        timestamp_ms is derived from it in one pass. For ppg the channels
+        read are fused with a weighted sum into a single preallocated array
+        and then dropped unless keep_raw_channels is set.
+
+        Args:
+            sensor_type (str): hr, ppg, acc or gyro
+            data (pd.DataFrame): Raw rows, modified in place
+
+        Returns:
+            pd.DataFrame: data
         """
-        
-        if "sensor timestamp [ns]" in data.columns:
-            # Change timestamp from ns to ms for standardisation
-            data['timestamp_ms'] = data['sensor timestamp [ns]']/1000000	
         # Column remapping
-        data = self._col_name_remap(data)
-        
-        #TODO This method may need to be stated in config, probably better methods, maybe even kalman. 
-        # Avg 3 ppg channels
+        self._col_name_remap(data)
+
+        if "sensor_clock_ns" in data.columns:
+            # ms for standardisation, sub ms resolution kept for 135 Hz ppg
+            data["timestamp_ms"] = np.divide(data["sensor_clock_ns"].to_numpy(), 1_000_000)
+
         if sensor_type == "ppg":
-            data['ppg'] = data[["ppg_ch0","ppg_ch1", "ppg_ch2"]].mean(axis=1)
-                
-        #TODO Could remove unused columns here to keep memory lower, for later
- 
+            self.fuse_ppg(data)
+
         return data
-    
+
+    def fuse_ppg(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Weighted fusion of the raw ppg channels that were read into a ppg
+        column, in place. The raw channels and ppg_amb are then dropped
+        unless keep_raw_channels is set.
+
+        Args:
+            data (pd.DataFrame): Standardised ppg_ch* columns
+
+        Returns:
+            pd.DataFrame: data
+        """
+        #TODO This method may need to be stated in config, probably better methods, maybe even kalman. 
+        channels = [col for col in self.channel_weights if col in data.columns]
+        data["ppg"] = self._fuse_channels(data, channels)
+        raw = channels + (["ppg_amb"] if "ppg_amb" in data.columns else [])
+        if not self.keep_raw_channels:
+            data.drop(columns=raw, inplace=True)
+
+        return data
+
+    def _fuse_channels(self, data: pd.DataFrame, channels: list) -> np.ndarray:
+        """
+        Weighted mean of channels, sum(w_i * ch_i) / sum(w_i), accumulated
+        into one float64 array with a single scratch buffer
+        """
+        if not channels:
+            return np.full(len(data), np.nan)
+
+        fused = np.zeros(len(data), dtype=np.float64)
+        scratch = np.empty_like(fused)
+        for channel in channels:
+            weight = self.channel_weights[channel]
+            if weight == 1:
+                np.add(fused, data[channel].to_numpy(), out=fused)
+            else:
+                np.multiply(data[channel].to_numpy(), weight, out=scratch)
+                np.add(fused, scratch, out=fused)
+
+        fused /= sum(self.channel_weights[channel] for channel in channels)
+        return fused
+
     def _col_name_remap(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Rename columns to standardised column names for polar verity sense
+        Rename columns to standardised column names for polar verity sense,
+        in place
         """
         
-        # Map specifically for Polar Verity Sense - Polar Logger App (Android)    
-        rename_map = {
-            'Phone timestamp': 'phone_datetime',
-            'sensor timestamp [ns]': 'sensor_clock_ns',
-            'channel 0': 'ppg_ch0',
-            'channel 1': 'ppg_ch1',
-            'channel 2': 'ppg_ch2',
-            'ambient': 'ppg_amb',
-            'X [mg]': 'acc_x_mg',
-            'Y [mg]': 'acc_y_mg',
-            'Z [mg]': 'acc_z_mg',
-            'X [dps]': 'gyr_x_dps',
-            'Y [dps]': 'gyr_y_dps',
-            'Z [dps]': 'gyr_z_dps',
-            'HR [bpm]': 'hr_bpm',
-        }
-
         # If cols exist rename them into a new mapping
-        rename_dict = {col: rename_map[col] for col in df.columns 
-                       if col in rename_map}
+        rename_dict = {col: self.rename_map[col] for col in df.columns 
+                       if col in self.rename_map}
+        df.rename(columns=rename_dict, inplace=True)
+
+        return df
+
+    def select_files(self, sensor_type: str, files) -> list:
+        """ Files matching the sensor type regex """
+        pattern = self.sensor_patterns.get(sensor_type)
+        if pattern is None:
+            return []
+
+        return [f for f in files if re.search(pattern, os.path.basename(f))]
+
+    def _usecols(self, req_cols: list, columns: list = None, parse_timestamps: bool = True) -> list:
+        """ Required columns pruned to the selected data columns """
+        if columns is not None:
+            raw_names = {new: raw for raw, new in self.rename_map.items()}
+            columns = {raw_names.get(col, col) for col in columns}
+
+        return [col for col in req_cols
+                if col == "sensor timestamp [ns]"
+                or (col == "Phone timestamp" and parse_timestamps)
+                or (col != "Phone timestamp" and (columns is None or col in columns))]
+
+    def _read_window(self, file_path, usecols: list, window: TimeWindow) -> pd.DataFrame:
+        """ Rows of one file inside the window, parsed in chunks """
+        reader = pd.read_csv(file_path, delimiter=";", usecols=usecols, chunksize=self.window_chunk_size)
+        chunks = list(self._window_chunks(reader, window))
+        if not chunks:
+            return pd.read_csv(file_path, delimiter=";", usecols=usecols, nrows=0)
+
+        return pd.concat(chunks, ignore_index=True)[usecols]
+
+    def _window_chunks(self, reader, window: TimeWindow):
+        """ Filter chunks by the window, stop once past its end """
+        for chunk in reader:
+            if window is None:
+                yield chunk
+                continue
+
+            unix_ms = chunk["sensor timestamp [ns]"].to_numpy() / 1e6 + self.EPOCH_OFFSET_MS
+            keep = window.mask(unix_ms)
+            if keep.any():
+                yield chunk[keep]
+            if len(unix_ms) and window.is_past(unix_ms[-1]):
+                break
+
+    def _dtypes(self, columns) -> dict:
+        return {col: self.column_dtypes[col] for col in columns if col in self.column_dtypes}
+
+    def _validate_header(self, file_path, req_cols, sensor_type):
+        """
+        Check the header line holds the required columns before reading
+        any data
+        """
+        with open(file_path, newline="") as f:
+            header = next(csv.reader(f, delimiter=";"), None)
 
-        return df.rename(columns=rename_dict)        
+        if header is None:
+            raise pd.errors.EmptyDataError(f"[PolarVerityLoader] {file_path} is empty")
+        if not set(req_cols).issubset(header):
+            raise ValueError(f"[PolarVerityLoader] {file_path} is missing required columns for sensor: {sensor_type}. Expected {req_cols}")
@@ -0,0 +1,250 @@
+import os
+import json
+import hashlib
+import importlib.util
+import pandas as pd
+
+class SensorCache:
+    """
+    On-disk cache of standardised sensor DataFrames, one entry per
+    subject/session/sensor stored in a columnar format next to a manifest
+    of the source files it was built from.
+
+    An entry is valid while every source file has the same path, size and
+    content hash as when it was cached. Size and mtime are checked first, a
+    file is only re-hashed when its mtime changed, so a touched but
+    unchanged file still hits while an edited file is re-ingested.
+
+    Incremental entries (load_incremental/append) are for files that keep
+    growing: the data is stored as parts, one per ingestion, and the
+    manifest records per file the byte offset read up to and the last
+    timestamp, so a sync only parses and writes the rows appended since.
+    """
+
+    FORMATS = {
+        "parquet": (".parquet", "to_parquet", pd.read_parquet),
+        "feather": (".feather", "to_feather", pd.read_feather),
+        "pickle": (".pkl", "to_pickle", pd.read_pickle),
+    }
+
+    # Bytes before a recorded offset hashed to check an appended file
+    CHECK_BYTES = 4096
+
+    def __init__(self, cache_dir: str, fmt: str = "parquet", hash_block_size: int = 1 << 20):
+        """
+        Args:
+            cache_dir (str): Root directory of the cache
+            fmt (str): parquet, feather or pickle. The columnar formats
+                need pyarrow, pickle is used instead when it is missing
+            hash_block_size (int): Bytes read at a time when hashing
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"[SensorCache] Unsupported format {fmt}")
+        if fmt != "pickle" and importlib.util.find_spec("pyarrow") is None:
+            print(f"[SensorCache] pyarrow not installed, caching as pickle instead of {fmt}")
+            fmt = "pickle"
+
+        self.cache_dir = cache_dir
+        self.fmt = fmt
+        self.hash_block_size = hash_block_size
+
+    def load(self, subject_id: str, session_name: str, sensor_type: str, files: list,
+             loader_name: str = "", variant: str = ""):
+        """
+        Cached DataFrame for these source files, None on a miss. variant
+        identifies load options that change the data (e.g. a time window),
+        an entry only matches the same loader and variant
+
+        Returns:
+            pd.DataFrame or None
+        """
+        entry = self._entry_path(subject_id, session_name, sensor_type)
+        manifest = self._read_manifest(entry)
+        if not self._manifest_matches(manifest, "full", loader_name, variant):
+            return None
+
+        data_path = entry + self.FORMATS[self.fmt][0]
+        if not os.path.exists(data_path) or not self._files_match(manifest["files"], files):
+            return None
+
+        print(f"[SensorCache] Loaded {subject_id}/{session_name}/{sensor_type} from cache")
+        return self.FORMATS[self.fmt][2](data_path)
+
+    def save(self, subject_id: str, session_name: str, sensor_type: str, files: list,
+             data: pd.DataFrame, loader_name: str = "", variant: str = ""):
+        """
+        Store a standardised DataFrame with the fingerprints of its source
+        files, the manifest is written last so a partial write is a miss
+        """
+        entry = self._entry_path(subject_id, session_name, sensor_type)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        extension, writer, _ = self.FORMATS[self.fmt]
+        # Feather needs a default index, standardised frames already have one
+        getattr(data.reset_index(drop=True), writer)(entry + extension)
+
+        manifest = {
+            "format": self.fmt,
+            "mode": "full",
+            "loader": loader_name,
+            "variant": variant,
+            "files": [self.fingerprint(path) for path in sorted(map(str, files))]
+        }
+        with open(entry + ".json", "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def load_incremental(self, subject_id: str, session_name: str, sensor_type: str, files: list,
+                         loader_name: str = "", variant: str = ""):
+        """
+        Cached rows of an incremental entry and the ingestion state of its
+        files. The entry is only used while none of its files was removed
+        and each still holds the same bytes before its recorded offset,
+        checked on the block before the offset so the cost does not grow
+        with the file.
+
+        Returns:
+            tuple: (pd.DataFrame or None on a miss, dict mapping each
+                cached file, as given in files, to its "offset" and
+                "last_timestamp_ms"). Files new since the last ingestion
+                are not in the state
+        """
+        entry = self._entry_path(subject_id, session_name, sensor_type)
+        manifest = self._read_manifest(entry)
+        if not self._manifest_matches(manifest, "incremental", loader_name, variant):
+            return None, {}
+
+        paths = {os.path.abspath(str(path)): path for path in files}
+        state = {}
+        for cached in manifest["files"]:
+            if cached["path"] not in paths or not self._prefix_matches(cached):
+                return None, {}
+            state[paths[cached["path"]]] = {
+                "offset": cached["offset"],
+                "last_timestamp_ms": cached["last_timestamp_ms"]
+            }
+
+        part_paths = [self._part_path(entry, i) for i in range(manifest["parts"])]
+        if not all(os.path.exists(path) for path in part_paths):
+            return None, {}
+
+        reader = self.FORMATS[self.fmt][2]
+        data = pd.concat([reader(path) for path in part_paths], ignore_index=True)
+        print(f"[SensorCache] Loaded {subject_id}/{session_name}/{sensor_type} from cache, {len(part_paths)} parts")
+
+        return data, state
+
+    def append(self, subject_id: str, session_name: str, sensor_type: str, data: pd.DataFrame,
+               state: dict, loader_name: str = "", variant: str = "", new: bool = False):
+        """
+        Add newly ingested rows to an incremental entry as a further part,
+        earlier parts are not rewritten. The manifest is written last so a
+        partial write leaves the previous entry intact
+
+        Args:
+            data (pd.DataFrame): Standardised rows read since the last
+                ingestion, may be empty
+            state (dict): Every source file -> {"offset": int,
+                "last_timestamp_ms": float or None}
+            new (bool): Start the entry over, dropping previous parts
+        """
+        entry = self._entry_path(subject_id, session_name, sensor_type)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        manifest = None if new else self._read_manifest(entry)
+        parts = manifest["parts"] if self._manifest_matches(manifest, "incremental", loader_name, variant) else 0
+        if parts == 0 or not data.empty:
+            writer = self.FORMATS[self.fmt][1]
+            getattr(data.reset_index(drop=True), writer)(self._part_path(entry, parts))
+            parts += 1
+
+        files = []
+        for path, file_state in sorted(state.items(), key=lambda item: str(item[0])):
+            last = file_state["last_timestamp_ms"]
+            files.append({
+                "path": os.path.abspath(str(path)),
+                "offset": int(file_state["offset"]),
+                "last_timestamp_ms": None if last is None else float(last),
+                "check_sha256": self._block_hash(path, file_state["offset"])
+            })
+
+        manifest = {
+            "format": self.fmt,
+            "mode": "incremental",
+            "loader": loader_name,
+            "variant": variant,
+            "parts": parts,
+            "files": files
+        }
+        with open(entry + ".json", "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def fingerprint(self, path: str) -> dict:
+        """ Path, size, mtime and content hash of a source file """
+        stat = os.stat(path)
+        return {
+            "path": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": self._hash(path)
+        }
+
+    def _files_match(self, cached: list, files: list) -> bool:
+        paths = sorted(os.path.abspath(str(path)) for path in files)
+        if [entry["path"] for entry in cached] != paths:
+            return False
+
+        for entry, path in zip(cached, paths):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if stat.st_size != entry["size"]:
+                return False
+            if stat.st_mtime_ns != entry["mtime_ns"] and self._hash(path) != entry["sha256"]:
+                return False
+
+        return True
+
+    def _manifest_matches(self, manifest, mode: str, loader_name: str, variant: str) -> bool:
+        return (manifest is not None and manifest.get("format") == self.fmt
+                and manifest.get("mode", "full") == mode
+                and manifest.get("loader") == loader_name and manifest.get("variant", "") == variant)
+
+    def _prefix_matches(self, cached: dict) -> bool:
+        """ File still holds at least the bytes it was read up to """
+        try:
+            if os.path.getsize(cached["path"]) < cached["offset"]:
+                return False
+        except OSError:
+            return False
+
+        return self._block_hash(cached["path"], cached["offset"]) == cached["check_sha256"]
+
+    def _block_hash(self, path, offset: int) -> str:
+        """ Hash of the CHECK_BYTES before offset """
+        start = max(0, offset - self.CHECK_BYTES)
+        with open(path, "rb") as f:
+            f.seek(start)
+            return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+    def _part_path(self, entry: str, index: int) -> str:
+        return f"{entry}.part{index}{self.FORMATS[self.fmt][0]}"
+
+    def _hash(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(self.hash_block_size), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def _entry_path(self, subject_id, session_name, sensor_type) -> str:
+        """ Path of an entry without extension """
+        return os.path.join(self.cache_dir, str(subject_id), str(session_name), str(sensor_type))
+
+    def _read_manifest(self, entry):
+        try:
+            with open(entry + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
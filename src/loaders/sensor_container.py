@@ -0,0 +1,339 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+import numpy as np
+import pandas as pd
+
+class SensorContainer:
+    """
+    Compact chunked binary file of one standardised sensor DataFrame.
+
+    Layout: magic, chunk payloads, JSON footer, footer length (uint64),
+    magic. Rows are split into fixed size chunks and each column of a chunk
+    is stored on its own, optionally zlib compressed:
+        - "delta": monotonic integer or datetime columns (sensor clocks),
+          first value in the footer then narrowed int differences
+        - "int": other integers (and bools), narrowed to the smallest of
+          int8/int16/int32/int64 holding the chunk's range
+        - "float": float64 as is
+        - "derived": not stored, source / divisor of another column, e.g.
+          timestamp_ms from the integer sensor_clock_ns
+    String columns holding timestamps (phone_datetime) are stored as
+    datetime64[ns], other strings cannot be stored. The footer indexes
+    every chunk with its row count, byte ranges and per-column min/max, so a
+    time range read decodes only the chunks that overlap it from a memory
+    map of the file. A derived time column is seeked on its integer source.
+    """
+    MAGIC = b"WSCNTR01"
+    VERSION = 2
+    _TAIL = struct.Struct("<Q")
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Container file, see write()
+        """
+        self.path = str(path)
+        self.footer = self._read_footer()
+
+    def __repr__(self) -> str:
+        return f"SensorContainer({self.path!r}, rows={self.n_rows}, chunks={len(self.chunks)})"
+
+    @property
+    def n_rows(self) -> int:
+        return self.footer["n_rows"]
+
+    @property
+    def columns(self) -> list:
+        return [column["name"] for column in self.footer["columns"]]
+
+    @property
+    def chunks(self) -> list:
+        return self.footer["chunks"]
+
+    @classmethod
+    def write(cls,
+              path: str,
+              data: pd.DataFrame,
+              chunk_rows: int = 65536,
+              compression: str = "zlib",
+              time_column: str = "timestamp_ms",
+              derived: dict = None
+        ) -> "SensorContainer":
+        """
+        Args:
+            path (str): File to write
+            data (pd.DataFrame): Standardised sensor data
+            chunk_rows (int): Rows per chunk, the unit of seeking
+            compression (str): "zlib" or None
+            time_column (str): Column indexed for time range reads
+            derived (dict, optional): Column -> (source column, divisor) for
+                columns equal to np.divide(source, divisor), only the
+                integer source is stored (e.g. a loader's DERIVED_COLUMNS)
+
+        Returns:
+            SensorContainer
+        """
+        if compression not in ("zlib", None):
+            raise ValueError(f"[SensorContainer] Unsupported compression {compression}")
+
+        columns = []
+        stored = {}
+        for name in data.columns:
+            values = data[name]
+            if values.dtype == object:
+                values = cls._as_datetime(name, values)
+
+            source = cls._derived_source(data, name, (derived or {}).get(name))
+            if source is not None:
+                columns.append({"name": name, "encoding": "derived", "dtype": values.dtype.str,
+                                "source": source[0], "divisor": source[1]})
+                continue
+
+            columns.append({"name": name, "encoding": cls._encoding(values), "dtype": values.dtype.str})
+            stored[name] = values.to_numpy()
+
+        chunks = []
+        with open(path, "wb") as f:
+            f.write(cls.MAGIC)
+            for start in range(0, len(data), chunk_rows):
+                entry = {"rows": min(chunk_rows, len(data) - start), "columns": {}}
+                for column in columns:
+                    if column["encoding"] == "derived":
+                        continue
+                    values = cls._as_int64(stored[column["name"]][start:start + chunk_rows])
+                    payload, meta = cls._encode(values, column["encoding"])
+                    if compression == "zlib":
+                        payload = zlib.compress(payload)
+                    meta.update(offset=f.tell(), nbytes=len(payload),
+                                min=cls._scalar(np.nanmin(values)), max=cls._scalar(np.nanmax(values)))
+                    f.write(payload)
+                    entry["columns"][column["name"]] = meta
+                chunks.append(entry)
+
+            footer = json.dumps({
+                "version": cls.VERSION,
+                "columns": columns,
+                "time_column": time_column if time_column in data.columns else None,
+                "compression": compression,
+                "n_rows": len(data),
+                "chunks": chunks,
+            }).encode()
+            f.write(footer)
+            f.write(cls._TAIL.pack(len(footer)))
+            f.write(cls.MAGIC)
+
+        return cls(path)
+
+    def read(self, start_ms: float = None, end_ms: float = None, columns: list = None) -> pd.DataFrame:
+        """
+        Rows with start_ms <= time < end_ms (either bound optional), only
+        chunks overlapping the range are decoded.
+
+        Each column is decoded straight into one output array. A column read
+        whole from a single uncompressed chunk in its own dtype is not
+        copied, it is a copy-on-write view of the file's memory map.
+        Otherwise decompression, delta decoding, narrowing back to the
+        column dtype or the row mask make one copy.
+
+        Args:
+            start_ms, end_ms (float, optional): Range of the time column
+            columns (list, optional): Columns to decode, defaults to all
+
+        Returns:
+            pd.DataFrame: With a default RangeIndex
+        """
+        time_column = self.footer["time_column"]
+        ranged = start_ms is not None or end_ms is not None
+        if ranged and time_column is None:
+            raise ValueError(f"[SensorContainer] {self.path} has no time column to seek on")
+
+        by_name = {column["name"]: column for column in self.footer["columns"]}
+        wanted = [c for c in self.footer["columns"] if columns is None or c["name"] in columns]
+
+        selected = [chunk for chunk in self.chunks
+                    if not ranged or self._overlaps(self._time_bounds(chunk, by_name[time_column]),
+                                                    start_ms, end_ms)]
+
+        # Views of a map outlive the file, the map is released with the last
+        # array using it. Copy-on-write, in place edits never reach the file
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        # Rows kept of each chunk, None for all of them
+        keeps = [None] * len(selected)
+        decoded = {}
+        if ranged:
+            for i, chunk in enumerate(selected):
+                time = self._column(mm, chunk, by_name[time_column], by_name, decoded, i)
+                keep = np.ones(len(time), dtype=bool)
+                if start_ms is not None:
+                    keep &= time >= start_ms
+                if end_ms is not None:
+                    keep &= time < end_ms
+                keeps[i] = None if keep.all() else keep
+
+        arrays = {column["name"]: self._gather(mm, selected, keeps, column, by_name, decoded)
+                  for column in wanted}
+
+        return pd.DataFrame(arrays, columns=[column["name"] for column in wanted], copy=False)
+
+    def _read_footer(self) -> dict:
+        size = os.path.getsize(self.path)
+        tail = self._TAIL.size + len(self.MAGIC)
+        with open(self.path, "rb") as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC or size < 2 * len(self.MAGIC) + self._TAIL.size:
+                raise ValueError(f"[SensorContainer] {self.path} is not a sensor container")
+            f.seek(size - tail)
+            (footer_length,) = self._TAIL.unpack(f.read(self._TAIL.size))
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"[SensorContainer] {self.path} is truncated")
+            f.seek(size - tail - footer_length)
+            return json.loads(f.read(footer_length))
+
+    def _decode(self, mm, meta: dict, column: dict) -> np.ndarray:
+        """ One stored column of a chunk, a view of the map when uncompressed """
+        if self.footer["compression"] == "zlib":
+            payload = zlib.decompress(mm[meta["offset"]:meta["offset"] + meta["nbytes"]])
+            values = np.frombuffer(payload, dtype=meta["dtype"])
+        else:
+            dtype = np.dtype(meta["dtype"])
+            values = np.frombuffer(mm, dtype=dtype, count=meta["nbytes"] // dtype.itemsize,
+                                   offset=meta["offset"])
+
+        if column["encoding"] == "delta":
+            restored = np.empty(len(values) + 1, dtype=np.int64)
+            restored[0] = meta["first"]
+            np.cumsum(values, dtype=np.int64, out=restored[1:])
+            restored[1:] += meta["first"]
+            return restored
+
+        return values
+
+    def _column(self, mm, chunk: dict, column: dict, by_name: dict, decoded: dict, i: int) -> np.ndarray:
+        """
+        Values of a column in chunk i, a derived column from its source.
+        Decoded arrays are kept in decoded so the time column read for the
+        row mask is not decoded again
+        """
+        key = (i, column["name"])
+        values = decoded.get(key)
+        if values is None:
+            if column["encoding"] == "derived":
+                source = self._column(mm, chunk, by_name[column["source"]], by_name, decoded, i)
+                values = np.divide(source, column["divisor"])
+            else:
+                values = self._decode(mm, chunk["columns"][column["name"]], column)
+            decoded[key] = values
+
+        return values
+
+    def _gather(self, mm, selected: list, keeps: list, column: dict, by_name: dict, decoded: dict) -> np.ndarray:
+        """ Kept rows of a column over the selected chunks, as one array """
+        dtype = np.dtype(column["dtype"])
+        # Datetimes are held as int64 ns
+        stored = np.dtype(np.int64) if dtype.kind in "mM" else dtype
+
+        if len(selected) == 1 and keeps[0] is None:
+            values = self._column(mm, selected[0], column, by_name, decoded, 0)
+            return values.astype(stored, copy=False).view(dtype)
+
+        lengths = [chunk["rows"] if keep is None else int(keep.sum()) for chunk, keep in zip(selected, keeps)]
+        out = np.empty(sum(lengths), dtype=stored)
+        position = 0
+        for i, (chunk, keep, length) in enumerate(zip(selected, keeps, lengths)):
+            if length == 0:
+                continue
+            values = self._column(mm, chunk, column, by_name, decoded, i)
+            out[position:position + length] = values if keep is None else values[keep]
+            position += length
+
+        return out.view(dtype)
+
+    def _time_bounds(self, chunk: dict, column: dict) -> dict:
+        """ Time column min/max of a chunk, of a derived column from its source """
+        if column["encoding"] != "derived":
+            return chunk["columns"][column["name"]]
+
+        # np.divide is monotonic, so these are the bounds of the derived rows
+        meta = chunk["columns"][column["source"]]
+        return {"min": np.divide(np.int64(meta["min"]), column["divisor"]),
+                "max": np.divide(np.int64(meta["max"]), column["divisor"])}
+
+    @staticmethod
+    def _overlaps(meta: dict, start_ms, end_ms) -> bool:
+        return ((start_ms is None or meta["max"] >= start_ms)
+                and (end_ms is None or meta["min"] < end_ms))
+
+    @staticmethod
+    def _derived_source(data: pd.DataFrame, name: str, source):
+        """ (source, divisor) when the column is exactly np.divide(source, divisor) """
+        if source is None:
+            return None
+
+        source_name, divisor = source
+        if source_name not in data.columns or data[source_name].dtype.kind not in "iu":
+            return None
+        if not np.array_equal(data[name].to_numpy(), np.divide(data[source_name].to_numpy(), divisor)):
+            print(f"[SensorContainer] {name} is not {source_name} / {divisor}, storing it as is")
+            return None
+
+        return source_name, divisor
+
+    @staticmethod
+    def _as_datetime(name: str, values: pd.Series) -> pd.Series:
+        """ String timestamps as datetime64[ns], other strings are an error """
+        try:
+            return pd.to_datetime(values, format="ISO8601").astype("datetime64[ns]")
+        except (ValueError, TypeError) as error:
+            raise ValueError(f"[SensorContainer] Cannot store non numeric column {name}: {error}")
+
+    @staticmethod
+    def _encoding(series: pd.Series) -> str:
+        kind = series.dtype.kind
+        if kind in "iuM" and series.is_monotonic_increasing and len(series) > 1:
+            return "delta"
+        if kind in "iubM":
+            return "int"
+        return "float"
+
+    @staticmethod
+    def _as_int64(values: np.ndarray) -> np.ndarray:
+        """ Datetimes and bools as integers, others unchanged """
+        if values.dtype.kind in "mM":
+            return values.view(np.int64)
+        if values.dtype.kind == "b":
+            return values.astype(np.int8)
+        return values
+
+    @staticmethod
+    def _narrow(values: np.ndarray) -> np.ndarray:
+        """ Smallest signed int dtype holding values """
+        if len(values) == 0:
+            return values.astype(np.int8)
+        low, high = values.min(), values.max()
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+        return values.astype(np.int64)
+
+    @classmethod
+    def _encode(cls, values: np.ndarray, encoding: str):
+        """ Chunk payload bytes and its footer entry """
+        if encoding == "delta":
+            values = values.astype(np.int64)
+            diffs = cls._narrow(np.diff(values))
+            return diffs.tobytes(), {"dtype": diffs.dtype.str, "first": int(values[0])}
+        if encoding == "int":
+            narrowed = cls._narrow(values.astype(np.int64))
+            return narrowed.tobytes(), {"dtype": narrowed.dtype.str}
+
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        return values.tobytes(), {"dtype": values.dtype.str}
+
+    @staticmethod
+    def _scalar(value):
+        return int(value) if np.issubdtype(type(value), np.integer) else float(value)
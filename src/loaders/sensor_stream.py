@@ -0,0 +1,36 @@
+class SensorStream:
+    """
+    Re-iterable chunked view of one sensor's files, stands in for the
+    sensor DataFrame when the loader is in streaming mode. Each iteration
+    re-reads the files through the loader's iter_sensor_data(), so only one
+    chunk is held in memory at a time. Holds just the loader and file
+    paths, so it pickles with the rest of the study data.
+    """
+
+    def __init__(self, loader, sensor_type: str, files: list, **kwargs):
+        """
+        Args:
+            loader (BaseLoader): Loader with an iter_sensor_data() method
+            sensor_type (str): hr, ppg, acc or gyro
+            files (list): Sensor file paths
+            **kwargs: Passed to iter_sensor_data(), e.g. chunk_size
+        """
+        self.loader = loader
+        self.sensor_type = sensor_type
+        self.files = list(files)
+        self.kwargs = kwargs
+
+    def __iter__(self):
+        return self.loader.iter_sensor_data(self.sensor_type, self.files, **self.kwargs)
+
+    def __repr__(self) -> str:
+        return f"SensorStream(sensor_type={self.sensor_type!r}, files={len(self.files)})"
+
+    @property
+    def empty(self) -> bool:
+        """ True when no rows would be streamed, as DataFrame.empty """
+        for chunk in self:
+            if not chunk.empty:
+                return False
+
+        return True
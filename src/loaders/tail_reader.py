@@ -0,0 +1,29 @@
+import io
+import pandas as pd
+
+def read_csv_tail(file_path, offset: int = 0, delimiter: str = ",", **read_options):
+    """
+    Parse the rows of a growing delimited file from a byte offset on. The
+    header line is read from the start of the file, only complete lines
+    are parsed so a row still being written is left for the next call.
+
+    Args:
+        file_path (str): Delimited text file with a header line
+        offset (int): Byte offset returned by the previous call, 0 for the
+            whole file
+        delimiter (str): Field delimiter
+        **read_options: Passed to pd.read_csv (usecols, dtype, ...)
+
+    Returns:
+        tuple: (pd.DataFrame of the new rows, byte offset to resume from)
+    """
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        start = max(offset, len(header))
+        f.seek(start)
+        tail = f.read()
+
+    end = tail.rfind(b"\n") + 1
+    data = pd.read_csv(io.BytesIO(header + tail[:end]), delimiter=delimiter, **read_options)
+
+    return data, start + end
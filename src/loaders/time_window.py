@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+class TimeWindow:
+    """
+    Row predicate pushed down into the loaders: an absolute [start, end)
+    range, a daily time of day range (which may wrap midnight, e.g.
+    22:00 - 06:00) or both. Times are unix epoch milliseconds, loaders
+    convert their own device clocks before calling mask().
+    """
+
+    def __init__(self, start_ms: float = None, end_ms: float = None, daily: tuple = None, tz: str = "UTC"):
+        """
+        Args:
+            start_ms, end_ms (float, optional): Absolute range, unix ms
+            daily (tuple of str, optional): ("HH:MM", "HH:MM") wall clock
+                start and end, end before start wraps midnight
+            tz (str): Time zone of the daily range
+        """
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.tz = tz
+        self.daily = None if daily is None else tuple(daily)
+        self._daily_ms = None if daily is None else tuple(self._time_of_day_ms(t) for t in daily)
+
+    def __repr__(self) -> str:
+        return (f"TimeWindow(start_ms={self.start_ms}, end_ms={self.end_ms}, "
+                f"daily={self.daily}, tz={self.tz!r})")
+
+    @classmethod
+    def from_config(cls, conf: dict):
+        """
+        Args:
+            conf (dict): data_source.time_window, e.g.
+                {"start": "2024-03-13T00:00", "end": 1710374400000}
+                or {"daily": ["22:00", "06:00"], "tz": "Europe/London"}.
+                Naive datetimes are in tz
+
+        Returns:
+            TimeWindow or None when conf is empty
+        """
+        if not conf:
+            return None
+
+        tz = conf.get("tz", "UTC")
+        return cls(
+            start_ms=cls._to_unix_ms(conf.get("start"), tz),
+            end_ms=cls._to_unix_ms(conf.get("end"), tz),
+            daily=conf.get("daily"),
+            tz=tz
+        )
+
+    def mask(self, unix_ms) -> np.ndarray:
+        """
+        Args:
+            unix_ms (array-like): Row times, unix epoch ms
+
+        Returns:
+            numpy.ndarray: True for rows inside the window
+        """
+        unix_ms = np.asarray(unix_ms, dtype=np.float64)
+        keep = np.ones(len(unix_ms), dtype=bool)
+        if self.start_ms is not None:
+            keep &= unix_ms >= self.start_ms
+        if self.end_ms is not None:
+            keep &= unix_ms < self.end_ms
+
+        if self._daily_ms is not None:
+            time_of_day = self._local_time_of_day_ms(unix_ms)
+            start, end = self._daily_ms
+            if start <= end:
+                keep &= (time_of_day >= start) & (time_of_day < end)
+            else:
+                keep &= (time_of_day >= start) | (time_of_day < end)
+
+        return keep
+
+    def is_past(self, unix_ms: float) -> bool:
+        """
+        True when unix_ms is at or after the absolute end, a loader reading
+        a time ordered file can stop once the last row it read is past
+        """
+        return self.end_ms is not None and unix_ms >= self.end_ms
+
+    def _local_time_of_day_ms(self, unix_ms: np.ndarray) -> np.ndarray:
+        if self.tz in (None, "UTC"):
+            return np.mod(unix_ms, MS_PER_DAY)
+
+        local = pd.to_datetime(unix_ms, unit="ms", utc=True).tz_convert(self.tz)
+        midnight = local.normalize()
+        return ((local - midnight) / pd.Timedelta(milliseconds=1)).to_numpy()
+
+    @staticmethod
+    def _time_of_day_ms(value: str) -> float:
+        hours, minutes, *seconds = (float(part) for part in str(value).split(":"))
+        return ((hours * 60 + minutes) * 60 + (seconds[0] if seconds else 0)) * 1000
+
+    @staticmethod
+    def _to_unix_ms(value, tz):
+        if value is None or isinstance(value, (int, float)):
+            return value
+
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(tz)
+        return timestamp.value / 1e6
@@ -1,5 +1,10 @@
+import os
+from collections import OrderedDict
+import pandas as pd
+
 from .pipeline_factory import PipelineFactory
 from src.data_model.study_data import StudyData
+from src.data_model.sensor_store import SensorStore, SensorMapping
 
 class PipelineOrchestrator:
     """
@@ -8,6 +13,19 @@ class PipelineOrchestrator:
     def __init__(self, study_data: StudyData, config):
         self.study_data = study_data
         self.config = config
+        ds = config.get("data_source", {})
+        store = ds.get("store", {})
+        # Sessions whose raw sensor data and processed outputs stay in
+        # memory after processing, least recently processed are released
+        # first. Only for lazy or store backed loading, an eager run keeps
+        # everything in StudyData. None keeps all
+        self.max_loaded_sessions = None
+        if ds.get("lazy", False) or store.get("enabled", False):
+            self.max_loaded_sessions = ds.get("max_loaded_sessions")
+        # Processed outputs of released sessions are spilled to the store
+        # directory and opened again on access
+        self.spill_store = SensorStore(store.get("dir", "data/store/"))
+        self._loaded_sessions = OrderedDict()
 
     def run(self):
         for subject_id, subject in self.study_data.subjects.items():
@@ -32,4 +50,37 @@ class PipelineOrchestrator:
                     session_data.processed[f"{sensor_type}_processed"] = processed_data
                     session_data.processed[f"{sensor_type}_features"] = processed_features 
 
+                self._evict(subject_id, session_name, session_data)
+
+    def _evict(self, subject_id, session_name, session_data):
+        """
+        Track the processed session and release the least recently
+        processed sessions beyond max_loaded_sessions. Raw sensor data is
+        dropped (lazy sensors are loaded again if accessed later) and
+        processed DataFrames are spilled to the store, session.processed
+        then holds StoredFrame handles that load on access
+        """
+        if self.max_loaded_sessions is None:
+            return
+
+        self._loaded_sessions[(subject_id, session_name)] = session_data
+        self._loaded_sessions.move_to_end((subject_id, session_name))
+        while len(self._loaded_sessions) > self.max_loaded_sessions:
+            (old_subject, old_session), old_data = self._loaded_sessions.popitem(last=False)
+            print(f"[PipelineOrchestrator] Releasing session data: {old_subject}/{old_session}")
+            self._spill(old_subject, old_session, old_data.processed)
+            for mapping in (old_data.sensors, old_data.processed):
+                release = getattr(mapping, "release", None)
+                if release is not None:
+                    release()
+
+    def _spill(self, subject_id, session_name, processed):
+        """ Replace processed DataFrames with handles on stored copies """
+        if not isinstance(processed, SensorMapping):
+            return
 
+        for key in list(processed):
+            value = processed.raw(key)
+            if isinstance(value, pd.DataFrame):
+                processed[key] = self.spill_store.write(subject_id, session_name,
+                                                        os.path.join("processed", key), value)
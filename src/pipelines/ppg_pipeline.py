@@ -18,7 +18,10 @@ class PPGPipeline:
         self.checkpoint = CheckpointManager(config['checkpoint']['pipeline_ppg'])
 
     def run(self, raw_ppg_df:pd.DataFrame ):
-        """ Main entry for pipeline """
+        """
+        Main entry for pipeline, raw_ppg_df may also be a SensorStream of
+        chunks when the loader is in streaming mode
+        """
         if raw_ppg_df.empty:
             print("[PPGPipeline] Empty df")
             return raw_ppg_df, None
@@ -47,12 +50,53 @@ class PPGPipeline:
         """
         print("[PPGPipeline] Preprocessing PPG data.")
         preprocessor = PPGPreProcessor(raw_ppg_df, self.config)
+        if not isinstance(raw_ppg_df, pd.DataFrame):
+            return self._preprocess_stream(preprocessor)
+
         sections = preprocessor.create_compliance_sections()
         sample_freq, _, _ = preprocessor.compute_sample_freq(sections)
         resampled_sections = preprocessor.resample(sections=sections, 
                                                    resample_freq=self.CONF_preprocess.get("resample_freq"),
                                                    input_freq=sample_freq)
-        preprocessor.filter_cheby2(resampled_sections, self.CONF_preprocess.get("resample_freq"))
+        preprocessor.filter_sections(resampled_sections, self.CONF_preprocess.get("resample_freq"))
+
+        return resampled_sections
+
+    def _preprocess_stream(self, preprocessor: PPGPreProcessor):
+        """
+        Preprocessing of chunked ppg data, compliance sections are resampled
+        and filtered in batches as iter_compliance_sections() yields them so
+        only the resampled output and one batch of raw sections (about
+        stream_chunk_size rows) are held. The sample frequency is estimated
+        on the first batch.
+
+        Returns:
+            list of pd.DataFrame: Resampled and filtered sections
+        """
+        resample_freq = self.CONF_preprocess.get("resample_freq")
+        batch_rows = self.config["data_source"].get("stream_chunk_size") or 1
+        sample_freq = None
+        resampled_sections = []
+
+        def batches():
+            batch, rows = [], 0
+            for section in preprocessor.iter_compliance_sections():
+                batch.append(section)
+                rows += len(section)
+                if rows >= batch_rows:
+                    yield batch
+                    batch, rows = [], 0
+            if batch:
+                yield batch
+
+        for sections in batches():
+            if sample_freq is None:
+                sample_freq, _, _ = preprocessor.compute_sample_freq(sections)
+            resampled = preprocessor.resample(sections=sections,
+                                              resample_freq=resample_freq,
+                                              input_freq=sample_freq)
+            preprocessor.filter_sections(resampled, resample_freq)
+            resampled_sections.extend(resampled)
 
         return resampled_sections
     
@@ -65,7 +109,11 @@ class PPGPipeline:
         print("[PPGPipeline] Processing beats.")
         heartbeat_detector = HeartBeatDetector(self.config)
         combined_sections, all_beats = heartbeat_detector.process_sections(sections)
-        organiser = BeatOrganiser(group_size=self.config["ppg_processing"]["sqi_group_size"])
+        organiser = BeatOrganiser(
+            group_size=self.config["ppg_processing"]["sqi_group_size"],
+            group_by=self.config["ppg_processing"].get("sqi_group_by", "beats"),
+            epoch_ms=self.config["ppg_processing"].get("sqi_epoch_s", 30) * 1000
+        )
         grouped_beats = organiser.group_n_beats_inplace(combined_sections)
         
         return grouped_beats, all_beats 
@@ -102,7 +150,7 @@ class PPGPipeline:
         Compute high-resolution biomarkers based on intra-pulse features
         """
         print("[PPGPipeline] Computing pulse wave features.")
-        pwf = PulseWaveFeatures(data)
+        pwf = PulseWaveFeatures(data, spline_order=self.config["ppg_processing"].get("spline_order", 4))
         data, beat_features = pwf.compute()
         
         return data, beat_features
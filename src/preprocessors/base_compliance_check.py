@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+
+from .compliance_engine import ComplianceEngine
+from .streaming_compliance import StreamingComplianceDetector
+
+class BaseComplianceCheck(ABC):
+    """
+    Compliance (is the ppg sensor being worn) sectioning shared across
+    devices, a device only provides its is_compliant() rule
+    """
+
+    @abstractmethod
+    def is_compliant(self, ppg: np.ndarray, config) -> np.ndarray:
+        """ Bool mask of the rows where the device is worn """
+        pass
+
+    def engine(self, config) -> ComplianceEngine:
+        conf = config['ppg_preprocessing']
+        return ComplianceEngine(
+            predicate=lambda ppg: self.is_compliant(ppg, config),
+            min_duration_ms=conf['min_duration'] * 1000,  # Convert to ms
+            max_length=conf.get('max_section_length', 60000)
+        )
+
+    def _hysteresis(self, config) -> bool:
+        conf = config['ppg_preprocessing']
+        return any(conf.get(key, 0) for key in ('enter_duration', 'exit_duration', 'merge_gap'))
+
+    def compliance_spans(self, data, config) -> np.ndarray:
+        """
+        (start, stop) row spans of the compliant sections, no frames are
+        built. Hysteresis settings are not applied
+
+        Returns:
+            numpy.ndarray: (n_sections, 2)
+        """
+        return self.engine(config).spans(data['ppg'].to_numpy(), data['timestamp_ms'].to_numpy())
+
+    def create_compliance_sections(self, data, config):
+        """
+        Identify sections where device was worn and split data into
+        reasonable sized chunks for beat detection algos
+
+        Returns:
+            list of pd.DataFrame: Sections with section_id from 1
+        """
+        if self._hysteresis(config):
+            return list(self.iter_compliance_sections([data], config))
+
+        return self.engine(config).sections(data)
+
+    def detector(self, config) -> StreamingComplianceDetector:
+        """
+        Chunk-fed detector, hysteresis from ppg_preprocessing enter_duration,
+        exit_duration and merge_gap (seconds, 0 when not set)
+        """
+        engine = self.engine(config)
+        conf = config['ppg_preprocessing']
+        return StreamingComplianceDetector(
+            predicate=engine.predicate,
+            min_duration_ms=engine.min_duration_ms,
+            max_length=engine.max_length,
+            enter_ms=conf.get('enter_duration', 0) * 1000,
+            exit_ms=conf.get('exit_duration', 0) * 1000,
+            merge_gap_ms=conf.get('merge_gap', 0) * 1000
+        )
+
+    def iter_compliance_sections(self, chunks, config):
+        """
+        Streaming create_compliance_sections() over an iterable of data
+        chunks, e.g. PolarVerityLoader.iter_sensor_data(). A section open
+        at the end of a chunk is carried into the next one, so the sections
+        and their ids match the in-memory method. Sections are yielded as
+        they close and full max_length pieces of a long section as soon as
+        they are complete.
+
+        Yields:
+            pd.DataFrame: Compliant sections, section_id from 1
+        """
+        detector = self.detector(config)
+        for chunk in chunks:
+            yield from detector.feed(chunk)
+
+        yield from detector.flush()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+class ComplianceEngine:
+    """
+    Device independent compliance sectioning. A device rule is a predicate
+    marking the rows where the sensor is worn, runs of those rows lasting at
+    least min_duration_ms are split into pieces of at most max_length rows.
+
+    Sections are (start, stop) row spans found in one vectorised pass over
+    the mask, frames are only built for callers that need them.
+    """
+
+    def __init__(self, predicate, min_duration_ms: float, max_length: int = 60000):
+        """
+        Args:
+            predicate (callable): ppg values (np.ndarray) -> bool mask of
+                compliant rows
+            min_duration_ms (float): Shortest compliant run kept, from its
+                first to its last timestamp
+            max_length (int): Most rows in one section
+        """
+        self.predicate = predicate
+        self.min_duration_ms = min_duration_ms
+        self.max_length = max_length
+
+    def spans(self, ppg, timestamps) -> np.ndarray:
+        """
+        Args:
+            ppg (array-like): Signal the predicate is applied to
+            timestamps (array-like): ms, same length as ppg
+
+        Returns:
+            numpy.ndarray: (n_sections, 2) int64 [start, stop) row positions
+        """
+        mask = np.asarray(self.predicate(np.asarray(ppg)), dtype=bool)
+        timestamps = np.asarray(timestamps)
+        if not mask.any():
+            return np.empty((0, 2), dtype=np.int64)
+
+        # Run boundaries are where the mask changes value
+        edges = np.flatnonzero(np.diff(mask)) + 1
+        if mask[0]:
+            edges = np.concatenate(([0], edges))
+        if mask[-1]:
+            edges = np.concatenate((edges, [len(mask)]))
+        starts, stops = edges[0::2], edges[1::2]
+
+        duration = timestamps[stops - 1] - timestamps[starts]
+        valid = duration >= self.min_duration_ms
+        starts, stops = starts[valid], stops[valid]
+
+        return self._split(starts, stops)
+
+    def sections(self, data: pd.DataFrame, spans: np.ndarray = None) -> list:
+        """
+        Compliant sections of data as frames with a section_id column from
+        1, data itself is not modified
+
+        Args:
+            data (pd.DataFrame): Standardised data with ppg and timestamp_ms
+            spans (numpy.ndarray, optional): From spans(), found when not given
+
+        Returns:
+            list of pd.DataFrame
+        """
+        if spans is None:
+            spans = self.spans(data['ppg'].to_numpy(), data['timestamp_ms'].to_numpy())
+
+        return [data.iloc[start:stop].assign(section_id=i)
+                for i, (start, stop) in enumerate(spans, start=1)]
+
+    def _split(self, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+        """ Runs cut from their start into max_length pieces """
+        pieces = -(-(stops - starts) // self.max_length)
+        offsets = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        piece_starts = np.repeat(starts, pieces) + offsets * self.max_length
+        piece_stops = np.minimum(piece_starts + self.max_length, np.repeat(stops, pieces))
+
+        return np.column_stack((piece_starts, piece_stops)).astype(np.int64)
@@ -1,12 +1,21 @@
 from .compliance_check_factory import ComplianceCheckFactory
+from .resampler import SectionResampler
+from .filter_bank import FilterBank
+from .streaming_filter import StreamingFilter
 
-from scipy.signal import cheby2, filtfilt
+import os
 import pandas as pd
 import numpy as np
 from datetime import timedelta
 
 class PPGPreProcessor:
-    def __init__(self, data: pd.DataFrame, config):
+    def __init__(self, data, config):
+        """
+        Args:
+            data (pd.DataFrame or iterable of pd.DataFrame): Standardised
+                sensor data, or its chunks in time order (streaming mode)
+            config (dict)
+        """
         self.data = data
         self.config = config
         self.device = config['data_source']['device']
@@ -16,10 +25,35 @@ class PPGPreProcessor:
     def create_compliance_sections(self):
         """ 
         Delegates device compliance (is the ppg sensor being worn) 
-        thresholding to device specific method
+        thresholding to device specific method. Chunked data is streamed
+        through the device's iter_compliance_sections() where it has one,
+        otherwise the chunks are combined first.
+        """
+        if isinstance(self.data, pd.DataFrame):
+            return self.compliance_check_method.create_compliance_sections(self.data, self.config)
+
+        if hasattr(self.compliance_check_method, "iter_compliance_sections"):
+            return list(self.compliance_check_method.iter_compliance_sections(self.data, self.config))
+
+        data = pd.concat(list(self.data), ignore_index=True)
+        return self.compliance_check_method.create_compliance_sections(data, self.config)
+
+    def iter_compliance_sections(self):
         """
-    
-        return self.compliance_check_method.create_compliance_sections(self.data, self.config)
+        Compliance sections yielded as they close, chunked data is consumed
+        as it is iterated so input may be larger than memory or still
+        arriving
+
+        Yields:
+            pd.DataFrame: Sections with section_id from 1
+        """
+        chunks = [self.data] if isinstance(self.data, pd.DataFrame) else self.data
+        if hasattr(self.compliance_check_method, "iter_compliance_sections"):
+            yield from self.compliance_check_method.iter_compliance_sections(chunks, self.config)
+            return
+
+        data = pd.concat(list(chunks), ignore_index=True)
+        yield from self.compliance_check_method.create_compliance_sections(data, self.config)
          
     def compute_sample_freq(self, sections: list(), downsampling_factor=1):
         """
@@ -58,62 +92,102 @@ class PPGPreProcessor:
         return final_freq, interval_ms, interval_str
 
    
-    def resample(self, sections: pd.DataFrame, resample_freq, input_freq):
+    def resample(self, sections: pd.DataFrame, resample_freq, input_freq, method: str = None):
         """
-        Resample time series data properly!
+        Resample time series data properly! All sections are resampled in
+        one pass onto an exact time grid (no drift at rates that do not
+        divide 1000) and written into one buffer, see SectionResampler
+
+        Args:
+            sections (list of pd.DataFrame): With timestamp_ms and ppg
+            resample_freq (float): Output rate, Hz
+            input_freq (float): Input rate, Hz, used by "poly"
+            method (str, optional): linear, cubic or poly, defaults to
+                ppg_preprocessing.resample_method or linear
+
+        Returns:
+            list of pd.DataFrame: timestamp_ms and ppg per section
         """
-        resampled_sections = []
+        if method is None:
+            method = self.config.get('ppg_preprocessing', {}).get('resample_method', 'linear')
 
-        for section in sections:
+        resampler = SectionResampler(resample_freq, method=method, input_freq=input_freq)
+        resampled_sections = resampler.resample_sections(sections)
             
-            # Define target sampling frequency in milliseconds
-            resample_period_ms = int(1000 / (resample_freq))
-
-            # Create a regular time grid in milliseconds from timestamp ms
-            start_time_ms = section['timestamp_ms'].min()
-            end_time_ms = section['timestamp_ms'].max()
-            reg_time_index_ms = np.arange(start_time_ms, end_time_ms, resample_period_ms)
-
-            # Interpolate PPG using timestamp_ms
-            interpolated_ppg = np.interp(
-                reg_time_index_ms, section['timestamp_ms'], section['ppg']
-            )
-
-            # Create a new DataFrame for the resampled section
-            section_resampled = pd.DataFrame({
-                'timestamp_ms': reg_time_index_ms,
-                'ppg': interpolated_ppg
-            })
-            
-            resampled_sections.append(section_resampled)
-            
-        print(f"[PPGPreProcessor] Sensor resampled from {input_freq} Hz to {resample_freq} Hz")
+        print(f"[PPGPreProcessor] Sensor resampled from {input_freq} Hz to {resample_freq} Hz ({method})")
 
         return resampled_sections 
              
 
-    def filter_cheby2(self, sections, sample_freq):
+    def filter_sections(self, sections, sample_freq, kind: str = None):
         """
-        Apply Chebyshev Type II filter to each section of input data
-        
-        This outputs the result in two ways:
-         1. appendeds a new column to the input dataframe inplace called filtered_value
-         2. Returns a new dataframe with the filtered_values and timestamp on their own.
+        Apply the configured band-pass filter (config['filter'] type:
+        butter, cheby1, cheby2 or fir) to each section of input data, in
+        forward and reverse to correct any phase delay. Sections of equal
+        length are filtered in one batched call, see FilterBank.
+
+        The result is appended inplace to each section as a new column
+        called filtered_value.
+
+        Args:
+            sections (list of pd.DataFrame): With a ppg column
+            sample_freq (float): Sample rate of the sections Hz
+            kind (str, optional): Overrides config['filter'] type
+
+        Returns:
+            list of pd.DataFrame: The same sections
         """
-           
-        lowcut = self.config['filter']['lowcut']
-        highcut = self.config['filter']['highcut']
-        order = self.config['filter']['order']
-        nyquist = 0.5 * sample_freq
-
-        b, a = cheby2(order, 20, [lowcut / nyquist, highcut / nyquist], btype='band')
-        filtered_sections = []
-
-        for section in sections:
-            # Run filter in forward and reverse to correct any phase delay
-            filtered_values = filtfilt(b, a, section['ppg'])
+        bank = FilterBank.from_config(self.config['filter'], sample_freq, kind=kind)
+        # All results go into one buffer
+        bounds = np.concatenate(([0], np.cumsum([len(section) for section in sections])))
+        buffer = np.empty(bounds[-1], dtype=np.float64)
+        filtered = bank.filtfilt([section['ppg'].to_numpy() for section in sections],
+                                 out=[buffer[a:b] for a, b in zip(bounds[:-1], bounds[1:])])
+
+        for section, filtered_values in zip(sections, filtered):
             section['filtered_value'] = filtered_values
-            section = section[['timestamp_ms','filtered_value']]
-            filtered_sections.append(section)
 
-        return filtered_sections
+        return sections
+
+    def filter_cheby2(self, sections, sample_freq):
+        """
+        Apply Chebyshev Type II filter to each section of input data, the
+        filtered_value column is added inplace, see filter_sections()
+        """
+        return self.filter_sections(sections, sample_freq, kind="cheby2")
+
+    def stream_filter(self, chunks, sample_freq, state_path: str = None):
+        """
+        Low latency mode, causal band-pass filtering of chunks of one
+        continuous section as they arrive. The filter state is carried
+        across chunks and, with state_path, loaded before the first chunk
+        and saved after the last so the next run carries on. Each chunk is
+        returned as soon as it is filtered, delayed only by the filter
+        itself (see StreamingFilter, config['filter'] compensate_delay and
+        delay_ms).
+
+        Args:
+            chunks (iterable of pd.DataFrame): timestamp_ms and ppg, evenly
+                sampled at sample_freq
+            sample_freq (float): Hz
+            state_path (str, optional): .npz file of the filter state
+
+        Yields:
+            pd.DataFrame: timestamp_ms and filtered_value per chunk
+        """
+        conf = self.config['filter']
+        stream = StreamingFilter(
+            FilterBank.from_config(conf, sample_freq),
+            compensate_delay=conf.get('compensate_delay', False),
+            delay_ms=conf.get('delay_ms')
+        )
+        if state_path is not None and os.path.exists(state_path):
+            stream.load_state(state_path)
+
+        try:
+            for chunk in chunks:
+                timestamps, filtered = stream.process(chunk['ppg'].to_numpy(), chunk['timestamp_ms'].to_numpy())
+                yield pd.DataFrame({'timestamp_ms': timestamps, 'filtered_value': filtered})
+        finally:
+            if state_path is not None:
+                stream.save_state(state_path)
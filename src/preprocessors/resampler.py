@@ -0,0 +1,129 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CubicSpline
+from scipy.signal import resample_poly
+
+class SectionResampler:
+    """
+    Resample many sections in one pass over contiguous arrays. Sections are
+    given as concatenated times/values with offsets, the output of every
+    section is written into one preallocated (2, n) buffer of times and
+    values.
+
+    The grid is exact, sample k of a section is at start + k * 1000 / freq
+    ms, so rates that do not divide 1000 (e.g. 55 Hz) do not drift. Grid
+    points run from the section start up to, not including, its end.
+
+    Methods:
+        - "linear": np.interp
+        - "cubic": cubic spline through the samples
+        - "poly": polyphase filtering (scipy.signal.resample_poly), treats
+          the input as uniformly sampled at input_freq
+    """
+    METHODS = ("linear", "cubic", "poly")
+
+    def __init__(self, resample_freq: float, method: str = "linear", input_freq: float = None):
+        """
+        Args:
+            resample_freq (float): Output rate, Hz
+            method (str): linear, cubic or poly
+            input_freq (float, optional): Input rate, Hz, needed for poly
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"[SectionResampler] Unknown method {method}, expected one of {self.METHODS}")
+        if method == "poly" and not input_freq:
+            raise ValueError("[SectionResampler] poly resampling needs input_freq")
+
+        self.resample_freq = resample_freq
+        self.period_ms = 1000.0 / resample_freq
+        self.method = method
+        self.input_freq = input_freq
+        if method == "poly":
+            ratio = Fraction(float(resample_freq) / float(input_freq)).limit_denominator(1000)
+            self.up, self.down = ratio.numerator, ratio.denominator
+
+    def output_length(self, start_ms: float, end_ms: float, n_samples: int) -> int:
+        """ Grid points of a section """
+        if n_samples == 0:
+            return 0
+        if self.method == "poly":
+            return math.ceil(n_samples * self.up / self.down)
+
+        # Points in [start, end), tolerant of float error at the end point
+        return max(0, math.ceil((end_ms - start_ms) / self.period_ms - 1e-9))
+
+    def resample(self, times: np.ndarray, values: np.ndarray, offsets: np.ndarray):
+        """
+        Args:
+            times (np.ndarray): Timestamps (ms) of all sections, concatenated
+            values (np.ndarray): Samples, same length
+            offsets (np.ndarray): Start of each section in times, and the
+                total length last (n_sections + 1 entries)
+
+        Returns:
+            tuple: (np.ndarray (2, n) of resampled times and values,
+                np.ndarray of output offsets)
+        """
+        times = np.ascontiguousarray(times, dtype=np.float64)
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+
+        lengths = [self.output_length(times[a], times[b - 1], b - a) if b > a else 0
+                   for a, b in zip(offsets[:-1], offsets[1:])]
+        out_offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        out = np.empty((2, out_offsets[-1]), dtype=np.float64)
+
+        for (a, b), (c, d) in zip(zip(offsets[:-1], offsets[1:]), zip(out_offsets[:-1], out_offsets[1:])):
+            if d == c:
+                continue
+            grid = out[0, c:d]
+            np.multiply(np.arange(d - c, dtype=np.float64), self.period_ms, out=grid)
+            grid += times[a]
+            out[1, c:d] = self._resample_section(times[a:b], values[a:b], grid)
+
+        return out, out_offsets
+
+    def resample_sections(self, sections: list) -> list:
+        """
+        Resample section frames, the output frames are views on one buffer
+
+        Args:
+            sections (list of pd.DataFrame): With timestamp_ms and ppg
+
+        Returns:
+            list of pd.DataFrame: timestamp_ms and ppg per section
+        """
+        if not sections:
+            return []
+
+        times = np.concatenate([section['timestamp_ms'].to_numpy(dtype=np.float64) for section in sections])
+        values = np.concatenate([section['ppg'].to_numpy(dtype=np.float64) for section in sections])
+        offsets = np.concatenate(([0], np.cumsum([len(section) for section in sections])))
+
+        out, out_offsets = self.resample(times, values, offsets)
+
+        return [pd.DataFrame(out[:, c:d].T, columns=['timestamp_ms', 'ppg'], copy=False)
+                for c, d in zip(out_offsets[:-1], out_offsets[1:])]
+
+    def _resample_section(self, times: np.ndarray, values: np.ndarray, grid: np.ndarray) -> np.ndarray:
+        if self.method == "poly":
+            return resample_poly(values, self.up, self.down)[:len(grid)]
+
+        times, values = self._increasing(times, values)
+        if self.method == "cubic" and len(times) >= 4:
+            return CubicSpline(times, values, extrapolate=False)(grid)
+
+        return np.interp(grid, times, values)
+
+    @staticmethod
+    def _increasing(times: np.ndarray, values: np.ndarray):
+        """ Samples sorted by time with repeated timestamps dropped """
+        if len(times) < 2 or (np.diff(times) > 0).all():
+            return times, values
+
+        order = np.argsort(times, kind="stable")
+        times, first = np.unique(times[order], return_index=True)
+        return times, values[order][first]
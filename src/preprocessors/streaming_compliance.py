@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+
+class StreamingComplianceDetector:
+    """
+    Chunk-fed compliance sectioning for input that does not fit in memory
+    or is still arriving. The open section is carried across chunks and
+    sections are returned as soon as they close, only the rows of the open
+    section (and a pending gap) are held.
+
+    Debouncing, all in ms and 0 by default (then the sections match
+    ComplianceEngine):
+        - enter_ms: a compliant run opens a section once it has lasted
+          enter_ms, the section starts at the run's first row
+        - exit_ms: an open section closes once non-compliant rows have
+          lasted exit_ms, it ends at its last compliant row. Shorter
+          dropouts stay in the section
+        - merge_gap_ms: a closed section is held, if the next one opens
+          less than merge_gap_ms after its last compliant row the two are
+          merged with the gap rows between them
+    A closed section is kept when its first to last compliant row spans
+    min_duration_ms, and is split from its start into max_length row pieces.
+    Full pieces of a valid open section are returned without waiting for
+    it to close.
+    """
+    IDLE, OPEN, HELD = "idle", "open", "held"
+
+    def __init__(self,
+                 predicate,
+                 min_duration_ms: float,
+                 max_length: int = 60000,
+                 enter_ms: float = 0,
+                 exit_ms: float = 0,
+                 merge_gap_ms: float = 0
+        ):
+        """
+        Args:
+            predicate (callable): ppg values (np.ndarray) -> bool mask of
+                compliant rows
+            min_duration_ms (float): Shortest section kept
+            max_length (int): Most rows in one section
+            enter_ms, exit_ms, merge_gap_ms (float): Hysteresis and gap
+                merging, see class docstring
+        """
+        self.predicate = predicate
+        self.min_duration_ms = min_duration_ms
+        self.max_length = max_length
+        self.enter_ms = enter_ms
+        self.exit_ms = exit_ms
+        self.merge_gap_ms = merge_gap_ms
+
+        self.state = self.IDLE
+        self.section_id = 0
+        self._rows = _RowBuffer()
+        self._confirmed = 0           # Leading rows of _rows in the section
+        self._section_start_ms = None
+        self._last_compliant_ms = None
+        self._entering_since = None   # First time of a compliant run not yet entered
+        self._entering_rows = 0       # Its rows, at the end of _rows
+        self._closing_since = None    # First time of a dropout in an open section
+
+    def feed(self, chunk: pd.DataFrame) -> list:
+        """
+        Args:
+            chunk (pd.DataFrame): Next rows in time order, with ppg and
+                timestamp_ms
+
+        Returns:
+            list of pd.DataFrame: Sections finished by this chunk, with
+                section_id counting on from previous calls
+        """
+        finished = []
+        if len(chunk) == 0:
+            return finished
+
+        compliant = np.asarray(self.predicate(chunk['ppg'].to_numpy()), dtype=bool)
+        times = chunk['timestamp_ms'].to_numpy()
+
+        # Runs of equal compliance
+        edges = np.flatnonzero(np.diff(compliant)) + 1
+        bounds = np.concatenate(([0], edges, [len(chunk)]))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            run = chunk.iloc[start:stop]
+            if compliant[start]:
+                self._compliant_run(run, times[start:stop], finished)
+            else:
+                self._dropout_run(run, times[start:stop], finished)
+
+        return finished
+
+    def flush(self) -> list:
+        """
+        End of input, closes the open or held section
+
+        Returns:
+            list of pd.DataFrame
+        """
+        finished = []
+        if self.state != self.IDLE:
+            self._finalise(finished)
+
+        self._entering_since = None
+        self._entering_rows = 0
+        self._reset()
+        return finished
+
+    def _compliant_run(self, run, times, finished):
+        if self.state == self.OPEN:
+            self._closing_since = None
+            self._rows.append(run)
+            self._confirm(times[-1], finished)
+            return
+
+        # Idle or held, the run has to last enter_ms
+        if self._entering_since is None:
+            self._entering_since = times[0]
+            self._entering_rows = 0
+        self._rows.append(run)
+        self._entering_rows += len(run)
+        if not (times - self._entering_since >= self.enter_ms).any():
+            return
+
+        if self.state == self.HELD and self._entering_since - self._last_compliant_ms < self.merge_gap_ms:
+            # Merge with the held section, the gap rows join it
+            self.state = self.OPEN
+        else:
+            if self.state == self.HELD:
+                self._finalise(finished)
+            self._rows.keep_tail(self._entering_rows)
+            self._confirmed = 0
+            self._section_start_ms = self._entering_since
+            self.state = self.OPEN
+
+        self._entering_since = None
+        self._entering_rows = 0
+        self._confirm(times[-1], finished)
+
+    def _dropout_run(self, run, times, finished):
+        if self.state == self.IDLE:
+            # Rows of a run that never entered are dropped
+            self._rows.clear()
+            self._entering_since = None
+            self._entering_rows = 0
+            return
+
+        self._rows.append(run)
+        if self.state == self.HELD:
+            self._entering_since = None
+            self._entering_rows = 0
+            if times[-1] - self._last_compliant_ms >= self.merge_gap_ms:
+                self._finalise(finished)
+                self._reset()
+            return
+
+        # Open, close once the dropout has lasted exit_ms
+        if self._closing_since is None:
+            self._closing_since = times[0]
+        if not (times - self._closing_since >= self.exit_ms).any():
+            return
+
+        self._closing_since = None
+        if self.merge_gap_ms > 0 and times[-1] - self._last_compliant_ms < self.merge_gap_ms:
+            self.state = self.HELD
+        else:
+            self._finalise(finished)
+            self._reset()
+
+    def _confirm(self, last_compliant_ms, finished):
+        """ All buffered rows belong to the open section """
+        self._confirmed = len(self._rows)
+        self._last_compliant_ms = last_compliant_ms
+        # Full pieces from the start of a valid section are final
+        while self._valid() and self._confirmed > self.max_length:
+            finished.append(self._label(self._rows.take(self.max_length)))
+            self._confirmed -= self.max_length
+
+    def _finalise(self, finished):
+        """ Emit the confirmed rows of the section, if it is long enough """
+        if self._valid():
+            while self._confirmed > 0:
+                n = min(self.max_length, self._confirmed)
+                finished.append(self._label(self._rows.take(n)))
+                self._confirmed -= n
+        self._confirmed = 0
+
+        # Rows after the section are only kept for a run being entered
+        self._rows.keep_tail(self._entering_rows)
+        self.state = self.IDLE
+
+    def _valid(self) -> bool:
+        return (self._section_start_ms is not None
+                and self._last_compliant_ms - self._section_start_ms >= self.min_duration_ms)
+
+    def _label(self, section: pd.DataFrame) -> pd.DataFrame:
+        self.section_id += 1
+        section['section_id'] = self.section_id
+        return section
+
+    def _reset(self):
+        """ Back to idle, an entering run is kept """
+        self.state = self.IDLE
+        self._confirmed = 0
+        self._section_start_ms = None
+        self._last_compliant_ms = None
+        self._closing_since = None
+        self._rows.keep_tail(self._entering_rows)
+
+
+class _RowBuffer:
+    """ Consecutive frame pieces, concatenated only when rows are taken """
+
+    def __init__(self):
+        self._pieces = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, frame: pd.DataFrame):
+        self._pieces.append(frame)
+        self._length += len(frame)
+
+    def take(self, n: int) -> pd.DataFrame:
+        """ Remove and return the first n rows as a new frame """
+        frame = self._combined()
+        self._pieces = [frame.iloc[n:]] if n < len(frame) else []
+        self._length = max(0, self._length - n)
+        return frame.iloc[:n].copy()
+
+    def keep_tail(self, n: int):
+        """ Keep only the last n rows """
+        if n == 0:
+            self.clear()
+        elif n < self._length:
+            frame = self._combined()
+            self._pieces = [frame.iloc[len(frame) - n:]]
+            self._length = n
+
+    def clear(self):
+        self._pieces = []
+        self._length = 0
+
+    def _combined(self) -> pd.DataFrame:
+        if len(self._pieces) > 1:
+            self._pieces = [pd.concat(self._pieces)]
+        return self._pieces[0]
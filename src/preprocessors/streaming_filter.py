@@ -0,0 +1,129 @@
+import numpy as np
+from scipy.signal import sosfilt, sosfilt_zi, lfilter, lfilter_zi, group_delay
+
+from .filter_bank import FilterBank
+
+class StreamingFilter:
+    """
+    Causal filtering of a signal that arrives in chunks. The filter state
+    (zi) is carried from one chunk to the next, so filtering chunk by chunk
+    gives the same output as filtering the whole signal at once, and each
+    chunk is returned as soon as it is pushed.
+
+    A causal filter delays the signal. With compensate_delay, output
+    timestamps are moved back by a fixed delay: the filter's group delay
+    at a reference frequency (the centre of the pass band by default) or a
+    given delay_ms. This is exact for a linear phase FIR, whose delay is
+    the same at every frequency. An IIR filter's delay varies across the
+    band, so for it the compensation is only approximate.
+
+    The state can be saved and loaded so a sync job can carry on from
+    where the last one stopped.
+    """
+
+    def __init__(self,
+                 bank: FilterBank,
+                 compensate_delay: bool = False,
+                 reference_freq: float = None,
+                 delay_ms: float = None
+        ):
+        """
+        Args:
+            bank (FilterBank): Design and sample rate
+            compensate_delay (bool): Shift output timestamps by delay_ms
+            reference_freq (float, optional): Hz, where the IIR group delay
+                is taken, defaults to the geometric centre of the band
+            delay_ms (float, optional): Fixed delay to compensate instead
+                of the group delay
+        """
+        self.design = bank.design
+        # Writable copies for scipy, the cached design is shared
+        self._sos = None if bank.design.sos is None else np.array(bank.design.sos)
+        self._taps = None if bank.design.taps is None else np.array(bank.design.taps)
+        self.fs = bank.fs
+        self.compensate_delay = compensate_delay
+        if reference_freq is None:
+            reference_freq = float(np.sqrt(bank.band[0] * bank.band[1]))
+        if delay_ms is None:
+            delay_ms = 1000.0 * self._group_delay(reference_freq) / self.fs
+        self.delay_ms = float(delay_ms)
+        self._zi = None
+
+    @property
+    def started(self) -> bool:
+        return self._zi is not None
+
+    def process(self, values, timestamps=None):
+        """
+        Filter the next samples
+
+        Args:
+            values (array-like): New samples, following the previous call
+            timestamps (array-like, optional): Their times in ms
+
+        Returns:
+            np.ndarray: Filtered samples, or (timestamps, filtered) when
+                timestamps are given, shifted by delay_ms when compensating
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            filtered = values
+        else:
+            if self._zi is None:
+                # Start in steady state at the first sample, no step transient
+                self._zi = self._initial_zi() * values[0]
+            filtered, self._zi = self._filter(values)
+
+        if timestamps is None:
+            return filtered
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if self.compensate_delay:
+            timestamps = timestamps - self.delay_ms
+        return timestamps, filtered
+
+    def reset(self):
+        """ Forget the state, e.g. across a gap between sections """
+        self._zi = None
+
+    def save_state(self, path: str):
+        """ Write the filter state and its design to an .npz file """
+        # Through a file object so numpy does not add an extension
+        with open(path, "wb") as f:
+            np.savez(f,
+                     zi=np.array([]) if self._zi is None else self._zi,
+                     started=self.started,
+                     coefficients=self._coefficients())
+
+    def load_state(self, path: str):
+        """
+        Carry on from a state written by save_state(), the design must be
+        the same
+        """
+        with np.load(path) as state:
+            if not np.array_equal(state["coefficients"], self._coefficients()):
+                raise ValueError(f"[StreamingFilter] {path} was saved with a different filter design")
+            self._zi = state["zi"].copy() if bool(state["started"]) else None
+
+    def _filter(self, values):
+        if self._sos is not None:
+            return sosfilt(self._sos, values, zi=self._zi)
+
+        return lfilter(self._taps, [1.0], values, zi=self._zi)
+
+    def _initial_zi(self) -> np.ndarray:
+        if self._sos is not None:
+            return sosfilt_zi(self._sos)
+
+        return lfilter_zi(self._taps, [1.0])
+
+    def _coefficients(self) -> np.ndarray:
+        return self._sos if self._sos is not None else self._taps
+
+    def _group_delay(self, freq: float) -> float:
+        """ Delay in samples at freq Hz """
+        if self._sos is None:
+            return (len(self._taps) - 1) / 2
+
+        return float(sum(group_delay((section[:3], section[3:]), w=[freq], fs=self.fs)[1][0]
+                         for section in self._sos))
@@ -1,10 +1,17 @@
-from src.processors.periodic_peak_detectors.factory import PeakDetectorFactory
+from src.processors.beat_detectors.chunk_scheduler import ChunkScheduler
+from src.data_model.beat_index import BeatIndex
 from src.visuals.plots import Plots
 
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 class HeartBeatDetector:
+
+    # Chunking defaults, as in config.json
+    CHUNK_SIZE = 12000
+    CHUNK_OVERLAP = 400
+
     def __init__(self, config: dict):
         """
         Args:
@@ -13,6 +20,20 @@ class HeartBeatDetector:
     
         self.beat_detector_name = config["ppg_processing"]["beat_detector"]
         self.verbosity = config['outputs']['print_verbosity']
+        # Resampled rate of the sections, lets detectors bound their scales
+        self.sample_rate = config.get("ppg_preprocessing", {}).get("resample_freq")
+
+        # Chunking of long sections for the beat detector
+        processing = config["ppg_processing"]
+        self.chunk_size = processing.get("chunk_size", self.CHUNK_SIZE)
+        self.chunk_overlap = processing.get("chunk_overlap", self.CHUNK_OVERLAP)
+        if self.chunk_overlap <= 0:
+            # Detectors need context past a chunk edge, without it beats at
+            # the seams are lost or found twice
+            raise ValueError("[HeartBeatDetector] chunk_overlap must be positive")
+        self.n_workers = processing.get("n_workers", 1)
+        # Peaks from neighbouring chunks closer than a 240 bpm beat are the same beat
+        self.seam_tolerance = int(self.sample_rate * 60 / 240) if self.sample_rate else 0
     
     def process_sections(self, sections: list()):
         """
@@ -27,85 +48,87 @@ class HeartBeatDetector:
 
         Returns:
             pd.DataFrame: Combined annotated sections
-            list of pd.DataFrame: List of individual heart beats based on
-            trough segmentation.
+            BeatIndex: Individual heart beats based on trough segmentation,
+            as row offsets into the combined sections.
         """
         # Instantiate beat detector method from config
         print(f"[HeartBeatDetector] Processing sections using {self.beat_detector_name}")
-        beat_detector = PeakDetectorFactory.create(self.beat_detector_name)
         annotated_sections = []
-        all_beats = [] 
+        beat_starts, beat_stops, beat_sections = [], [], []
+        row_offset = 0
        
-        # process per compliance section (could be large time gaps between sections) 
-        for section_id, section in enumerate(sections):
+        # The process pool, if one is used, is released on exit
+        with ChunkScheduler(
+            detector_name=self.beat_detector_name,
+            chunk_size=self.chunk_size,
+            overlap=self.chunk_overlap,
+            n_workers=self.n_workers,
+            seam_tolerance=self.seam_tolerance,
+            detect_kwargs={"sample_rate": self.sample_rate}
+        ) as scheduler:
+            # process per compliance section (could be large time gaps between sections) 
+            for section_id, section in enumerate(sections):
             
-            section = section.reset_index(drop=True).copy()
+                section = section.reset_index(drop=True).copy()
             
-            # Detect troughs (inverted signal as it will detect "peaks"    
-            signal = (section.filtered_value * -1).values
-            troughs  = self._detect_peaks_fixed_chunk_size(signal, beat_detector)
+                # Detect troughs (inverted signal as it will detect "peaks"    
+                signal = (section.filtered_value * -1).values
+                troughs  = self._detect_peaks_chunked(signal, scheduler)
             
-            if self.verbosity > 1:
-                print(f"[HeartBeatDetector] Troughs detected: {len(troughs)}")
+                if self.verbosity > 1:
+                    print(f"[HeartBeatDetector] Troughs detected: {len(troughs)}")
             
-            # Annotate the sections with info
-            section = self._annotate_heart_beats(section, troughs, section_id)
+                # Annotate the sections with info
+                section = self._annotate_heart_beats(section, troughs, section_id)
             
-            # Combine sections
-            annotated_sections.append(section)
+                # Combine sections
+                annotated_sections.append(section)
             
-            # Additional storage of indiviually segmented beats if needed
-            segmented_beats = [
-                section[section['beat'] == beat_id].copy()
-                for beat_id in section['beat'].unique() if beat_id != -1
-            ]
-            all_beats.extend(segmented_beats)
+                # Additional storage of indiviually segmented beats if needed,
+                # kept as offsets into the combined sections not beat copies
+                starts, stops = self._beat_offsets(troughs)
+                beat_starts.append(starts + row_offset)
+                beat_stops.append(stops + row_offset)
+                beat_sections.append(np.full(len(starts), section_id))
+                row_offset += len(section)
                 
-            if self.verbosity >= 1:
-                print(f"[HeartBeatDetector] Processed section {section_id+1} / {len(sections)}")
-        
+                if self.verbosity >= 1:
+                    print(f"[HeartBeatDetector] Processed section {section_id+1} / {len(sections)}")
+
         combined_sections = pd.concat(annotated_sections, ignore_index=True)
+        all_beats = BeatIndex.from_frame(
+            combined_sections,
+            np.concatenate(beat_starts),
+            np.concatenate(beat_stops),
+            section_ids=np.concatenate(beat_sections)
+        )
     
         return combined_sections, all_beats
 
 
-    def _detect_peaks_fixed_chunk_size(self, signal, beat_detector, chunk_size: int = 12000):
+    def _detect_peaks_chunked(self, signal, scheduler: ChunkScheduler):
         """
-        Break a signal up into smaller epochs ready for periodic beat detection 
-        algorithms. Smaller input signal length results in less memory usage,
-        if the signal is highly varying voer time then a smaller epoch will
-        probably be better. A longer signal is better for very consistent signals. 
-        You can balance this with your pre-processing steps!
+        Break a signal up into smaller overlapping chunks ready for periodic
+        beat detection algorithms. Smaller input signal length results in less
+        memory usage, if the signal is highly varying over time then a smaller
+        chunk will probably be better. A longer signal is better for very
+        consistent signals. You can balance this with your pre-processing steps!
 
-        Re-combines the peak indices with correct offsets for output.
+        Chunks overlap by `chunk_overlap` samples so beats at a chunk boundary
+        are detected with context either side, each chunk only keeps the peaks
+        in its own core so the peaks are re-combined without duplicates. With
+        `n_workers` > 1 the chunks run on a process pool.
 
-        Epoch size of 3000 (indicies) -> 30s of data at 100 Hz, make a function
-        to do this dynamically based on resampling
-        
         Args:
-            signal (pd.Series) - Input signal, just the values 
-            beat_detector - instance of chosen periodic beat detector class
-            epoch_size (int) - Size of signal to forward to beat detector instance
-        
+            signal (numpy.ndarray) - Input signal, just the values
+            scheduler (ChunkScheduler) - Chunk scheduler for chosen detector
+
         Returns:
             peaks (list)
         """
-        peaks = []
+        peaks = scheduler.run(signal)
 
-        for start_idx in range(0, len(signal), chunk_size):
-            print(f"[HeartBeatDetector] Chunk Started")
-            end_idx = min(start_idx + chunk_size, len(signal))
-            chunk = signal[start_idx:end_idx]
-
-            # Detect peaks (on inverted signal, so troughs)
-            detector_results = beat_detector.detect(chunk) #TODO beatdetector.detect() check
-            chunk_peaks = detector_results["peaks"] # Local indicies 0 -> chunk len
-            
-            # Translate to global index
-            global_peaks = [t + start_idx for t in chunk_peaks]
-            peaks.extend(global_peaks)
-
-        return sorted(peaks)
+        return peaks.tolist()
 
     def _annotate_heart_beats(self, section: pd.DataFrame, troughs: list(), section_id: int):
         """
@@ -122,29 +145,74 @@ class HeartBeatDetector:
             pd.DataFrame: Annoted sections
         """
 
+        troughs = np.unique(np.asarray(troughs, dtype=np.int64))
+        n_rows = len(section)
+
         # Initialise columns
-        section['section_id'] = section_id
-        section['beat'] = -1
-        section['is_beat_peak'] = False
-        section['is_beat_trough'] = False
+        beat = np.full(n_rows, -1, dtype=np.int64)
+        is_beat_peak = np.zeros(n_rows, dtype=bool)
+        is_beat_trough = np.zeros(n_rows, dtype=bool)
 
         # Flag troughs
-        section.loc[section.loc[troughs].index, 'is_beat_trough'] = True
+        is_beat_trough[troughs] = True
 
-        # Annotate beats and flag peaks
-        for beat_id, (start, end) in enumerate(zip(troughs[:-1], troughs[1:])):
-            
-            # Assign beat ID to rows
-            section.loc[start:end, 'beat'] = beat_id
+        # Annotate beats and flag peaks, a beat runs from its trough up to
+        # the next trough, the final trough closes the last beat
+        if len(troughs) >= 2:
+            first, last = troughs[0], troughs[-1]
+            beat[first:last] = np.searchsorted(troughs, np.arange(first, last), side='right') - 1
+            beat[last] = len(troughs) - 2
+
+            values = section['filtered_value'].to_numpy(dtype=float)
+            peaks = self._segment_argmax(values, troughs[:-1], troughs[1:])
+            is_beat_peak[peaks] = True
 
-            # Detect peak within beat
-            beat_data = section.iloc[start:end]
-            peak_idx = beat_data['filtered_value'].idxmax()
-            section.loc[peak_idx, 'is_beat_peak'] = True
+        section['section_id'] = section_id
+        section['beat'] = beat
+        section['is_beat_peak'] = is_beat_peak
+        section['is_beat_trough'] = is_beat_trough
 
         if self.verbosity > 1:
             print(f"[HeartBeatDetector] Unique beats found: {section.beat.nunique()}")
 
         return section
 
-    
+    def _segment_argmax(self, values: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+        """
+        Position of the first maximum of values[start:stop] for every segment
+        in one pass. Segments must be contiguous (stops[i] == starts[i+1]),
+        NaNs are skipped and all-NaN segments have no peak.
+
+        Returns:
+            numpy.ndarray: Index of the max of each segment
+        """
+        begin, end = starts[0], stops[-1]
+        segment_max = np.fmax.reduceat(values[begin:end], starts - begin)
+        lengths = stops - starts
+
+        # First sample in each segment equal to the segment max
+        candidates = begin + np.flatnonzero(values[begin:end] == np.repeat(segment_max, lengths))
+        has_max = ~np.isnan(segment_max)
+        first = np.searchsorted(candidates, starts[has_max])
+
+        return candidates[first]
+
+    def _beat_offsets(self, troughs: list()):
+        """
+        Row offsets of each beat in an annotated section, beat i is rows
+        starts[i]:stops[i]. The last beat includes the final trough to match
+        the 'beat' column.
+
+        Returns:
+            numpy.ndarray: starts
+            numpy.ndarray: stops
+        """
+        troughs = np.unique(np.asarray(troughs, dtype=np.int64))
+        if len(troughs) < 2:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        starts = troughs[:-1]
+        stops = troughs[1:].copy()
+        stops[-1] += 1
+
+        return starts, stops
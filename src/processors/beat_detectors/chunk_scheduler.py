@@ -0,0 +1,187 @@
+from src.processors.periodic_peak_detectors.factory import PeakDetectorFactory
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def _detect_chunk_shared(shm_name, length, dtype, start, stop, detector_name, detect_kwargs):
+    """
+    Process pool worker: run a detector on a view of the shared signal.
+
+    Returns:
+        numpy.ndarray: Detected peaks as global indices
+    """
+    # Workers share the parent's resource tracker, the parent unlinks the block
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        signal = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+        detector = PeakDetectorFactory.create(detector_name)
+        peaks = detector.detect(signal[start:stop], **detect_kwargs)["peaks"]
+        peaks = np.asarray(peaks, dtype=np.int64) + start
+        del signal # Release the view before closing the block
+    finally:
+        shm.close()
+
+    return peaks
+
+
+class ChunkScheduler:
+    """
+    Splits a long signal into overlapping chunks for periodic peak detection,
+    runs the chunks (optionally on a process pool) and stitches the peaks
+    back together.
+
+    Each chunk owns a core region [core_start, core_stop), the detector sees
+    the core plus `overlap` samples either side for context, and only peaks
+    inside the core are kept. Cores tile the signal so peaks are never lost
+    or duplicated at a seam, near duplicates where neighbouring chunks
+    disagree by a few samples are merged using `seam_tolerance`.
+
+    Use as a context manager when processing many sections so the process
+    pool is only created once.
+    """
+
+    def __init__(self,
+                 detector_name: str,
+                 chunk_size: int = 12000,
+                 overlap: int = 0,
+                 n_workers: int = 1,
+                 seam_tolerance: int = 0,
+                 detect_kwargs: dict = None
+        ):
+        """
+        Args:
+            detector_name (str): Name of periodic peak detector (factory key)
+            chunk_size (int): Core length of each chunk in samples
+            overlap (int): Extra context samples each side of a chunk
+            n_workers (int): Number of processes, 1 runs in process
+            seam_tolerance (int): Peaks from neighbouring chunks closer than
+                this many samples are treated as the same peak
+            detect_kwargs (dict): Extra kwargs passed to detector.detect()
+        """
+        if chunk_size < 1:
+            raise ValueError("[ChunkScheduler] chunk_size must be positive")
+        if overlap < 0:
+            raise ValueError("[ChunkScheduler] overlap must not be negative")
+
+        self.detector_name = detector_name
+        self.chunk_size = int(chunk_size)
+        self.overlap = int(overlap)
+        self.n_workers = max(1, int(n_workers))
+        self.seam_tolerance = int(seam_tolerance)
+        self.detect_kwargs = detect_kwargs or {}
+
+        self._detector = None
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ Shut down the process pool if one was started """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def plan(self, length: int) -> list:
+        """
+        Chunk layout for a signal of given length
+
+        Returns:
+            list of tuple: (core_start, core_stop, start, stop) per chunk
+        """
+        chunks = []
+        for core_start in range(0, length, self.chunk_size):
+            core_stop = min(core_start + self.chunk_size, length)
+            start = max(0, core_start - self.overlap)
+            stop = min(length, core_stop + self.overlap)
+            chunks.append((core_start, core_stop, start, stop))
+
+        return chunks
+
+    def run(self, signal) -> np.ndarray:
+        """
+        Detect peaks over the whole signal
+
+        Args:
+            signal (numpy.ndarray): 1D signal
+
+        Returns:
+            numpy.ndarray: Sorted global peak indices
+        """
+        signal = np.ascontiguousarray(signal, dtype=float)
+        chunks = self.plan(len(signal))
+
+        if self.n_workers == 1 or len(chunks) == 1:
+            chunk_peaks = [self._detect_chunk(signal, start, stop)
+                           for _, _, start, stop in chunks]
+        else:
+            chunk_peaks = self._detect_chunks_parallel(signal, chunks)
+
+        return self._stitch(signal, chunks, chunk_peaks)
+
+    def _detect_chunk(self, signal, start, stop):
+        if self._detector is None:
+            self._detector = PeakDetectorFactory.create(self.detector_name)
+        peaks = self._detector.detect(signal[start:stop], **self.detect_kwargs)["peaks"]
+
+        return np.asarray(peaks, dtype=np.int64) + start
+
+    def _detect_chunks_parallel(self, signal, chunks):
+        """
+        Copy the signal once into shared memory and let each worker read its
+        chunk as a view rather than pickling the chunk to it
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(signal.nbytes, 1))
+        try:
+            shared = np.ndarray(signal.shape, dtype=signal.dtype, buffer=shm.buf)
+            shared[:] = signal
+            futures = [
+                self._pool.submit(_detect_chunk_shared, shm.name, len(signal),
+                                  signal.dtype.str, start, stop,
+                                  self.detector_name, self.detect_kwargs)
+                for _, _, start, stop in chunks
+            ]
+            chunk_peaks = [future.result() for future in futures]
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return chunk_peaks
+
+    def _stitch(self, signal, chunks, chunk_peaks):
+        """
+        Keep each chunk's peaks that fall in its core, then merge near
+        duplicates across seams keeping the larger sample
+        """
+        kept = []
+        owners = []
+        for chunk_id, ((core_start, core_stop, _, _), peaks) in enumerate(zip(chunks, chunk_peaks)):
+            peaks = np.unique(peaks)
+            peaks = peaks[(peaks >= core_start) & (peaks < core_stop)]
+            kept.append(peaks)
+            owners.append(np.full(len(peaks), chunk_id))
+
+        if not kept:
+            return np.array([], dtype=np.int64)
+
+        peaks = np.concatenate(kept)
+        owners = np.concatenate(owners)
+
+        if self.seam_tolerance > 0 and len(peaks) > 1:
+            gaps = np.diff(peaks)
+            seam_pairs = np.flatnonzero((owners[1:] != owners[:-1]) & (gaps <= self.seam_tolerance))
+            if len(seam_pairs):
+                drop = np.where(signal[peaks[seam_pairs]] >= signal[peaks[seam_pairs + 1]],
+                                seam_pairs + 1, seam_pairs)
+                peaks = np.delete(peaks, drop)
+
+        return peaks
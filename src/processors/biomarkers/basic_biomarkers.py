@@ -1,6 +1,16 @@
+from src.data_model.beat_index import BeatIndex
+
 class BasicBiomarkers:
     def __init__(self, data):
-        self.data = data.copy()
+        """
+        Args:
+            data (pd.DataFrame or BeatIndex): Grouped beats, a BeatIndex is
+                materialised once with its global beat and group ids
+        """
+        if isinstance(data, BeatIndex):
+            self.data = data.to_frame()
+        else:
+            self.data = data.copy()
     
     def compute_ibi(self):
         """
@@ -0,0 +1,129 @@
+from src.utils.flatten_nested_dict import flatten_nested_dict
+
+import numpy as np
+import pandas as pd
+
+# Flat feature columns and their dtype. Missing values use a sentinel per
+# dtype: False for bool, -1 for int, NaN for float. The '.detected' columns
+# are the validity masks for the feature they sit under.
+_WAVE_FIELDS = {"detected": bool, "idx_local": np.int64, "value": float, "time": float}
+
+FEATURE_SCHEMA = {
+    "y.systole.detected": bool,
+    "y.systole.idx_local": np.int64,
+    "y.systole.idx_global": np.int64,
+    "y.systole.time": float,
+    "y.systole.time_global": float,
+    "y.beat_duration": float,
+
+    "dydx.detected": bool,
+    "dydx.zero_crossings.sum": np.int64,
+    "dydx.ms": np.int64,
+    "dydx.systole.detected": bool,
+    "dydx.systole.idx_local": np.int64,
+    "dydx.systole.time": float,
+    "dydx.diastole.detected": bool,
+    "dydx.diastole.idx_local": np.int64,
+    "dydx.diastole.time": float,
+    "dydx.sys-dia-deltaT_ms.detected": bool,
+    "dydx.sys-dia-deltaT_ms.duration": float,
+
+    "d2ydx2.detected": bool,
+    "d2ydx2.zero_crossings.sum": np.int64,
+    **{f"d2ydx2.{wave}_wave.{field}": dtype
+       for wave in "abcdef" for field, dtype in _WAVE_FIELDS.items()},
+
+    **{f"d3ydx3.{point}": float for point in ("p0", "p1", "p2", "p3", "p4")},
+    **{f"d4ydx4.{point}": float for point in ("q1", "q2", "q3", "q4")},
+}
+
+_SENTINELS = {bool: False, np.int64: -1, float: np.nan}
+
+
+class BeatFeatureTable:
+    """
+    Per-beat features stored as preallocated typed numpy columns, one row
+    per beat, column names are the nested feature keys joined with '.'
+    (e.g. 'd2ydx2.b_wave.idx_local').
+    """
+
+    def __init__(self, global_beat_index, schema: dict = None):
+        """
+        Args:
+            global_beat_index (array-like of int): Beat id of each row
+            schema (dict, optional): Column name -> dtype, FEATURE_SCHEMA
+                by default
+        """
+        self.schema = FEATURE_SCHEMA if schema is None else schema
+        self.global_beat_index = np.asarray(global_beat_index, dtype=np.int64)
+        n_beats = len(self.global_beat_index)
+        self.columns = {
+            name: np.full(n_beats, _SENTINELS[dtype], dtype=dtype)
+            for name, dtype in self.schema.items()
+        }
+
+    def __len__(self):
+        return len(self.global_beat_index)
+
+    def set_row(self, row: int, features: dict):
+        """
+        Write one beat's nested feature dict into the columns. Keys not in
+        the schema (e.g. zero crossing index lists) and None are skipped,
+        leaving the sentinel.
+        """
+        for name, value in flatten_nested_dict(features, sep='.').items():
+            column = self.columns.get(name)
+            if column is not None and value is not None:
+                column[row] = value
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Flat typed DataFrame, one row per beat
+        """
+        frame = {"global_beat_index": self.global_beat_index}
+        frame.update(self.columns)
+
+        return pd.DataFrame(frame)
+
+    @staticmethod
+    def to_nested(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Nested layout of a flat feature table, one dict per top level key
+        (y, dydx, ...) per row as used by the plotting functions. Sentinels
+        become None, features that were not detected only keep 'detected'.
+        """
+        nested_rows = []
+        for record in frame.to_dict(orient="records"):
+            row = {"global_beat_index": record.pop("global_beat_index")}
+            for name, value in record.items():
+                *parents, leaf = name.split('.')
+                node = row
+                for key in parents:
+                    node = node.setdefault(key, {})
+                node[leaf] = _from_sentinel(name, value)
+            # Top level groups keep their keys, as the extractors return
+            for value in row.values():
+                if isinstance(value, dict):
+                    _prune_undetected(value)
+            nested_rows.append(row)
+
+        return pd.DataFrame(nested_rows)
+
+
+def _from_sentinel(name, value):
+    dtype = FEATURE_SCHEMA.get(name)
+    if dtype is bool:
+        return bool(value)
+    if dtype is np.int64:
+        return None if value == -1 else int(value)
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _prune_undetected(node: dict) -> dict:
+    for key, value in node.items():
+        if isinstance(value, dict):
+            node[key] = ({'detected': False} if value.get('detected') is False
+                         else _prune_undetected(value))
+    return node
@@ -0,0 +1,119 @@
+import numpy as np
+from scipy.interpolate import BSpline
+
+class BatchedBSplineSmoother:
+    """
+    Least squares B-spline smoothing of many beats at once.
+
+    Gives the same fit as a scikit-fda BSplineBasis + BasisSmoother per beat
+    (uniform knots over the beat's x range, no roughness penalty) without
+    building skfda objects per beat. A beat with x = x0 + arange(n) has a
+    fit that only depends on n, so the basis matrix and its pseudo-inverse
+    are computed once per beat length and cached as hat matrices
+    H_r = B^(r) @ pinv(B), one per derivative order r. Beats are bucketed by
+    length and each bucket is smoothed with one matrix multiply.
+    """
+
+    def __init__(self, n_basis: int = 21, order: int = 4, max_deriv: int = 0):
+        """
+        Args:
+            n_basis (int): Number of B-spline basis functions
+            order (int): Spline order (degree + 1), 4 is cubic as in skfda
+            max_deriv (int): Highest analytic derivative to return
+        """
+        if max_deriv >= order:
+            raise ValueError("[BatchedBSplineSmoother] max_deriv must be less than order")
+
+        self.n_basis = n_basis
+        self.order = order
+        self.max_deriv = max_deriv
+        self._hat_cache = {}
+
+    def hat_matrices(self, x: np.ndarray) -> np.ndarray:
+        """
+        Smoothing (and derivative) operators for one set of sample points
+
+        Args:
+            x (numpy.ndarray): Sample positions of a beat, length n
+
+        Returns:
+            numpy.ndarray: Shape (max_deriv + 1, n, n), H[r] @ y is the r-th
+            derivative of the fitted spline at x (per unit of x)
+        """
+        x = np.asarray(x, dtype=float)
+        degree = self.order - 1
+        a, b = x[0], x[-1]
+
+        # skfda knots: uniform breaks over the domain, end knots repeated
+        breaks = np.linspace(a, b, self.n_basis - degree + 1)
+        knots = np.concatenate((np.repeat(a, degree), breaks, np.repeat(b, degree)))
+        spline = BSpline(knots, np.eye(self.n_basis), degree)
+
+        pinv = np.linalg.pinv(spline(x))
+        return np.stack([spline(x, nu=r) @ pinv for r in range(self.max_deriv + 1)])
+
+    def cached_hat_matrices(self, n: int) -> np.ndarray:
+        """ hat_matrices() for x = arange(n), cached by beat length """
+        hat = self._hat_cache.get(n)
+        if hat is None:
+            hat = self.hat_matrices(np.arange(n, dtype=float))
+            self._hat_cache[n] = hat
+
+        return hat
+
+    def smooth(self, values, starts, stops, x=None, dt=None) -> np.ndarray:
+        """
+        Smooth every beat of a contiguous signal
+
+        Args:
+            values (numpy.ndarray): 1D signal holding all beats
+            starts, stops (numpy.ndarray): Row offsets of each beat
+            x (numpy.ndarray, optional): Sample positions aligned with values,
+                defaults to the row number. Beats whose x is not a unit step
+                sequence are fitted on their own x
+            dt (numpy.ndarray, optional): Per beat scale of x, e.g. ms per
+                sample, derivative r is divided by dt**r
+
+        Returns:
+            numpy.ndarray: Shape (max_deriv + 1, len(values)), row 0 is the
+            smoothed signal, row r the r-th derivative. Rows outside beats
+            and beats shorter than n_basis are NaN
+        """
+        values = np.asarray(values, dtype=float)
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        lengths = stops - starts
+        out = np.full((self.max_deriv + 1, len(values)), np.nan)
+
+        # Beats with irregular x are fitted one by one on their own points
+        regular = np.ones(len(starts), dtype=bool)
+        if x is not None:
+            x = np.asarray(x, dtype=float)
+            step = np.diff(x) == 1
+            # Number of non unit steps inside each beat, from a running count
+            breaks = np.concatenate(([0], np.cumsum(~step)))
+            regular = breaks[stops - 1] == breaks[starts]
+
+        scale = None
+        if dt is not None:
+            scale = np.asarray(dt, dtype=float)[:, None] ** -np.arange(self.max_deriv + 1)
+
+        fit = regular & (lengths >= self.n_basis)
+        for n in np.unique(lengths[fit]):
+            beats = np.flatnonzero(fit & (lengths == n))
+            rows = starts[beats, None] + np.arange(n)
+            hat = self.cached_hat_matrices(int(n))
+            # (k, n) @ (n, n) per derivative order -> (r, k, n)
+            fitted = np.einsum('kn,rmn->rkm', values[rows], hat)
+            if scale is not None:
+                fitted *= scale[beats].T[:, :, None]
+            out[:, rows] = fitted
+
+        for beat in np.flatnonzero(~regular & (lengths >= self.n_basis)):
+            start, stop = starts[beat], stops[beat]
+            fitted = self.hat_matrices(x[start:stop]) @ values[start:stop]
+            if scale is not None:
+                fitted *= scale[beat][:, None]
+            out[:, start:stop] = fitted
+
+        return out
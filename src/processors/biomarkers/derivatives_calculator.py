@@ -1,6 +1,13 @@
+from .bspline_smoother import BatchedBSplineSmoother
+from src.data_model.beat_index import group_offsets
+
+import numpy as np
 import pandas as pd
+from scipy.signal import savgol_filter
 
 class DerivativesCalculator:
+    MODES = ("diff", "central", "savgol", "exact")
+
     def __init__(self, data: pd.DataFrame, time_col: str, signal_col: str, group_col: str):
         """
         Initialise
@@ -37,15 +44,146 @@ class DerivativesCalculator:
         """
         Compute the derivative of a column within each group of df
 
+        Backward difference diff(column) / diff(time) per group, the first
+        row of each group is NaN. Vectorised over the whole column.
+
         Args:
             column: col name to compute derivative of
         Returns:
             Series contraining derivative values
         """
-        
-        return self.data.groupby(self.group_col).apply(
-            lambda group: group[column].diff() / group[self.time_col].diff()
-        ).reset_index(level=0, drop=True)
+        rows, starts, _ = self._segments()
+        values = self.data[column].to_numpy(dtype=float)[rows]
+        t = self.data[self.time_col].to_numpy(dtype=float)[rows]
+
+        derivative = self._backward_diff(values, t, starts)
+
+        return pd.Series(self._unsort(derivative, rows), index=self.data.index)
+
+    def compute_all(self, max_order: int = 3, mode: str = "diff", **kwargs):
+        """
+        Compute derivatives 1..max_order of the signal column in one pass
+        over the group offsets and store them as sig_<n>deriv columns.
+
+        Modes:
+            - diff: repeated backward differences (legacy numbers)
+            - central: repeated central differences, one sided at the edges
+            - savgol: Savitzky-Golay derivative kernels, kwargs
+              window_length (9) and polyorder (max(5, max_order))
+            - exact: analytic derivatives of a least squares B-spline fit of
+              each group, kwargs n_basis (21) and order. The default order
+              is max(4, max_order + 2) so the highest derivative is still
+              continuous. The fit is a new one, it reproduces a B-spline
+              smoothed signal only with that smoother's n_basis and order.
+              To differentiate a smoothing fit use
+              SignalSmoothing.batch_bspline(derivative_cols=...) instead
+
+        Args:
+            max_order (int): Highest derivative to compute
+            mode (str): One of MODES
+
+        Returns:
+            Nothing, the columns are added to self.data
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid mode: {mode}. Please use one of {self.MODES}")
+
+        rows, starts, stops = self._segments()
+        values = self.data[self.signal_col].to_numpy(dtype=float)[rows]
+        t = self.data[self.time_col].to_numpy(dtype=float)[rows]
+
+        if mode == "exact":
+            derivatives = self._exact_derivatives(values, t, starts, stops, max_order, **kwargs)
+        elif mode == "savgol":
+            derivatives = self._savgol_derivatives(values, t, starts, stops, max_order, **kwargs)
+        else:
+            derivatives = []
+            current = values
+            for _ in range(max_order):
+                if mode == "diff":
+                    current = self._backward_diff(current, t, starts)
+                else:
+                    current = self._central_diff(current, t, starts, stops)
+                derivatives.append(current)
+
+        for order, derivative in enumerate(derivatives, start=1):
+            self.data[f"sig_{order}deriv"] = self._unsort(derivative, rows)
+
+    def _segments(self):
+        """
+        Row order that makes each group contiguous and the start/stop
+        offsets of each group in it
+        """
+        return group_offsets(self.data[self.group_col].to_numpy())
+
+    def _unsort(self, values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        out = np.empty_like(values)
+        out[rows] = values
+        return out
+
+    def _backward_diff(self, values, t, starts):
+        derivative = np.full(len(values), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            derivative[1:] = np.diff(values) / np.diff(t)
+        derivative[starts] = np.nan
+
+        return derivative
+
+    def _central_diff(self, values, t, starts, stops):
+        n = len(values)
+        derivative = np.full(n, np.nan)
+        if n < 2:
+            return derivative
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            forward = np.full(n, np.nan)
+            forward[:-1] = np.diff(values) / np.diff(t)
+            central = np.full(n, np.nan)
+            central[1:-1] = (values[2:] - values[:-2]) / (t[2:] - t[:-2])
+
+        derivative[:] = central
+        # One sided differences at the group edges, NaN for single rows
+        lasts = stops - 1
+        multi = stops - starts > 1
+        derivative[starts[multi]] = forward[starts[multi]]
+        derivative[lasts[multi]] = forward[lasts[multi] - 1]
+        derivative[starts[~multi]] = np.nan
+
+        return derivative
+
+    def _savgol_derivatives(self, values, t, starts, stops, max_order,
+                            window_length: int = 9, polyorder: int = None):
+        polyorder = max(5, max_order) if polyorder is None else polyorder
+        derivatives = [np.full(len(values), np.nan) for _ in range(max_order)]
+        lengths = stops - starts
+
+        # One filter call per bucket of equal length groups
+        for n in np.unique(lengths[lengths >= window_length]):
+            groups = np.flatnonzero(lengths == n)
+            rows = starts[groups, None] + np.arange(n)
+            # Sample spacing of each group, groups are assumed uniformly sampled
+            dt = (t[rows[:, -1]] - t[rows[:, 0]]) / (n - 1)
+            for order in range(1, max_order + 1):
+                kernel = savgol_filter(values[rows], window_length, polyorder,
+                                       deriv=order, axis=1, mode='interp')
+                derivatives[order - 1][rows] = kernel / dt[:, None] ** order
+
+        return derivatives
+
+    def _exact_derivatives(self, values, t, starts, stops, max_order,
+                           n_basis: int = 21, order: int = None):
+        order = max(4, max_order + 2) if order is None else order
+        smoother = BatchedBSplineSmoother(n_basis=n_basis, order=order, max_deriv=max_order)
+
+        # Fit against the row position, scale to per unit time per group
+        lengths = stops - starts
+        last = np.maximum(stops - 1, starts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dt = (t[last] - t[starts]) / (lengths - 1)
+
+        fitted = smoother.smooth(values, starts, stops, dt=dt)
+
+        return list(fitted[1:])
 
     def compute_first_derivative(self):
         """
@@ -0,0 +1,272 @@
+from .beat_feature_table import BeatFeatureTable
+from src.data_model.beat_index import group_offsets
+
+import numpy as np
+import pandas as pd
+
+class BatchedFiducialDetector:
+    """
+    Fiducial points of every beat at once, giving the same results as
+    FeatureExtractorY, FeatureExtractorDydx and FeatureExtractorD2ydx2 run
+    beat by beat.
+
+    Beats are padded (NaN) into a beats x samples matrix per batch and the
+    search regions of each wave become per-beat [lo, hi) bounds. Local
+    extrema follow scipy.signal.find_peaks exactly: strict rise into the
+    peak, plateaus report their midpoint, region edges are never peaks, and
+    the prominence walk stops at a higher sample, a NaN or the region edge.
+    """
+
+    def __init__(self, prominence: float = 0.1, batch_size: int = 2048):
+        """
+        Args:
+            prominence (float): Minimum prominence of d2ydx2 extrema, as
+                ZeroCrossingAnalyser.local_maxima / local_minima
+            batch_size (int): Beats per padded matrix, bounds memory
+        """
+        self.prominence = prominence
+        self.batch_size = batch_size
+
+    def detect(self,
+               data: pd.DataFrame,
+               time_col: str = 'timestamp_ms',
+               signal_col: str = 'filtered_value',
+               group_col: str = 'global_beat_index'
+        ) -> BeatFeatureTable:
+        """
+        Args:
+            data (pd.DataFrame): Beats with signal_col, sig_1deriv and
+                sig_2deriv columns
+
+        Returns:
+            BeatFeatureTable: One row per beat, in ascending beat order
+        """
+        rows, starts, stops = group_offsets(data[group_col].to_numpy())
+        table = BeatFeatureTable(data[group_col].to_numpy()[rows][starts])
+
+        columns = {
+            't': data[time_col].to_numpy(dtype=float)[rows],
+            'y': data[signal_col].to_numpy(dtype=float)[rows],
+            'd1': data['sig_1deriv'].to_numpy(dtype=float)[rows],
+            'd2': data['sig_2deriv'].to_numpy(dtype=float)[rows],
+        }
+        labels = np.asarray(data.index)[rows]
+
+        # Batch beats of similar length together to limit padding
+        lengths = stops - starts
+        order = np.argsort(lengths, kind='stable')
+        for batch in np.array_split(order, max(1, -(-len(order) // self.batch_size))):
+            if len(batch):
+                self._detect_batch(table, batch, starts[batch], lengths[batch], columns, labels)
+
+        return table
+
+    def _detect_batch(self, table, beats, starts, lengths, columns, labels):
+        width = int(lengths.max())
+        padded = {name: self._pad(values, starts, lengths, width) for name, values in columns.items()}
+        t = padded['t']
+        batch_rows = np.arange(len(beats))
+        valid = np.arange(width) < lengths[:, None]
+
+        self._y_features(table, beats, batch_rows, padded['y'], t, valid, starts, lengths, labels)
+        ms, detected = self._dydx_features(table, beats, batch_rows, padded['d1'], t, valid, lengths)
+        self._d2ydx2_features(table, beats, batch_rows, padded['d2'], t, lengths, ms, detected)
+
+    def _pad(self, values, starts, lengths, width):
+        positions = np.arange(width)
+        index = np.minimum(starts[:, None] + positions, len(values) - 1)
+        return np.where(positions < lengths[:, None], values[index], np.nan)
+
+    def _y_features(self, table, beats, batch_rows, y, t, valid, starts, lengths, labels):
+        """ Systole (max of y) and beat duration """
+        cols = table.columns
+        is_nan = np.isnan(y) & valid
+        has_nan = is_nan.any(axis=1)
+        finite = valid & ~np.isnan(y)
+
+        # np.argmax stops at the first NaN, idxmax skips NaN
+        idx_local = np.where(has_nan, np.argmax(is_nan, axis=1),
+                             np.argmax(np.where(finite, y, -np.inf), axis=1))
+        idx_max = np.argmax(np.where(finite, y, -np.inf), axis=1)
+        any_finite = finite.any(axis=1)
+
+        cols['y.systole.detected'][beats] = True
+        cols['y.systole.idx_local'][beats] = idx_local
+        cols['y.systole.time'][beats] = t[batch_rows, idx_local]
+        cols['y.systole.idx_global'][beats] = np.where(any_finite, labels[starts + idx_max], -1)
+        cols['y.systole.time_global'][beats] = np.where(any_finite, t[batch_rows, idx_max], np.nan)
+        cols['y.beat_duration'][beats] = np.where(
+            lengths > 1, t[batch_rows, lengths - 1] - t[batch_rows, 0], np.nan)
+
+    def _dydx_features(self, table, beats, batch_rows, d1, t, valid, lengths):
+        """ ms and p2n zero crossings of the first derivative """
+        cols = table.columns
+        finite = valid & ~np.isnan(d1)
+        n_nan = (valid & np.isnan(d1)).sum(axis=1)
+        detected = (lengths >= 2) & (n_nan <= 0.5 * lengths)
+        ms = np.argmax(np.where(finite, d1, -np.inf), axis=1)
+
+        crossings = self._crossings(d1, lengths, "pos2neg")
+        after_ms = crossings & (np.arange(crossings.shape[1]) > ms[:, None])
+        rank = np.cumsum(after_ms, axis=1)
+        n_after = rank[:, -1] if rank.shape[1] else np.zeros(len(beats), dtype=int)
+        systole = np.argmax(after_ms & (rank == 1), axis=1)
+        diastole = np.argmax(after_ms & (rank == 2), axis=1)
+
+        has_systole = detected & (n_after >= 1)
+        has_diastole = detected & (n_after >= 2)
+        systole_time = t[batch_rows, systole]
+        diastole_time = t[batch_rows, diastole]
+
+        det = beats[detected]
+        cols['dydx.detected'][det] = True
+        cols['dydx.ms'][det] = ms[detected]
+        cols['dydx.zero_crossings.sum'][det] = crossings.sum(axis=1)[detected]
+        self._set_point(cols, 'dydx.systole', beats, has_systole, systole, systole_time)
+        self._set_point(cols, 'dydx.diastole', beats, has_diastole, diastole, diastole_time)
+        cols['dydx.sys-dia-deltaT_ms.detected'][beats[has_diastole]] = True
+        cols['dydx.sys-dia-deltaT_ms.duration'][beats[has_diastole]] = (
+            diastole_time - systole_time)[has_diastole]
+
+        return ms, detected
+
+    def _d2ydx2_features(self, table, beats, batch_rows, d2, t, lengths, ms, detected):
+        """ a-f waves of the second derivative, regions as FeatureExtractorD2ydx2 """
+        cols = table.columns
+        zeros = np.zeros_like(lengths)
+        det = beats[detected]
+        cols['d2ydx2.detected'][det] = True
+        cols['d2ydx2.zero_crossings.sum'][det] = self._crossings(d2, lengths, "both").sum(axis=1)[detected]
+
+        # a - greatest max before ms
+        a_peaks = self._find_peaks(d2, zeros, np.where(detected & (ms > 0), ms, 0))
+        a_found, a = self._select(a_peaks, d2, "max")
+
+        # b - first min after a
+        b_region = a_found & (a < lengths - 1)
+        b_peaks = self._find_peaks(-d2, a + 1, np.where(b_region, lengths, a + 1))
+        b_found, b = self._select(b_peaks, d2, "first")
+
+        # e - 2nd max from ms
+        e_peaks = self._find_peaks(d2, ms, np.where(detected & (ms > 1), lengths, ms))
+        e_found, e = self._select(e_peaks, d2, "second")
+
+        # c - greatest max in [b, e)
+        c_peaks = self._find_peaks(d2, b, np.where(b_found & e_found, e, b))
+        c_found, c = self._select(c_peaks, d2, "max")
+
+        # d - lowest min in [c, e)
+        d_peaks = self._find_peaks(-d2, c, np.where(c_found & e_found, e, c))
+        d_found, d = self._select(d_peaks, -d2, "max")
+
+        # f - first min after e
+        f_region = e_found & (e < lengths - 1)
+        f_peaks = self._find_peaks(-d2, e + 1, np.where(f_region, lengths, e + 1))
+        f_found, f = self._select(f_peaks, d2, "first")
+
+        for wave, found, idx in (("a", a_found, a), ("b", b_found, b), ("c", c_found, c),
+                                 ("d", d_found, d), ("e", e_found, e), ("f", f_found, f)):
+            name = f'd2ydx2.{wave}_wave'
+            self._set_point(cols, name, beats, found, idx, t[batch_rows, idx])
+            cols[f'{name}.value'][beats[found]] = d2[batch_rows, idx][found]
+
+    def _set_point(self, cols, name, beats, found, idx, time):
+        cols[f'{name}.detected'][beats[found]] = True
+        cols[f'{name}.idx_local'][beats[found]] = idx[found]
+        cols[f'{name}.time'][beats[found]] = time[found]
+
+    def _crossings(self, x, lengths, crossing_type):
+        """
+        Zero crossing mask as ZeroCrossingAnalyser, column i is a crossing
+        between samples i and i+1. NaN counts as negative.
+        """
+        pos = x >= 0
+        before, after = pos[:, :-1], pos[:, 1:]
+        if crossing_type == "pos2neg":
+            crossings = before & ~after
+        else:
+            crossings = before != after
+        in_beat = np.arange(crossings.shape[1]) < (lengths - 1)[:, None]
+
+        return crossings & in_beat
+
+    def _select(self, peaks, x, how):
+        """
+        Pick one peak per beat: greatest x ("max"), first or second
+
+        Returns:
+            numpy.ndarray: Whether a peak was found
+            numpy.ndarray: Its position, 0 when not found
+        """
+        if how == "max":
+            return peaks.any(axis=1), np.argmax(np.where(peaks, x, -np.inf), axis=1)
+
+        rank = np.cumsum(peaks, axis=1)
+        nth = 1 if how == "first" else 2
+        target = peaks & (rank == nth)
+
+        return target.any(axis=1), np.argmax(target, axis=1)
+
+    def _find_peaks(self, x, lo, hi):
+        """
+        scipy.signal.find_peaks(x[lo:hi], prominence=self.prominence) for
+        every row, returned as a mask over the row's full sample axis
+
+        Args:
+            x (numpy.ndarray): Padded beats, shape (beats, samples)
+            lo, hi (numpy.ndarray): Search region of each row
+
+        Returns:
+            numpy.ndarray: Boolean peak mask, same shape as x
+        """
+        n_rows, width = x.shape
+        positions = np.arange(width)
+        last = hi - 1
+
+        # Next sample that differs from each sample, plateau detection
+        ahead = np.empty((n_rows, width), dtype=np.int64)
+        if width:
+            ahead[:, -1] = width - 1
+        for i in range(width - 2, -1, -1):
+            ahead[:, i] = np.where(x[:, i + 1] == x[:, i], ahead[:, i + 1], i + 1)
+        ahead = np.minimum(ahead, last[:, None])
+
+        previous = np.full_like(x, np.nan)
+        previous[:, 1:] = x[:, :-1]
+        rising = ((positions >= (lo + 1)[:, None]) & (positions <= (hi - 2)[:, None])
+                  & (previous < x))
+        falls = np.take_along_axis(x, np.clip(ahead, 0, None), axis=1) < x
+        starts = rising & falls
+
+        rows, left_edge = np.nonzero(starts)
+        peaks = (left_edge + ahead[rows, left_edge] - 1) // 2
+
+        prominences = self._prominences(x, rows, peaks, lo[rows], last[rows])
+        keep = prominences >= self.prominence
+
+        mask = np.zeros_like(x, dtype=bool)
+        mask[rows[keep], peaks[keep]] = True
+
+        return mask
+
+    def _prominences(self, x, rows, peaks, lo, last):
+        """
+        Prominence of each peak as scipy.signal.peak_prominences, walking
+        out from every peak together until a higher sample (or NaN) or the
+        region edge
+        """
+        peak_values = x[rows, peaks]
+        bases = []
+        for step, bound in ((-1, lo), (1, last)):
+            base = peak_values.copy()
+            active = np.ones(len(peaks), dtype=bool)
+            i = peaks.copy()
+            while active.any():
+                i = i + step
+                inside = (i >= bound) if step < 0 else (i <= bound)
+                values = x[rows, np.clip(i, 0, x.shape[1] - 1)]
+                active &= inside & (values <= peak_values)
+                base = np.where(active, np.minimum(base, values), base)
+            bases.append(base)
+
+        return peak_values - np.maximum(bases[0], bases[1])
@@ -1,5 +1,8 @@
 from .derivatives_calculator import DerivativesCalculator
 from .signal_smoothing import SignalSmoothing
+from .beat_feature_table import BeatFeatureTable
+from .fiducial_detector import BatchedFiducialDetector
+from src.data_model.beat_index import BeatIndex
 
 import numpy as np
 import pandas as pd
@@ -421,8 +424,8 @@ class FeatureExtractorD2ydx2(FeatureExtractor):
         f wave - 1st local minimum of d2ydx2 after e and before 0.8T
         """
         #TODO: Add 0.8T check
-        if e_wave['detected'] is True and e_wave['idx_local'] < len(sig_d2ydx2) -1:
-            region = sig_d2ydx2[e_wave['idx_local'] + 1:]
+        if e_wave['detected'] is True and e_wave['idx_local'] < len(sig) -1:
+            region = sig[e_wave['idx_local'] + 1:]
             minima = ZeroCrossingAnalyser.local_minima(region)
             
             if minima:
@@ -430,7 +433,8 @@ class FeatureExtractorD2ydx2(FeatureExtractor):
                 
                 return {
                     'detected': True,
-                    'idx_local': sig_d2ydx2[idx_local],
+                    'idx_local': idx_local,
+                    'value': sig[idx_local],
                     'time': beat['timestamp_ms'].iloc[idx_local]
                 }        
 
@@ -547,18 +551,38 @@ class PulseWaveFeatures:
     Orchestrator for extracting pulse wave features from PPG signals
         
         1. Sort data
-        2. Applies signal smoothing - smooth functions 
-        3. Computes derivatives
-        4. Extracts beat-level features using modular extractors
+        2. Applies signal smoothing and computes derivatives from the same
+           spline fit
+        3. Extracts beat-level features using modular extractors
     """
+    # B-spline fit of each beat, the smoothed signal and its derivatives
+    SPLINE_N_BASIS = 21
+    MAX_DERIVATIVE = 4
 
-    def __init__(self, data: pd.DataFrame):
-        self.data = data.copy()
-        self.f_extractor_y = FeatureExtractorY()
-        self.f_extractor_dydx = FeatureExtractorDydx()
-        self.f_extractor_d2ydx2 = FeatureExtractorD2ydx2()
-        self.f_extractor_d3ydx3 = FeatureExtractorD3ydx3()
-        self.f_extractor_d4ydx4 = FeatureExtractorD4ydx4()
+    def __init__(self, data: pd.DataFrame, feature_layout: str = "flat", spline_order: int = 4):
+        """
+        Args:
+            data (pd.DataFrame or BeatIndex): Beats with global_beat_index,
+                a BeatIndex is materialised once rather than per beat
+            feature_layout (str): "flat" for typed feature columns such as
+                'd2ydx2.b_wave.idx_local', "nested" for one dict per feature
+                group (y, dydx, ...) as used by the beat plots
+            spline_order (int): Order of the smoothing B-spline, 4 (cubic)
+                by default. A fit of order k gives derivatives up to k - 1,
+                so sig_4deriv needs 5 or more (6 for a continuous one)
+        """
+        if feature_layout not in ("flat", "nested"):
+            raise ValueError(f"Invalid feature_layout: {feature_layout}. Please use 'flat' or 'nested'.")
+        self.feature_layout = feature_layout
+        self.spline_order = spline_order
+
+        if isinstance(data, BeatIndex):
+            self.data = data.to_frame()
+        else:
+            self.data = data.copy()
+        # y, dydx and d2ydx2 features for all beats at once, same results as
+        # FeatureExtractorY / Dydx / D2ydx2. d3ydx3 and d4ydx4 are still stubs
+        self.fiducial_detector = BatchedFiducialDetector()
 
     
     def compute(self) -> (pd.DataFrame, pd.DataFrame):
@@ -570,7 +594,6 @@ class PulseWaveFeatures:
         """
         self._sort_data()
         self._apply_signal_smoothing()
-        self._compute_derivatives()
         beat_features = self._extract_beat_features()
         
         return self.data, beat_features
@@ -582,14 +605,18 @@ class PulseWaveFeatures:
 
     def _apply_signal_smoothing(self):
         """
-        Smooth the signal for each beat using chosen method:
-            - fda_bspline
-            - rolling_avg
-            - savitszky-golay
-        
-        Returns:
-            Modifies the self.data df in place by adding the output column.
+        Smooth the signal of each beat with a B-spline fit (batched over all
+        beats, BatchedBSplineSmoother) and take the derivatives from that
+        same fit, exact derivatives of the smoothed signal rather than
+        repeated differences which amplify noise at each order.
 
+        The cubic default gives the 1st to 3rd derivatives, the 3rd is
+        piecewise constant. Up to the 4th are computed when spline_order
+        allows it.
+
+        Returns:
+            Modifies the self.data df in place by adding sig_smooth and the
+            sig_<n>deriv columns.
         """
         from .signal_smoothing import SignalSmoothing
         smoother = SignalSmoothing(
@@ -598,61 +625,38 @@ class PulseWaveFeatures:
             group_col='global_beat_index',
             output_col='sig_smooth'
         )
-        
-        smoother.group_apply(method="fda_bspline", n_basis=21, order=4)
-
 
-    def _compute_derivatives(self):
-        """
-        Compute the 1st, 2nd, & 3rd derivatives of the smoothed signal
-        
-        Returns:
-            Nothing, the columns are added inplace of the parent class self.data df
-        """ 
-        from .derivatives_calculator import DerivativesCalculator
-        calculator = DerivativesCalculator(
-            data = self.data,
+        smoother.batch_bspline(
+            n_basis=self.SPLINE_N_BASIS,
+            order=self.spline_order,
             time_col='timestamp_ms',
-            signal_col='sig_smooth',
-            group_col='global_beat_index'
+            derivative_cols={order: f"sig_{order}deriv"
+                             for order in range(1, min(self.MAX_DERIVATIVE, self.spline_order - 1) + 1)}
         )
 
-        calculator.compute_first_derivative()
-        calculator.compute_second_derivative()
-        calculator.compute_third_derivative()
-
 
     def _extract_beat_features(self) -> pd.DataFrame:
         """
         Computes beat-level features and returns them in a new DataFrame
 
+        Fiducial points of every beat are found in batches by
+        BatchedFiducialDetector and written into a BeatFeatureTable,
+        preallocated typed columns with -1 / NaN / False for missing
+        features.
+
         Returns:
-            pd.DataFrame: Each row is a beat_id, columns are feature dictionaries or features
+            pd.DataFrame: Each row is a beat_id, columns are flat typed
+            features (or feature dictionaries for the nested layout)
         """
- 
-        features_list = []
-
-        for beat_idx, beat in self.data.groupby('global_beat_index'):
-            #TODO: Need to check this is actually the global beat index
-            beat_features = {'global_beat_index': beat_idx}
-
-            features_y = self.f_extractor_y.compute_features(beat)
-            beat_features.update(features_y) 
-
-            features_dydx = self.f_extractor_dydx.compute_features(beat)
-            beat_features.update(features_dydx)
-
-            features_d2ydx2 = self.f_extractor_d2ydx2.compute_features(beat)
-            beat_features.update(features_d2ydx2)
-
-            features_d3ydx3 = self.f_extractor_d3ydx3.compute_features(beat)
-            beat_features.update(features_d3ydx3)
-
-            features_d4ydx4 = self.f_extractor_d4ydx4.compute_features(beat)
-            beat_features.update(features_d4ydx4)
+        table = self.fiducial_detector.detect(
+            self.data,
+            time_col='timestamp_ms',
+            signal_col='filtered_value',
+            group_col='global_beat_index'
+        )
 
-            features_list.append(beat_features)
+        beat_features = table.to_frame()
+        if self.feature_layout == "nested":
+            return BeatFeatureTable.to_nested(beat_features)
 
-        return pd.DataFrame(features_list)
-            
-  
+        return beat_features
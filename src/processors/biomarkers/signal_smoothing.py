@@ -1,3 +1,7 @@
+from .bspline_smoother import BatchedBSplineSmoother
+from src.data_model.beat_index import group_offsets
+
+import numpy as np
 import pandas as pd
 
 class SignalSmoothing:
@@ -107,3 +111,58 @@ class SignalSmoothing:
         if flagged_groups:
             for group, error in flagged_groups:
                 print(f"Warning: Group '{group}' could not be processed due to error: {error}")
+
+    def batch_bspline(self,
+                      n_basis: int = 10,
+                      order: int = 4,
+                      time_col: str = None,
+                      derivative_cols: dict = None
+        ):
+        """
+        Batched equivalent of group_apply(method="fda_bspline"), all groups
+        are fitted with BatchedBSplineSmoother instead of a scikit-fda fit
+        per group. The index is the 'x' domain as in _fda_bspline.
+
+        Args:
+            n_basis (int): Number of B-spline basis functions
+            order (int): Spline order, 4 is cubic (skfda default)
+            time_col (str, optional): Time column, derivatives are scaled to
+                per unit time rather than per index step
+            derivative_cols (dict, optional): Derivative order -> output
+                column name for analytic spline derivatives, e.g.
+                {1: "sig_1deriv"}
+
+        Returns:
+            Modifies self.data in place, adding output_col and any
+            derivative columns. Groups shorter than n_basis are NaN.
+        """
+        derivative_cols = derivative_cols or {}
+        smoother = BatchedBSplineSmoother(
+            n_basis=n_basis, order=order, max_deriv=max(derivative_cols, default=0)
+        )
+
+        # Rows of each group must be contiguous, reorder only if they are not
+        rows, starts, stops = group_offsets(self.data[self.group_col].to_numpy())
+        groups = self.data[self.group_col].to_numpy()[rows]
+
+        values = self.data[self.signal_col].to_numpy(dtype=float)[rows]
+        x = np.asarray(self.data.index, dtype=float)[rows]
+
+        dt = None
+        if time_col is not None:
+            t = self.data[time_col].to_numpy(dtype=float)[rows]
+            last = np.maximum(stops - 1, starts)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dt = (t[last] - t[starts]) / (x[last] - x[starts])
+
+        fitted = smoother.smooth(values, starts, stops, x=x, dt=dt)
+        result = np.empty_like(fitted)
+        result[:, rows] = fitted
+
+        self.data[self.output_col] = result[0]
+        for deriv, column in derivative_cols.items():
+            self.data[column] = result[deriv]
+
+        for group in groups[starts[(stops - starts) < n_basis]]:
+            print(f"Warning: Group '{group}' could not be processed due to error: "
+                  "Number of basis functions exceeds series length.")
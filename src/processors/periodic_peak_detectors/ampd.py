@@ -5,9 +5,23 @@ from scipy.signal import detrend
 import sys # For debugging memory usage
 
 class AMPDDetector(BaseDetector):
+    def __init__(self, implementation: str = "streaming"):
+        """
+        Args:
+            implementation (str): "streaming" (default) never allocates the
+                full L x N scalogram, "dense" is the original reference
+                implementation which holds the whole scalogram in memory.
+        """
+        if implementation not in ("streaming", "dense"):
+            raise ValueError(f"[AMPD] Unknown implementation: {implementation}")
+        self.implementation = implementation
+
     def detect(self, signal, **kwargs):
-        peaks, lms, gamma, lambda_scale = self._peak_detect_ampd(signal)
-        
+        if self.implementation == "dense":
+            peaks, lms, gamma, lambda_scale = self._peak_detect_ampd(signal)
+        else:
+            peaks, lms, gamma, lambda_scale = self._peak_detect_ampd_streaming(signal)
+
         return {"peaks":peaks, "lms":lms, "gamma":gamma, "lambda_scale":lambda_scale}
 
     def _peak_detect_ampd(self, signal):
@@ -18,8 +32,9 @@ class AMPDDetector(BaseDetector):
         I have added some more robustness with edge case handling such as small
         or linear signals    
         
-        Note: This uses a lot of memory, I can't recall where the part is that
-        limits the input size    
+        Note: This uses a lot of memory, the dense LMS is L x N float64 so a
+        12000 sample signal needs ~576 MB. Use the streaming implementation
+        for anything but debugging.
         
         Args:
             signal - 1D signal to run ampd on (numpy.ndarray)
@@ -52,6 +67,81 @@ class AMPDDetector(BaseDetector):
         return peaks, lms, gamma, lambda_scale
 
 
+    def _peak_detect_ampd_streaming(self, signal):
+        """
+        Memory bounded AMPD, same algorithm as _peak_detect_ampd but the
+        scalogram is never materialised:
+
+            1. First pass over the scales computes gamma (the number of
+               non-maxima per scale, the deterministic equivalent of the row
+               sums of the random valued dense LMS) keeping a single row in
+               memory at a time.
+            2. Second pass recomputes only the scales up to lambda, packing
+               each row into bits and AND-ing it into a running mask. A column
+               has zero std across the truncated LMS only if it is a maxima at
+               every scale, which is exactly where the running mask is True.
+
+        Memory is O(N * lambda / 8) bytes for the packed LMS instead of
+        O(N * L * 8) for the dense float LMS.
+
+        Args:
+            signal - 1D signal to run ampd on (numpy.ndarray)
+
+        Returns:
+            peaks - Indices of detected peaks (numpy.ndarray)
+            lms - Packed local maxima scalogram for scales 1..lambda+1, one
+                  row per scale, bits set where the sample is a local maxima
+                  (numpy.ndarray of uint8, unpack with np.unpackbits(axis=1))
+            gamma - Number of non-maxima per scale (numpy.ndarray)
+            lambda_scale - Scale at which global minimum occurs (int)
+        """
+        signal = np.asarray(signal, dtype=float)
+
+        # Handle small input signals:
+        if signal.size < 3:
+            return np.array([], dtype=int), np.array([], dtype=np.uint8), np.array([]), 0
+
+        detrended_signal = detrend(signal) # least mean square linear fit
+        N = len(detrended_signal)
+        L = int(np.ceil(N / 2.0)) - 1 # Maximum window size
+
+        # Pass 1: gamma per scale, only one row alive at a time
+        gamma = np.empty(L, dtype=np.int64)
+        for k in range(1, L + 1):
+            gamma[k - 1] = N - np.count_nonzero(self._local_maxima_row(detrended_signal, k))
+        lambda_scale = int(np.argmin(gamma)) # Scale with most maxima
+
+        # Pass 2: packed LMS up to lambda and incremental zero-std columns
+        lms = np.empty((lambda_scale + 1, (N + 7) // 8), dtype=np.uint8)
+        is_peak = np.ones(N, dtype=bool)
+        for k in range(1, lambda_scale + 2):
+            row = self._local_maxima_row(detrended_signal, k)
+            lms[k - 1] = np.packbits(row)
+            is_peak &= row
+
+        # Handle lambda of 0 (short input): the dense LMS keeps a single row,
+        # whose column std is zero everywhere, so every sample is a peak. A
+        # flat signal has no maxima at any scale, the dense lambda is then a
+        # random tie break and only lands on 0 when there is a single scale.
+        if lambda_scale == 0 and (gamma[0] < N or L == 1):
+            is_peak[:] = True
+
+        peaks = np.flatnonzero(is_peak)
+
+        return peaks, lms, gamma, lambda_scale
+
+    def _local_maxima_row(self, signal, k):
+        """
+        Boolean row of the local maxima scalogram for scale k, True where
+        signal[i] is greater than both of its neighbours k samples away.
+        """
+        N = len(signal)
+        row = np.zeros(N, dtype=bool)
+        centre = signal[k:N - k]
+        row[k:N - k] = (centre > signal[:N - 2 * k]) & (centre > signal[2 * k:])
+
+        return row
+
     def _compute_lms(self, signal, implementation=1):
         """
         Compute the local maxima scaleogram of a 1D signal (numpy.ndarray).
@@ -2,12 +2,18 @@ from src.processors.periodic_peak_detectors.ampd import AMPDDetector
 from src.processors.periodic_peak_detectors.msptd import MSPTDDetector
 
 class PeakDetectorFactory:
+    DETECTORS = {
+        "ampd": AMPDDetector,
+        "msptd": MSPTDDetector,
+    }
+
     @staticmethod
-    def create(detector_name: str):
-        detectors = {
-            "ampd": AMPDDetector(),
-            "msptd": MSPTDDetector(),
-        }
-        if detector_name not in detectors:
+    def create(detector_name: str, **kwargs):
+        """
+        Returns an instance of the named periodic peak detector, kwargs are
+        passed to the detector constructor
+        """
+        detector_class = PeakDetectorFactory.DETECTORS.get(detector_name)
+        if detector_class is None:
             raise ValueError(f"Unknown detector: {detector_name}")
-        return detectors[detector_name]
+        return detector_class(**kwargs)
@@ -2,37 +2,67 @@ from src.processors.periodic_peak_detectors.base import BaseDetector
 
 import numpy as np
 import pandas as pd
-import time
 
 class MSPTDDetector(BaseDetector):
+    def __init__(self, min_bpm: float = 30):
+        """
+        Args:
+            min_bpm (float): Lowest plausible heart rate, sets the longest
+                beat interval (and so the largest scale) considered when a
+                sample rate is given to detect()
+        """
+        self.min_bpm = min_bpm
+
     def detect(self, signal, **kwargs):
-        peaks, troughs, maximagram, minimagram = _beat_detect_msptd(signal, 'filtered_value', 1000)
+        """
+        Args:
+            signal (numpy.ndarray): Input signal
+            sample_rate (float, optional): Sample rate of the signal in Hz,
+                used to cap the scalogram at the max physiological beat interval
+            max_interval (int, optional): Max beat interval in samples,
+                overrides sample_rate
+        """
+        max_interval = kwargs.get("max_interval")
+        sample_rate = kwargs.get("sample_rate")
+        if max_interval is None and sample_rate is not None:
+            max_interval = self.max_beat_interval(sample_rate)
+
+        peaks, troughs, maximagram, minimagram = self._beat_detect_msptd(signal, max_interval=max_interval)
         return {"peaks":peaks, "troughs":troughs,
                 "maximagram":maximagram, "minimagram":minimagram
         }
 
-    
-    def beat_detect_msptd(data, column, max_interval=None):
+    def max_beat_interval(self, sample_rate: float) -> int:
+        """
+        Longest plausible beat interval in samples for a sample rate (Hz)
+        """
+        return int(np.ceil(sample_rate * 60.0 / self.min_bpm))
+
+    def _beat_detect_msptd(self, data, column=None, max_interval=None):
         """
         Detect peaks and troughs in a (quasi-)periodic signal using:
             - Modified Scholkmann Algorithm
             - Multi-Scale Peak and Trough Detection
-            - Uses method based on https://www.doi.org/10.1007/978-3-319-65798-1_39 
+            - Uses method based on https://www.doi.org/10.1007/978-3-319-65798-1_39
+
+        Each scale is computed with strided numpy comparisons over the whole
+        signal, maxima and minima in the same pass. The scalograms are stored
+        bit-packed along the sample axis so memory is O(L * N / 8).
 
         Args:
-            data (numpy.ndarray): Input signal
+            data (numpy.ndarray or pd.DataFrame): Input signal
+            column (str, optional): Column to use if data is a DataFrame.
+                Defaults to the first numeric column
             max_interval (int, optional): Max scale to consider for local maxima scaleogram. Defaults to half the signal length
 
         Returns:
             numpy.ndarray: Indicies of detected peaks
             numpy.ndarray: Indicies of detected troughts
-            numpy.ndarray: Local maxima scalogram
-            numpy.ndarray: Local minima scalogram
+            numpy.ndarray: Packed local maxima scalogram, shape (L, ceil(N/8))
+            numpy.ndarray: Packed local minima scalogram, shape (L, ceil(N/8))
         """
 
-        start_time = time.time()
-    
-        ### Preprocess ### 
+        ### Preprocess ###
         # Handle dataframe
         if isinstance(data, pd.DataFrame):
             # If no col specified
@@ -42,13 +72,10 @@ class MSPTDDetector(BaseDetector):
                     raise ValueError("No numeric columns in DataFrame")
                 column = numeric_columns[0]
             # Extract column as numpy array
-            data = data[column].to_numpy()
+            data = data[column].to_numpy(dtype=float)
         else:
             data = np.asarray(data, dtype=float)
 
-        # Make sure is numpy array and convert to float
-        #data = np.asarray(data, dtype=float)
-
         # Remove inf
         data = np.nan_to_num(data, nan=0.0, posinf=0.0, neginf=0.0)
 
@@ -56,59 +83,54 @@ class MSPTDDetector(BaseDetector):
         # Input signal length
         N = len(data)
 
-        # Set length for scaleogram
-        if max_interval is None:
-            L = int(np.ceil(N / 2)) - 1
-        else:
-            L = int(np.ceil(max_interval / 2)) - 1
+        # Set length for scaleogram, never beyond half the signal
+        L = int(np.ceil(N / 2)) - 1
+        if max_interval is not None:
+            L = min(L, int(np.ceil(max_interval / 2)) - 1)
+
+        n_bytes = (N + 7) // 8
+        if L < 1:
+            empty = np.zeros((0, n_bytes), dtype=np.uint8)
+            return np.array([], dtype=int), np.array([], dtype=int), empty, empty.copy()
 
         # Linear Detrending - subtracting the mean
-        #mean_val = np.nanmean(data)
-        #data[np.isnan(data)] = mean_val
         data = data - np.mean(data)
 
-        # Initialise local max and min scaleograms
-        Mx = np.zeros((N, L), dtype=bool)
-        Mn = np.zeros((N, L), dtype=bool)
+        # Initialise packed local max and min scaleograms, row per scale
+        Mx = np.empty((L, n_bytes), dtype=np.uint8)
+        Mn = np.empty((L, n_bytes), dtype=np.uint8)
+        count_max = np.empty(L, dtype=np.int64)
+        count_min = np.empty(L, dtype=np.int64)
 
-        # Compute local maxima scalogram	
+        # Compute local maxima and minima scalogram
+        row_max = np.zeros(N, dtype=bool)
+        row_min = np.zeros(N, dtype=bool)
         for scale in range(L):
-            scale_time_start = time.time()
             k = scale + 1
-            for i in range(k + 1, N - k + 1):
-                # Check if current value is a local maxima
-                if data[i-1] > data[i - k - 1] and data[i-1] > data[i + k - 1]:
-                    Mx[i - 1, scale] = True
-                # Check if current value is a local minima
-                if data[i-1] < data[i - k - 1] and data[i-1] < data[i + k - 1]:	
-                    Mn[i - 1, scale] = True
-            scale_time_end = time.time()
-            print(f'Time Elapsed: {scale_time_end - scale_time_start}')
-
-        maxima_scalogram = Mx
-        minima_scalogram = Mn
+            centre = data[k:N - k]
+            left = data[:N - 2 * k]
+            right = data[2 * k:]
 
-        # Find scale with the most maxima and minima
-        # Sums boolean vals in each column of Mx and Mn
-        # Col with the most zeros (true values) corresponds to scale with most max and minima
-        Y = np.sum(Mx, axis=0)
-        d_max = np.argmax(Y)
-        Mx = Mx[:, :d_max + 1]
+            row_max[:] = False
+            row_min[:] = False
+            row_max[k:N - k] = (centre > left) & (centre > right)
+            row_min[k:N - k] = (centre < left) & (centre < right)
 
-        Y = np.sum(Mn, axis=0)
-        d_min = np.argmax(Y)
-        Mn = Mn[:, :d_min + 1]
+            count_max[scale] = np.count_nonzero(row_max)
+            count_min[scale] = np.count_nonzero(row_min)
+            Mx[scale] = np.packbits(row_max)
+            Mn[scale] = np.packbits(row_min)
+
+        # Find scale with the most maxima and minima
+        d_max = int(np.argmax(count_max))
+        d_min = int(np.argmax(count_min))
 
         # Find position of peaks and troughs
-        # Sum non-zero values in each row of Mx and Mn
-        # Rows with a sum of 0 correspond to the position of a peak and trough
-        Zx = np.sum(~Mx, axis=1)
-        Zn = np.sum(~Mn, axis=1)
-        peaks = np.where(Zx == 0)[0]
-        troughs = np.where(Zn == 0)[0]
-
-        end_time = time.time()
-        overall_time = end_time-start_time
-        print(f'MSPTD Run Time: {overall_time}s')
-        
-        return peaks, troughs, maxima_scalogram, minima_scalogram
+        # A sample is a peak (trough) if it is a maxima (minima) at every
+        # scale up to d_max (d_min), AND the packed rows then unpack once
+        peak_bits = np.bitwise_and.reduce(Mx[:d_max + 1], axis=0)
+        trough_bits = np.bitwise_and.reduce(Mn[:d_min + 1], axis=0)
+        peaks = np.flatnonzero(np.unpackbits(peak_bits, count=N))
+        troughs = np.flatnonzero(np.unpackbits(trough_bits, count=N))
+
+        return peaks, troughs, Mx, Mn
@@ -1,19 +1,41 @@
+from src.data_model.beat_index import BeatIndex
+
+import numpy as np
 import pandas as pd
 
 class BeatOrganiser:
-    def __init__(self, group_size: int):
+    def __init__(self, group_size: int, group_by: str = "beats", epoch_ms: float = 30000):
+        """
+        Args:
+            group_size (int): Number of beats per group when grouping by beats
+            group_by (str): "beats" for n-beat groups, "time" for time epochs
+            epoch_ms (float): Epoch length in ms when grouping by time, beats
+                are assigned to the epoch containing their starting trough
+        """
+        if group_by not in ("beats", "time"):
+            raise ValueError(f"[BeatOrganiser] Unknown group_by: {group_by}. Use 'beats' or 'time'")
+
         self.group_size = group_size
+        self.group_by = group_by
+        self.epoch_ms = epoch_ms
 
     def group_n_beats_list(self, beats):
         """
         Group beats into n-sized segments
 
         args:
-            beats (list): List containing individual beat time series
+            beats (list or BeatIndex): List containing individual beat time
+                series, or a BeatIndex
         returns:
-            n_beat_groups (list): List containing n beat time series
+            n_beat_groups (list): List containing n beat time series, a
+                BeatIndex gives BeatIndex slices (views) instead of concats
         """
-        
+        if isinstance(beats, BeatIndex):
+            beats = beats.with_groups(self._beat_index_groups(beats))
+            bounds = np.flatnonzero(np.diff(beats.group_ids)) + 1
+            edges = np.concatenate(([0], bounds, [len(beats)])) if len(beats) else []
+            return [beats[start:stop] for start, stop in zip(edges[:-1], edges[1:])]
+
         n_beat_groups = [
             pd.concat(beats[i : i + self.group_size])
             for i in range(0, len(beats), self.group_size)
@@ -23,31 +45,47 @@ class BeatOrganiser:
     
     def group_n_beats_inplace(self, df: pd.DataFrame):
         """
-        Group beats into n-sized segments from a DataFrame
+        Group beats into n-sized segments (or time epochs) from a DataFrame
         Each segment will contain beats across sections, preserving order
-        Assigns a global beat id, and a n-beat group id.   
+        Assigns a global beat id, and a group id.   
+
+        Beats are labelled with a cumulative sum over the trough mask, a beat
+        runs from a trough up to the next one and the final trough closes the
+        last beat, rows after it are -1.
+
+        A BeatIndex is also accepted, its beats are already segmented so the
+        global beat id is the beat position and only the group id is added.
         """
+        if isinstance(df, BeatIndex):
+            return df.with_groups(self._beat_index_groups(df)).to_frame()
         
         # Filter rows with valid beats
-        valid_data = df.loc[df['beat'] != -1].copy()
+        valid_data = df.loc[df['beat'] != -1]
         
-        # Sort items
-        valid_data = valid_data.sort_values(by=['section_id','beat']).reset_index(drop=True)
+        # Sort items, skipped when sections already come in order
+        section = valid_data['section_id'].to_numpy()
+        beat = valid_data['beat'].to_numpy()
+        in_order = np.all((section[1:] > section[:-1]) |
+                          ((section[1:] == section[:-1]) & (beat[1:] >= beat[:-1])))
+        if in_order:
+            valid_data = valid_data.reset_index(drop=True)
+        else:
+            valid_data = valid_data.sort_values(by=['section_id','beat'], kind='stable').reset_index(drop=True)
 
         # Assign global index based on trough occurance
-        trough_mask = valid_data['is_beat_trough'] == True
-        trough_indices = valid_data.index[trough_mask]
-        
-        valid_data['global_beat_index'] = -1
+        trough_mask = valid_data['is_beat_trough'].to_numpy(dtype=bool)
+        global_beat_index = self._label_beats(trough_mask)
+        valid_data['global_beat_index'] = global_beat_index
 
-        for beat_num, (start_idx, end_idx) in enumerate(zip(trough_indices[:-1], trough_indices[1:])):
-            valid_data.loc[start_idx:end_idx, 'global_beat_index'] = beat_num
-            
-        # Check a single beat is being id correctly - beat# 100
-        #plt.plot(valid_data['filtered_value'][valid_data['global_beat_index'] == 100])
-        
-        # Calculate group IDs based on group_sie
-        valid_data['group_id'] = valid_data['global_beat_index'] // self.group_size
+        # Calculate group IDs based on group_size or time epoch
+        if self.group_by == "time":
+            beat_starts = np.flatnonzero(trough_mask)[:global_beat_index.max(initial=-1) + 1]
+            start_times = valid_data['timestamp_ms'].to_numpy(dtype=float)[beat_starts]
+            group_ids = np.append(self._epoch_groups(start_times), -1)
+            # Index -1 (no beat) picks the appended -1 group
+            valid_data['group_id'] = group_ids[global_beat_index]
+        else:
+            valid_data['group_id'] = global_beat_index // self.group_size
         #TODO: Might not be these lines! 
         # Check for groups spanning sections
         #group_section_check = valid_data.groupby('group_id')['section_id'].nunique()
@@ -56,6 +94,42 @@ class BeatOrganiser:
         #valid_data.loc[valid_data['group_id'].isin(invalid_groups), 'group_id'] = -1
         
         return valid_data 
-       
-        # I think the issue is that vlid_beats is assigning a global beat index to each row, not each beat - each data point within each beat so that the grouping is grouping 10 data points not 10 beats. 
+
+    def _label_beats(self, trough_mask: np.ndarray) -> np.ndarray:
+        """
+        Beat number of every row from a trough mask in O(N)
+
+        Returns:
+            numpy.ndarray: Global beat index per row, -1 outside beats
+        """
+        labels = np.cumsum(trough_mask, dtype=np.int64) - 1
+        troughs = np.flatnonzero(trough_mask)
+        if len(troughs) < 2:
+            return np.full(len(trough_mask), -1, dtype=np.int64)
+
+        # The final trough closes the last beat, nothing follows it
+        last = troughs[-1]
+        labels[last] = len(troughs) - 2
+        labels[last + 1:] = -1
+
+        return labels
+
+    def _epoch_groups(self, start_times: np.ndarray) -> np.ndarray:
+        """
+        Group id per beat from beat start times, one group per time epoch
+        that contains beats. Epochs are aligned to multiples of epoch_ms and
+        numbered consecutively in order of appearance.
+        """
+        epochs = np.floor(start_times / self.epoch_ms).astype(np.int64)
+        new_epoch = np.ones(len(epochs), dtype=bool)
+        new_epoch[1:] = epochs[1:] != epochs[:-1]
+
+        return np.cumsum(new_epoch) - 1
+
+    def _beat_index_groups(self, beats: BeatIndex) -> np.ndarray:
+        """ Group id per beat of a BeatIndex """
+        if self.group_by == "time":
+            return self._epoch_groups(beats.columns['timestamp_ms'][beats.starts].astype(float))
+
+        return np.arange(len(beats)) // self.group_size
 
@@ -33,8 +33,13 @@ class AppState:
         Save state as checkpoint
         """
         load_orchestrator = LoaderOrchestrator(self.config)
-        self.study_data = load_orchestrator.load_study_data()
-        print("[AppState] Raw data loading complete")
+        if self.config.get("data_source", {}).get("lazy", False):
+            # Sensors are loaded when the pipelines reach them
+            self.study_data = load_orchestrator.discover_study_data()
+            print("[AppState] Raw data discovered, loading on demand")
+        else:
+            self.study_data = load_orchestrator.load_study_data()
+            print("[AppState] Raw data loading complete")
 
         if self.checkpoint.get_save_status():
             self.checkpoint.save({"study_data": self.study_data})
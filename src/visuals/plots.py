@@ -228,6 +228,11 @@ class Plots:
         beat_data = data[data['global_beat_index'] == global_beat_index]
         features = beat_features[beat_features['global_beat_index'] == global_beat_index]
 
+        # Flat feature tables are nested for the lookups below
+        if 'y' not in features.columns:
+            from src.processors.biomarkers.beat_feature_table import BeatFeatureTable
+            features = BeatFeatureTable.to_nested(features)
+
         if features.empty:
             print(f"No features found for global_beat_index {global_beat_index}.")
             return
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.data_model.beat_index import BeatIndex
+from src.processors.sqi.beat_organiser import BeatOrganiser
+from src.processors.biomarkers.basic_biomarkers import BasicBiomarkers
+
+
+@pytest.fixture
+def annotated():
+    """ Two sections, 3 and 2 beats, with rows outside beats marked -1 """
+    beat = [-1, 0, 0, 1, 1, 1, 2, 2, 2, -1,   -1, 0, 0, 0, 1, 1, 1]
+    section = [0] * 10 + [1] * 7
+    n = len(beat)
+    return pd.DataFrame({
+        "timestamp_ms": np.arange(n) * 20.0,
+        "filtered_value": np.sin(np.arange(n)),
+        "section_id": section,
+        "beat": beat,
+        "is_beat_peak": [False, True, False, False, True, False, True, False, False, False,
+                         False, False, True, False, False, True, False],
+    })
+
+
+def test_from_annotated_offsets(annotated):
+    beats = BeatIndex.from_annotated(annotated)
+
+    assert len(beats) == 5
+    assert beats.starts.tolist() == [1, 3, 6, 11, 14]
+    assert beats.stops.tolist() == [3, 6, 9, 14, 17]
+    assert beats.section_ids.tolist() == [0, 0, 0, 1, 1]
+    assert beats.lengths.tolist() == [2, 3, 3, 3, 3]
+
+
+def test_beats_are_views(annotated):
+    beats = BeatIndex.from_annotated(annotated)
+    values = beats.columns["filtered_value"]
+
+    beat = beats.beat(1, "filtered_value")
+    assert np.shares_memory(beat, values)
+    assert np.array_equal(beat, annotated["filtered_value"].iloc[3:6])
+    assert np.shares_memory(beats[-1]["timestamp_ms"], beats.columns["timestamp_ms"])
+
+    sliced = beats[1:3]
+    assert isinstance(sliced, BeatIndex)
+    assert len(sliced) == 2
+    assert sliced.columns["filtered_value"] is values
+
+    assert [len(b) for b in beats.iter_column("beat")] == [2, 3, 3, 3, 3]
+    with pytest.raises(IndexError):
+        beats[5]
+
+
+def test_to_frame_matches_mask(annotated):
+    beats = BeatIndex.from_annotated(annotated)
+    frame = beats.to_frame()
+    expected = annotated[annotated["beat"] != -1].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(frame.drop(columns="global_beat_index"), expected)
+    assert frame["global_beat_index"].tolist() == [0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4]
+    pd.testing.assert_frame_equal(beats.to_frame(3), annotated.iloc[11:14].reset_index(drop=True))
+    assert len(beats.to_frames()) == 5
+
+
+def test_slice_keeps_global_beat_ids(annotated):
+    beats = BeatIndex.from_annotated(annotated)
+    full = beats.to_frame()
+
+    frame = beats[2:4].to_frame()
+    assert frame["global_beat_index"].tolist() == [2, 2, 2, 3, 3, 3]
+    pd.testing.assert_frame_equal(frame, full[full["global_beat_index"].isin([2, 3])].reset_index(drop=True))
+
+    # Ids survive slicing a slice and attaching groups
+    assert beats[1:][2:].with_groups([0, 1]).to_frame()["global_beat_index"].unique().tolist() == [3, 4]
+
+
+def test_organiser_and_biomarkers_accept_index(annotated):
+    beats = BeatIndex.from_annotated(annotated)
+    organiser = BeatOrganiser(group_size=2)
+
+    groups = organiser.group_n_beats_list(beats)
+    assert [len(group) for group in groups] == [2, 2, 1]
+    assert groups[1].group_ids.tolist() == [1, 1]
+
+    grouped = organiser.group_n_beats_inplace(beats)
+    assert grouped["group_id"].tolist() == [0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 2, 2, 2]
+
+    data = BasicBiomarkers(beats.with_groups(np.arange(5) // 2)).compute_ibi()
+    peaks = data[data["is_beat_peak"]]
+    # Second peak of group 0 is 3 samples after the first
+    assert peaks["ibi_ms"].tolist()[1] == 60.0
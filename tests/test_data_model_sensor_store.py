@@ -0,0 +1,72 @@
+import mmap
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_model.sensor_store import SensorStore, StoredFrame, SensorMapping, SensorHandle
+from src.data_model.study_data import SessionData
+
+def _is_mapped(values):
+    """ True when an array's memory comes from a file mapping """
+    while values is not None:
+        if isinstance(values, (np.memmap, mmap.mmap)):
+            return True
+        values = getattr(values, 'base', None)
+    return False
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({
+        'phone_datetime': ['2024-03-13T04:05:34.771', '2024-03-13T04:05:34.789', None],
+        'sensor_clock_ns': np.array([1, 2, 3], dtype=np.int64),
+        'datetime': pd.to_datetime([1, 2, 3], unit='ms'),
+        'ppg': [-1.5, -2.5, 3.0],
+    })
+
+def test_round_trip(tmp_path, data):
+    stored = SensorStore(tmp_path).write("S1", "rest", "ppg", data)
+    assert isinstance(stored, StoredFrame)
+
+    loaded = stored.load()
+    pd.testing.assert_frame_equal(loaded, data)
+    assert _is_mapped(loaded['ppg'].to_numpy())
+    assert not _is_mapped(loaded['phone_datetime'].to_numpy())
+
+def test_copy_on_write(tmp_path, data):
+    stored = SensorStore(tmp_path).write("S1", "rest", "ppg", data)
+    loaded = stored.load()
+    loaded['ppg'].to_numpy()[0] = 100.0
+
+    # Edits stay in memory, the stored file is unchanged
+    assert stored.load()['ppg'].iloc[0] == -1.5
+
+def test_session_loads_lazily(tmp_path, data):
+    session = SessionData("rest", "S1")
+    session.add_sensor_data("ppg", SensorStore(tmp_path).write("S1", "rest", "ppg", data))
+
+    assert not session.sensors.is_loaded("ppg")
+    pd.testing.assert_frame_equal(session.get_sensor_data("ppg"), data)
+    assert session.sensors.is_loaded("ppg")
+    # Same frame on every access, as with an in-memory dict
+    assert session.sensors["ppg"] is dict(session.sensors.items())["ppg"]
+
+def test_pickle_keeps_handles(tmp_path, data):
+    sensors = SensorMapping(ppg=SensorStore(tmp_path).write("S1", "rest", "ppg", data))
+    sensors["ppg"]
+
+    restored = pickle.loads(pickle.dumps(sensors))
+    assert isinstance(restored.raw("ppg"), StoredFrame)
+    assert not restored.is_loaded("ppg")
+    pd.testing.assert_frame_equal(restored["ppg"], data)
+
+def test_empty_frame(tmp_path):
+    stored = SensorStore(tmp_path).write("S1", "rest", "ppg", pd.DataFrame({'ppg': np.array([], dtype=float)}))
+    assert stored.load().empty
+
+def test_sensor_handle_requires_load():
+    class NoLoad(SensorHandle):
+        pass
+
+    with pytest.raises(TypeError):
+        NoLoad()
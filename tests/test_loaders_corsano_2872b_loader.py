@@ -32,13 +32,10 @@ def test_load_data(temp_csv_file):
     # Verify that the data is loaded as a DataFrame
     assert isinstance(data, pd.DataFrame), "Data should be a pandas DataFrame"
     
-    # Verify the structure of the DataFrame
-    expected_columns = [
-        "timestamp", "date", "metric_id", "chunk_index",
-        "quality", "body_pose", "led_pd_pos", "offset",
-        "exp", "led", "gain", "value"
-    ]
+    # Verify the structure of the DataFrame, only used columns are parsed
+    expected_columns = ["timestamp", "value"]
     assert list(data.columns) == expected_columns, "Columns should match expected structure"
+    assert data["timestamp"].dtype == "int64"
 
 def test_empty_file(tmp_path):
     empty_file = tmp_path / "empty.csv"
@@ -74,3 +71,71 @@ def test_standardise(temp_csv_file):
     assert len(standardised_data) == 3, "Standardised data should have same rows as original"
     assert standardised_data['timestamp_ms'].iloc[0] == 1730821062000, "Timestamp should be correctly retained"
     assert standardised_data['ppg'].iloc[0] == 45966, "PPG should match value"
+
+def test_load_data_quality(temp_csv_file):
+    loader = Corsano2872bLoader(config())
+    data = loader.load_sensor_data('ppg', [temp_csv_file], include_quality=True)
+
+    assert list(data.columns) == ["timestamp", "value", "quality"]
+    assert data["quality"].tolist() == [-1, 4, 4]
+    assert list(loader.standardise('ppg', data).columns) == ["datetime", "timestamp_ms", "ppg", "quality"]
+
+def test_load_multiple_files(temp_csv_file):
+    loader = Corsano2872bLoader(config())
+    data = loader.load_sensor_data('ppg', [temp_csv_file, temp_csv_file])
+
+    assert len(data) == 6
+    assert list(data.index) == list(range(6))
+
+def test_invalid_file_not_parsed(tmp_path, temp_csv_file):
+    """ Header is checked for every file before any data is read """
+    invalid_file = tmp_path / "invalid.csv"
+    invalid_file.write_text("timestamp,value\n1,2\n")
+
+    loader = Corsano2872bLoader(config())
+    with pytest.raises(ValueError, match="missing required columns"):
+        loader.load_sensor_data('ppg', [temp_csv_file, invalid_file])
+
+def test_engine_fallback():
+    loader = Corsano2872bLoader(config(), engine="pandas")
+    assert loader.engine == "pandas"
+    assert Corsano2872bLoader(config()).engine in ("pyarrow", "pandas")
+    with pytest.raises(ValueError):
+        Corsano2872bLoader(config(), engine="polars")
+
+def test_pyarrow_window_streams_batches(tmp_path):
+    pytest.importorskip("pyarrow")
+    from loaders.time_window import TimeWindow
+
+    header = "timestamp,date,metric_id,chunk_index,quality,body_pose,led_pd_pos,offset,exp,led,gain,value"
+    rows = [f"{1730821062000 + i * 1000},2024-11-05T15:37:42.000+00:00,0x7e,11,4,1,6,0,0,52,2,{i}"
+            for i in range(2000)]
+    path = tmp_path / "ppg.csv"
+    path.write_text("\n".join([header] + rows) + "\n")
+    window = TimeWindow(start_ms=1730821062000 + 500_000, end_ms=1730821062000 + 700_000)
+
+    loader = Corsano2872bLoader(config(), engine="pyarrow")
+    loader.window_block_size = 4096
+    batches = []
+    window_batches = loader._window_batches
+    loader._window_batches = lambda reader, w: window_batches((batches.append(b) or b for b in reader), w)
+    data = loader.load_sensor_data("ppg", [path], window=window)
+
+    assert data["value"].tolist() == list(range(500, 700))
+    pd.testing.assert_frame_equal(
+        data, Corsano2872bLoader(config(), engine="pandas").load_sensor_data("ppg", [path], window=window))
+    # Reading stops at the batch that passes the window end
+    assert sum(len(b) for b in batches) < 2000
+
+@pytest.mark.parametrize("engine", ["pyarrow", "pandas"])
+def test_files_with_integer_and_decimal_values(tmp_path, temp_csv_file, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    decimals = tmp_path / "decimals.csv"
+    decimals.write_text(temp_csv_file.read_text().replace(",45966\n", ",45966.5\n"))
+
+    data = Corsano2872bLoader(config(), engine=engine).load_sensor_data(
+        "ppg", [temp_csv_file, decimals], include_quality=True)
+
+    assert data["value"].tolist() == [45966, 45966, 10895, 45966.5, 45966.5, 10895]
+    assert data["quality"].tolist() == [-1, 4, 4] * 2
@@ -1,6 +1,7 @@
 import pytest
 import os
 from unittest.mock import patch, MagicMock
+import pandas as pd
 
 from src.data_model.study_data import StudyData, Subject, SessionData
 from src.loaders.loader_orchestrator import LoaderOrchestrator
@@ -223,3 +224,99 @@ def test_no_subject_directories_found(
 
     study_data = orchestrator.load_study_data()
     assert len(study_data.subjects) == 0, "No valid subject directories -> empty StudyData."
+
+
+# Testing concurrent loading
+
+PPG = """Phone timestamp;sensor timestamp [ns];channel 0;channel 1;channel 2;ambient
+2024-03-13T04:05:34.771;763574775687450102;-1426;-4334;47386;-117294
+2024-03-13T04:05:34.789;763574775654725806;-1451;-1216;42939;-117459
+"""
+
+@pytest.fixture
+def polar_subjects(tmp_path):
+    for i in range(6):
+        session = tmp_path / f"S{i}" / "rest"
+        session.mkdir(parents=True)
+        (session / f"S{i}_PPG.txt").write_text(PPG.replace("-1426", str(-1000 - i)))
+    # A subject whose file is missing required columns
+    (tmp_path / "S3" / "rest" / "S3_PPG.txt").write_text("bad;header\n1;2\n")
+
+    return {
+        "data_source": {
+            "subjects_dir": str(tmp_path),
+            "subjects_to_load": ["all"],
+            "multi_condition": {"conditions": ["rest"]},
+            "sensor_type": ["ppg"],
+            "device": "polar-verity",
+            "skip_failed_subjects": True
+        }
+    }
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_matches_serial(polar_subjects, executor):
+    serial = LoaderOrchestrator(polar_subjects)
+    serial_data = serial.load_study_data()
+
+    polar_subjects["data_source"].update(n_workers=3, executor=executor)
+    parallel = LoaderOrchestrator(polar_subjects)
+    parallel_data = parallel.load_study_data()
+
+    assert list(parallel_data.subjects) == list(serial_data.subjects) == ["S0", "S1", "S2", "S4", "S5"]
+    for subject_id in parallel_data.subjects:
+        pd.testing.assert_frame_equal(
+            parallel_data.get_subject(subject_id).get_session("rest").get_sensor_data("ppg"),
+            serial_data.get_subject(subject_id).get_session("rest").get_sensor_data("ppg")
+        )
+
+    # Errors are reported per subject
+    assert list(parallel.load_errors) == ["S3"]
+    assert "missing required columns" in parallel.load_errors["S3"]
+
+def test_failed_subject_raises_by_default(polar_subjects):
+    polar_subjects["data_source"]["skip_failed_subjects"] = False
+    with pytest.raises(ValueError, match="missing required columns"):
+        LoaderOrchestrator(polar_subjects).load_study_data()
+
+    # In parallel every subject is tried, then the failures are raised together
+    polar_subjects["data_source"]["n_workers"] = 3
+    orchestrator = LoaderOrchestrator(polar_subjects)
+    with pytest.raises(RuntimeError, match="S3") as raised:
+        orchestrator.load_study_data()
+    assert isinstance(raised.value.__cause__, ValueError)
+    assert list(orchestrator.load_errors) == ["S3"]
+
+def test_unknown_executor(example_config):
+    example_config["data_source"]["executor"] = "gpu"
+    with pytest.raises(ValueError):
+        LoaderOrchestrator(example_config)
+
+def test_store_backed_sessions(polar_subjects, tmp_path):
+    from src.data_model.sensor_store import StoredFrame
+
+    in_memory = LoaderOrchestrator(polar_subjects).load_study_data()
+    polar_subjects["data_source"]["store"] = {"enabled": True, "dir": str(tmp_path / "store")}
+    stored = LoaderOrchestrator(polar_subjects).load_study_data()
+
+    sensors = stored.get_subject("S0").get_session("rest").sensors
+    assert isinstance(sensors.raw("ppg"), StoredFrame)
+    pd.testing.assert_frame_equal(
+        sensors["ppg"], in_memory.get_subject("S0").get_session("rest").get_sensor_data("ppg"))
+
+def test_discover_study_data_is_lazy(polar_subjects):
+    from src.loaders.pending_sensor import PendingSensor
+
+    eager = LoaderOrchestrator(polar_subjects).load_study_data()
+    lazy = LoaderOrchestrator(polar_subjects).discover_study_data()
+
+    sensors = lazy.get_subject("S0").get_session("rest").sensors
+    assert isinstance(sensors.raw("ppg"), PendingSensor)
+    assert sensors.raw("ppg").size == len(PPG.replace("-1426", "-1000"))
+    assert not sensors.is_loaded("ppg")
+
+    pd.testing.assert_frame_equal(
+        sensors["ppg"], eager.get_subject("S0").get_session("rest").get_sensor_data("ppg"))
+    assert sensors.is_loaded("ppg")
+
+    sensors.release()
+    assert not sensors.is_loaded("ppg")
@@ -77,8 +77,8 @@ def test_standardise(temp_csv_file):
     assert isinstance(standardised_data, pd.DataFrame), "Standardised data must be in padnas dataframe"
     
     # Verify standardised structure
+    # Raw channels are dropped after fusion by default
     expected_columns = ["phone_datetime","sensor_clock_ns",
-                        "ppg_ch0", "ppg_ch1", "ppg_ch2", "ppg_amb",
                         "timestamp_ms", "ppg"]
     
     assert list(standardised_data.columns) == expected_columns, "Standardised data columns should match expected"
@@ -88,3 +88,77 @@ def test_standardise(temp_csv_file):
     assert standardised_data["timestamp_ms"].iloc[0] == 763574775687.4501, "Timestamp must be converted to ms"
     expected_mean = (-1426 + -4334 + 47386)/3
     assert standardised_data['ppg'].iloc[0] == expected_mean, "Value should be the mean of channel 1, 2, and 3" 
+
+def test_iter_sensor_data_chunks(temp_csv_file):
+    loader = PolarVerityLoader(config())
+    chunks = list(loader.iter_sensor_data('ppg', [temp_csv_file], chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    data = pd.concat(chunks)
+    assert data['sensor_clock_ns'].dtype == 'int64'
+    assert data['ppg'].dtype == 'float64'
+    # Phone timestamp is not read unless asked for
+    assert 'phone_datetime' not in data.columns
+
+    whole = loader.standardise('ppg', loader.load_sensor_data('ppg', [temp_csv_file]))
+    assert data['timestamp_ms'].tolist() == whole['timestamp_ms'].tolist()
+    assert data['ppg'].tolist() == whole['ppg'].tolist()
+
+def test_iter_sensor_data_column_pruning(temp_csv_file):
+    loader = PolarVerityLoader(config())
+    chunk = next(loader.iter_sensor_data('ppg', [temp_csv_file], parse_timestamps=True,
+                                         columns=["channel 0", "channel 1", "channel 2"]))
+
+    assert list(chunk.columns) == ["phone_datetime", "sensor_clock_ns", "timestamp_ms", "ppg"]
+    assert chunk['phone_datetime'].iloc[0] == pd.Timestamp("2024-03-13T04:05:34.771")
+
+def test_iter_sensor_data_invalid_file(tmp_path):
+    invalid_file = tmp_path / "invalid_PPG.txt"
+    invalid_file.write_text("invalid data\nwithout proper columns\n")
+
+    loader = PolarVerityLoader(config())
+    with pytest.raises(ValueError):
+        next(loader.iter_sensor_data('ppg', [invalid_file]))
+
+def test_stream_sensor_data(temp_csv_file, tmp_path):
+    loader = PolarVerityLoader(config())
+    stream = loader.stream_sensor_data('ppg', [temp_csv_file, tmp_path / "other_HR.txt"], chunk_size=2)
+
+    assert stream.files == [temp_csv_file]
+    assert not stream.empty
+    # Re-iterable, each pass reads the file again
+    assert sum(len(chunk) for chunk in stream) == 4
+    assert sum(len(chunk) for chunk in stream) == 4
+    assert loader.stream_sensor_data('ppg', []).empty
+
+def test_load_sensor_tail(temp_csv_file):
+    loader = PolarVerityLoader(config())
+    lines = temp_csv_file.read_text().splitlines(keepends=True)
+    full = loader.load_sensor_data('ppg', [temp_csv_file])
+
+    # Logger mid way through writing the third row
+    temp_csv_file.write_text("".join(lines[:3]) + lines[3][:10])
+    head, offset = loader.load_sensor_tail('ppg', temp_csv_file)
+    assert len(head) == 2
+
+    temp_csv_file.write_text("".join(lines))
+    tail, end = loader.load_sensor_tail('ppg', temp_csv_file, offset)
+    assert end == os.path.getsize(temp_csv_file)
+    pd.testing.assert_frame_equal(pd.concat([head, tail], ignore_index=True), full)
+
+    empty, same = loader.load_sensor_tail('ppg', temp_csv_file, end)
+    assert empty.empty and same == end
+
+def test_standardise_channel_weights(temp_csv_file):
+    conf = config()
+    conf["data_source"]["polar"] = {
+        "channel_weights": {"ppg_ch0": 2, "ppg_ch1": 0, "ppg_ch2": 1},
+        "keep_raw_channels": True
+    }
+    loader = PolarVerityLoader(conf)
+    data = loader.standardise('ppg', loader.load_sensor_data('ppg', [temp_csv_file]))
+
+    assert list(data.columns) == ["phone_datetime", "sensor_clock_ns", "ppg_ch0", "ppg_ch1",
+                                  "ppg_ch2", "ppg_amb", "timestamp_ms", "ppg"]
+    assert data['sensor_clock_ns'].dtype == 'int64'
+    assert data['ppg'].iloc[0] == (2 * -1426 + 47386) / 3
@@ -0,0 +1,167 @@
+import os
+import pytest
+import pandas as pd
+
+from src.loaders.sensor_cache import SensorCache
+from src.loaders.loader_orchestrator import LoaderOrchestrator
+
+PPG = """Phone timestamp;sensor timestamp [ns];channel 0;channel 1;channel 2;ambient
+2024-03-13T04:05:34.771;763574775687450102;-1426;-4334;47386;-117294
+2024-03-13T04:05:34.789;763574775654725806;-1451;-1216;42939;-117459
+"""
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "S1_PPG.txt"
+    path.write_text(PPG)
+    return path
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({'timestamp_ms': [1.0, 2.0], 'ppg': [-3.0, -4.0]})
+
+def test_round_trip(tmp_path, source_file, data):
+    cache = SensorCache(tmp_path / "cache", fmt="pickle")
+    assert cache.load("S1", "rest", "ppg", [source_file]) is None
+
+    cache.save("S1", "rest", "ppg", [source_file], data)
+    pd.testing.assert_frame_equal(cache.load("S1", "rest", "ppg", [source_file]), data)
+
+def test_touched_file_still_hits(tmp_path, source_file, data):
+    cache = SensorCache(tmp_path / "cache", fmt="pickle")
+    cache.save("S1", "rest", "ppg", [source_file], data)
+
+    stat = os.stat(source_file)
+    os.utime(source_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.load("S1", "rest", "ppg", [source_file]) is not None
+
+def test_changed_file_misses(tmp_path, source_file, data):
+    cache = SensorCache(tmp_path / "cache", fmt="pickle")
+    cache.save("S1", "rest", "ppg", [source_file], data)
+
+    # Same size, different content
+    source_file.write_text(PPG.replace("-1426", "-1427"))
+    assert cache.load("S1", "rest", "ppg", [source_file]) is None
+
+def test_file_set_and_loader_change_miss(tmp_path, source_file, data):
+    cache = SensorCache(tmp_path / "cache", fmt="pickle")
+    cache.save("S1", "rest", "ppg", [source_file], data, loader_name="PolarVerityLoader")
+
+    other = tmp_path / "S1b_PPG.txt"
+    other.write_text(PPG)
+    assert cache.load("S1", "rest", "ppg", [source_file, other], "PolarVerityLoader") is None
+    assert cache.load("S1", "rest", "ppg", [source_file], "Corsano2872bLoader") is None
+
+def test_columnar_format(tmp_path, source_file, data):
+    pytest.importorskip("pyarrow")
+    for fmt in ("parquet", "feather"):
+        cache = SensorCache(tmp_path / fmt, fmt=fmt)
+        cache.save("S1", "rest", "ppg", [source_file], data)
+        pd.testing.assert_frame_equal(cache.load("S1", "rest", "ppg", [source_file]), data)
+
+def test_orchestrator_uses_cache(tmp_path, source_file, capsys):
+    session = tmp_path / "subjects" / "S1" / "rest"
+    session.mkdir(parents=True)
+    os.replace(source_file, session / "S1_PPG.txt")
+    config = {
+        "data_source": {
+            "subjects_dir": str(tmp_path / "subjects"),
+            "subjects_to_load": ["S1"],
+            "multi_condition": {"conditions": ["rest"]},
+            "sensor_type": ["ppg"],
+            "device": "polar-verity",
+            "cache": {"enabled": True, "dir": str(tmp_path / "cache"), "format": "pickle"}
+        }
+    }
+
+    first = LoaderOrchestrator(config).load_study_data()
+    second = LoaderOrchestrator(config).load_study_data()
+
+    assert "Loaded S1/rest/ppg from cache" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(
+        first.get_subject("S1").get_session("rest").get_sensor_data("ppg"),
+        second.get_subject("S1").get_session("rest").get_sensor_data("ppg")
+    )
+
+def test_incremental_ingestion(tmp_path, capsys):
+    session = tmp_path / "subjects" / "S1" / "rest"
+    session.mkdir(parents=True)
+    source = session / "S1_PPG.txt"
+    lines = PPG.splitlines(keepends=True)
+    source.write_text(lines[0] + lines[1])
+    config = {
+        "data_source": {
+            "subjects_dir": str(tmp_path / "subjects"),
+            "subjects_to_load": ["S1"],
+            "multi_condition": {"conditions": ["rest"]},
+            "sensor_type": ["ppg"],
+            "device": "polar-verity",
+            "cache": {"enabled": True, "dir": str(tmp_path / "cache"), "format": "pickle", "incremental": True}
+        }
+    }
+    def ppg():
+        study_data = LoaderOrchestrator(config).load_study_data()
+        return study_data.get_subject("S1").get_session("rest").get_sensor_data("ppg")
+
+    assert len(ppg()) == 1
+
+    # Logger appends a row
+    with open(source, "a") as f:
+        f.write(lines[2])
+    capsys.readouterr()
+    data = ppg()
+    assert "Ingested 1 new rows" in capsys.readouterr().out
+    assert (tmp_path / "cache" / "S1" / "rest" / "ppg.part1.pkl").exists()
+
+    config["data_source"]["cache"]["enabled"] = False
+    pd.testing.assert_frame_equal(data, ppg())
+
+def test_incremental_rewritten_file_reingests(tmp_path, source_file, data):
+    cache = SensorCache(tmp_path / "cache", fmt="pickle")
+    size = os.path.getsize(source_file)
+    state = {source_file: {"offset": size, "last_timestamp_ms": 2.0}}
+    cache.append("S1", "rest", "ppg", data, state, new=True)
+
+    cached, cached_state = cache.load_incremental("S1", "rest", "ppg", [source_file])
+    pd.testing.assert_frame_equal(cached, data)
+    assert cached_state == state
+
+    # Full entries and incremental entries do not mix
+    assert cache.load("S1", "rest", "ppg", [source_file]) is None
+
+    source_file.write_text(PPG.replace("-1451", "-1452"))
+    assert cache.load_incremental("S1", "rest", "ppg", [source_file]) == (None, {})
+
+def test_changed_channel_weights_miss(tmp_path, source_file, capsys):
+    session = tmp_path / "subjects" / "S1" / "rest"
+    session.mkdir(parents=True)
+    os.replace(source_file, session / "S1_PPG.txt")
+    config = {
+        "data_source": {
+            "subjects_dir": str(tmp_path / "subjects"),
+            "subjects_to_load": ["S1"],
+            "multi_condition": {"conditions": ["rest"]},
+            "sensor_type": ["ppg"],
+            "device": "polar-verity",
+            "polar": {"channel_weights": {"ppg_ch0": 1, "ppg_ch1": 1, "ppg_ch2": 1}},
+            "cache": {"enabled": True, "dir": str(tmp_path / "cache"), "format": "pickle"}
+        }
+    }
+    def ppg():
+        study_data = LoaderOrchestrator(config).load_study_data()
+        return study_data.get_subject("S1").get_session("rest").get_sensor_data("ppg")
+
+    summed = ppg()
+    config["data_source"]["polar"]["channel_weights"] = {"ppg_ch0": 1, "ppg_ch1": 0, "ppg_ch2": 0}
+    capsys.readouterr()
+    single = ppg()
+
+    assert "from cache" not in capsys.readouterr().out
+    assert list(single["ppg"]) == [-1426, -1451]
+    assert list(single["ppg"]) != list(summed["ppg"])
+
+    # Same for rows ingested incrementally
+    config["data_source"]["cache"]["incremental"] = True
+    ppg()
+    config["data_source"]["polar"]["keep_raw_channels"] = True
+    assert "ppg_ch0" in ppg().columns
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.loaders.sensor_container import SensorContainer
+from src.loaders.native_loader import NativeLoader
+from src.loaders.native_converter import convert_study
+from src.loaders.loader_factory import DataLoaderFactory
+from src.loaders.loader_orchestrator import LoaderOrchestrator
+
+@pytest.fixture
+def polar_like():
+    n = 1000
+    clock = 763574775687450102 + np.cumsum(np.full(n, 7_400_000, dtype=np.int64))
+    return pd.DataFrame({
+        'phone_datetime': ['2024-03-13T04:05:34.771'] * n,
+        'sensor_clock_ns': clock,
+        'ppg_ch0': (np.arange(n, dtype=np.int64) * 37) % 1000 - 500,
+        'ppg_amb': -117294 + (np.arange(n, dtype=np.int64) % 7) * 100,
+        'timestamp_ms': clock / 1e6,
+        'ppg': np.sin(np.arange(n) / 10.0),
+        'datetime': pd.to_datetime(clock // 1_000_000, unit='ms'),
+    })
+
+DERIVED = {'timestamp_ms': ('sensor_clock_ns', 1_000_000)}
+
+@pytest.mark.parametrize("compression", ["zlib", None])
+def test_round_trip(tmp_path, polar_like, compression):
+    path = tmp_path / "S1_ppg.wsc"
+    container = SensorContainer.write(path, polar_like, chunk_rows=128, compression=compression, derived=DERIVED)
+
+    assert container.n_rows == 1000
+    assert len(container.chunks) == 8
+    # Timestamp strings come back as datetimes
+    expected = polar_like.assign(phone_datetime=pd.to_datetime(polar_like['phone_datetime']))
+    pd.testing.assert_frame_equal(SensorContainer(path).read(), expected)
+
+def test_other_strings_are_not_dropped(tmp_path, polar_like):
+    with pytest.raises(ValueError):
+        SensorContainer.write(tmp_path / "S1_ppg.wsc", polar_like.assign(note="x"))
+
+def test_compact_encoding(tmp_path, polar_like):
+    container = SensorContainer.write(tmp_path / "S1_ppg.wsc", polar_like, chunk_rows=128,
+                                      compression=None, derived=DERIVED)
+    encodings = {c["name"]: c["encoding"] for c in container.footer["columns"]}
+    chunk = container.chunks[0]["columns"]
+
+    assert encodings["sensor_clock_ns"] == "delta"
+    # timestamp_ms is not stored, it is the clock / 1e6
+    assert encodings["timestamp_ms"] == "derived"
+    assert "timestamp_ms" not in chunk
+    assert chunk["sensor_clock_ns"]["dtype"] == "<i4"
+    assert chunk["ppg_ch0"]["dtype"] == "<i2"
+    assert chunk["ppg_amb"]["dtype"] == "<i4"
+    assert chunk["ppg_ch0"]["min"] == -500
+
+def test_uncompressed_single_chunk_is_not_copied(tmp_path, polar_like):
+    container = SensorContainer.write(tmp_path / "S1_ppg.wsc", polar_like, compression=None)
+    ppg = container.read(columns=['ppg'])['ppg'].to_numpy()
+
+    assert not ppg.flags.owndata
+    # Copy-on-write, the file is unchanged
+    ppg[0] = 99.0
+    assert container.read(columns=['ppg'])['ppg'].iloc[0] == polar_like['ppg'].iloc[0]
+
+def test_time_range_seeks_chunks(tmp_path, polar_like, monkeypatch):
+    container = SensorContainer.write(tmp_path / "S1_ppg.wsc", polar_like, chunk_rows=100, derived=DERIVED)
+    start, end = polar_like['timestamp_ms'].iloc[250], polar_like['timestamp_ms'].iloc[420]
+
+    decoded = []
+    decode = SensorContainer._decode
+    monkeypatch.setattr(SensorContainer, "_decode",
+                        lambda self, mm, meta, column: decoded.append(meta["offset"]) or decode(self, mm, meta, column))
+    data = container.read(start_ms=start, end_ms=end, columns=['ppg'])
+
+    expected = polar_like[(polar_like.timestamp_ms >= start) & (polar_like.timestamp_ms < end)]
+    np.testing.assert_array_equal(data['ppg'].to_numpy(), expected['ppg'].to_numpy())
+    assert list(data.columns) == ['ppg']
+    # Chunks 2-4, ppg and the clock timestamp_ms is derived from
+    assert len(decoded) == 3 * 2
+
+def test_not_a_container(tmp_path):
+    path = tmp_path / "S1_ppg.wsc"
+    path.write_bytes(b"not a container")
+    with pytest.raises(ValueError):
+        SensorContainer(path)
+
+def test_native_loader(tmp_path, polar_like):
+    SensorContainer.write(tmp_path / "S1_ppg.wsc", polar_like)
+    files = [tmp_path / "S1_ppg.wsc", tmp_path / "S1_acc.wsc", tmp_path / "S1_PPG.txt"]
+    config = {"data_source": {"device": "polar-verity", "format": "native"}}
+
+    loader = DataLoaderFactory.get_loader(config)
+    assert isinstance(loader, NativeLoader)
+    assert loader.select_files("ppg", files) == [tmp_path / "S1_ppg.wsc"]
+    assert len(loader.load_sensor_data("ppg", files, end_ms=polar_like['timestamp_ms'].iloc[10])) == 10
+    assert loader.load_sensor_data("acc", []).empty
+
+def test_convert_study(tmp_path):
+    ppg = """Phone timestamp;sensor timestamp [ns];channel 0;channel 1;channel 2;ambient
+2024-03-13T04:05:34.771;763574775687450102;-1426;-4334;47386;-117294
+2024-03-13T04:05:34.789;763574775694850102;-1451;-1216;42939;-117459
+"""
+    session = tmp_path / "subjects" / "S1" / "rest"
+    session.mkdir(parents=True)
+    (session / "S1_PPG.txt").write_text(ppg)
+    config = {
+        "data_source": {
+            "subjects_dir": str(tmp_path / "subjects"),
+            "subjects_to_load": ["all"],
+            "multi_condition": {"conditions": ["rest"]},
+            "sensor_type": ["ppg"],
+            "device": "polar-verity",
+            "native": {"dir": str(tmp_path / "native")}
+        }
+    }
+
+    written = convert_study(config)
+    assert written == [str(tmp_path / "native" / "S1" / "rest" / "S1_ppg.wsc")]
+
+    text = LoaderOrchestrator(config).load_study_data()
+    config["data_source"].update(format="native", subjects_dir=str(tmp_path / "native"))
+    native = LoaderOrchestrator(config).load_study_data()
+
+    expected = text.get_subject("S1").get_session("rest").get_sensor_data("ppg")
+    expected["phone_datetime"] = pd.to_datetime(expected["phone_datetime"])
+    pd.testing.assert_frame_equal(native.get_subject("S1").get_session("rest").get_sensor_data("ppg"), expected)
+
+    # Raw integer channels are stored, fused with the weights at load time
+    container = SensorContainer(written[0])
+    assert "ppg" not in container.columns
+    assert container.chunks[0]["columns"]["ppg_ch2"]["dtype"] == "<i4"
+    config["data_source"]["polar"] = {"channel_weights": {"ppg_ch0": 1}}
+    native = LoaderOrchestrator(config).load_study_data()
+    assert list(native.get_subject("S1").get_session("rest").get_sensor_data("ppg")["ppg"]) == [-1426, -1451]
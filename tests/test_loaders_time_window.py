@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.loaders.time_window import TimeWindow, MS_PER_DAY
+from src.loaders.polar_verity_loader import PolarVerityLoader
+from src.loaders.corsano_2872b_loader import Corsano2872bLoader
+from src.loaders.loader_orchestrator import LoaderOrchestrator
+
+HOUR = 60 * 60 * 1000
+# 2024-03-13T00:00:00Z
+MIDNIGHT = pd.Timestamp("2024-03-13", tz="UTC").value // 10**6
+
+def test_absolute_window():
+    window = TimeWindow.from_config({"start": "2024-03-13T01:00", "end": MIDNIGHT + 2 * HOUR})
+    times = MIDNIGHT + np.array([0, 1, 1.5, 2, 3]) * HOUR
+
+    assert window.mask(times).tolist() == [False, True, True, False, False]
+    assert window.is_past(MIDNIGHT + 2 * HOUR)
+    assert not window.is_past(MIDNIGHT + HOUR)
+
+def test_daily_window_wraps_midnight():
+    window = TimeWindow.from_config({"daily": ["22:00", "06:00"]})
+    hours = np.array([21, 22, 23, 0, 5.9, 6, 12])
+    times = MIDNIGHT + MS_PER_DAY + hours * HOUR
+
+    assert window.mask(times).tolist() == [False, True, True, True, True, False, False]
+    assert not window.is_past(times.max())
+
+def test_daily_window_time_zone():
+    # 22:00 in New York (UTC-4 in March after DST) is 02:00 UTC
+    window = TimeWindow.from_config({"daily": ["22:00", "23:00"], "tz": "America/New_York"})
+    assert window.mask([MIDNIGHT + 2.5 * HOUR, MIDNIGHT + 22.5 * HOUR]).tolist() == [True, False]
+
+def test_empty_config():
+    assert TimeWindow.from_config(None) is None
+    assert TimeWindow.from_config({}) is None
+
+def polar_file(path, start_ms, n, step_ms=1000):
+    """ Polar PPG log starting at unix start_ms """
+    clock = (start_ms - PolarVerityLoader.EPOCH_OFFSET_MS + np.arange(n) * step_ms) * 1_000_000
+    lines = ["Phone timestamp;sensor timestamp [ns];channel 0;channel 1;channel 2;ambient"]
+    lines += [f"2024-03-13T04:05:34.771;{c};-{i};-{i + 1};-{i + 2};-1" for i, c in enumerate(clock)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+def test_polar_window_pushdown(tmp_path):
+    path = polar_file(tmp_path / "S1_PPG.txt", MIDNIGHT, 100)
+    loader = PolarVerityLoader({})
+    loader.window_chunk_size = 10
+    window = TimeWindow(start_ms=MIDNIGHT + 20_000, end_ms=MIDNIGHT + 35_000)
+
+    chunks = []
+    window_chunks = loader._window_chunks
+    loader._window_chunks = lambda reader, w: window_chunks((chunks.append(c) or c for c in reader), w)
+    data = loader.load_sensor_data('ppg', [path], window=window)
+
+    assert data['channel 0'].tolist() == [-i for i in range(20, 35)]
+    # Reading stops after the chunk that passes the window end
+    assert len(chunks) == 4
+
+def test_polar_column_selection(tmp_path):
+    path = polar_file(tmp_path / "S1_PPG.txt", MIDNIGHT, 5)
+    loader = PolarVerityLoader({})
+    raw = loader.load_sensor_data('ppg', [path], columns=["ppg_ch1"])
+    assert list(raw.columns) == ["Phone timestamp", "sensor timestamp [ns]", "channel 1"]
+    channel = raw["channel 1"].tolist()
+
+    data = loader.standardise('ppg', raw)
+    assert data['ppg'].tolist() == channel
+
+@pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+def test_corsano_window(tmp_path, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    header = "timestamp,date,metric_id,chunk_index,quality,body_pose,led_pd_pos,offset,exp,led,gain,value"
+    rows = [f"{MIDNIGHT + i * HOUR},x,0x7e,11,4,1,6,0,0,52,2,{i}" for i in range(24)]
+    path = tmp_path / "corsano.csv"
+    path.write_text("\n".join([header] + rows) + "\n")
+
+    loader = Corsano2872bLoader({}, engine=engine)
+    data = loader.load_sensor_data('ppg', [path], window=TimeWindow(daily=("22:00", "02:00")))
+    assert data['value'].tolist() == [0, 1, 22, 23]
+
+def test_orchestrator_predicates(tmp_path):
+    for subject in ("S1", "S2", "P1"):
+        session = tmp_path / subject / "night"
+        session.mkdir(parents=True)
+        polar_file(session / f"{subject}_PPG.txt", MIDNIGHT + 20 * HOUR, 8 * 6, step_ms=10 * 60 * 1000)
+    config = {
+        "data_source": {
+            "subjects_dir": str(tmp_path),
+            "subjects_to_load": ["S*"],
+            "multi_condition": {"conditions": ["night"]},
+            "sensor_type": ["ppg"],
+            "device": "polar-verity",
+            "time_window": {"daily": ["22:00", "01:00"]},
+            "columns": {"ppg": ["ppg_ch0"]}
+        }
+    }
+
+    study_data = LoaderOrchestrator(config).load_study_data()
+    assert list(study_data.subjects) == ["S1", "S2"]
+
+    data = study_data.get_subject("S1").get_session("night").get_sensor_data("ppg")
+    assert len(data) == 3 * 6
+    assert "ppg_ch1" not in data.columns
@@ -132,3 +132,93 @@ class TestPipelineOrchestrator:
             # PPG keys should not exist
             assert "ppg_processed" not in processed_dict
             assert "ppg_features" not in processed_dict
+
+
+def test_lru_releases_processed_sessions():
+    """ Only max_loaded_sessions sessions keep raw data after processing """
+    from src.data_model.study_data import Subject, SessionData
+    from src.data_model.sensor_store import SensorHandle
+
+    class Handle(SensorHandle):
+        def load(self):
+            return MagicMock(name="PPGDataFrame")
+
+    study_data = StudyData()
+    subject = Subject("S1")
+    for name in ("a", "b", "c"):
+        session = SessionData(name, "S1")
+        session.add_sensor_data("ppg", Handle())
+        subject.add_session(name, session)
+    study_data.add_subject(subject)
+
+    mock_pipeline = MagicMock()
+    mock_pipeline.run.return_value = ("processed", "features")
+    with patch("src.pipelines.pipeline_orchestrator.PipelineFactory.get_pipeline", return_value=mock_pipeline):
+        PipelineOrchestrator(study_data, {"data_source": {"lazy": True, "max_loaded_sessions": 1}}).run()
+
+    loaded = [subject.get_session(name).sensors.is_loaded("ppg") for name in ("a", "b", "c")]
+    assert loaded == [False, False, True]
+    assert mock_pipeline.run.call_count == 3
+
+
+def test_memory_bounded_across_sessions(tmp_path):
+    """ Raw and processed data of at most max_loaded_sessions stay in memory """
+    import numpy as np
+    import pandas as pd
+    from src.data_model.study_data import Subject, SessionData
+    from src.data_model.sensor_store import SensorHandle
+
+    class Handle(SensorHandle):
+        def load(self):
+            return pd.DataFrame({"ppg": np.arange(100.0)})
+
+    names = [f"s{i}" for i in range(6)]
+    study_data = StudyData()
+    subject = Subject("S1")
+    for name in names:
+        session = SessionData(name, "S1")
+        session.add_sensor_data("ppg", Handle())
+        subject.add_session(name, session)
+    study_data.add_subject(subject)
+
+    mock_pipeline = MagicMock()
+    mock_pipeline.run.side_effect = lambda df: (df * 2, pd.DataFrame({"beat": [1, 2]}))
+    config = {"data_source": {"lazy": True, "max_loaded_sessions": 2, "store": {"dir": str(tmp_path)}}}
+    with patch("src.pipelines.pipeline_orchestrator.PipelineFactory.get_pipeline", return_value=mock_pipeline):
+        PipelineOrchestrator(study_data, config).run()
+
+    sessions = [subject.get_session(name) for name in names]
+    in_memory = [name for name, session in zip(names, sessions)
+                 if session.sensors.is_loaded("ppg")
+                 or any(session.processed.is_loaded(key) for key in session.processed)]
+    assert in_memory == ["s4", "s5"]
+
+    # Spilled outputs load again on access
+    pd.testing.assert_frame_equal(sessions[0].processed["ppg_processed"],
+                                  pd.DataFrame({"ppg": np.arange(100.0) * 2}))
+    assert list(sessions[0].processed["ppg_features"]["beat"]) == [1, 2]
+
+
+def test_eager_run_keeps_sessions_and_writes_nothing(tmp_path, monkeypatch):
+    """ Without lazy loading or a store nothing is released or spilled """
+    import pandas as pd
+    from src.data_model.study_data import Subject, SessionData
+
+    monkeypatch.chdir(tmp_path)
+    study_data = StudyData()
+    subject = Subject("S1")
+    for name in ("a", "b", "c"):
+        session = SessionData(name, "S1")
+        session.add_sensor_data("ppg", pd.DataFrame({"ppg": [1.0, 2.0]}))
+        subject.add_session(name, session)
+    study_data.add_subject(subject)
+
+    mock_pipeline = MagicMock()
+    mock_pipeline.run.side_effect = lambda df: (df * 2, pd.DataFrame({"beat": [1]}))
+    config = {"data_source": {"lazy": False, "max_loaded_sessions": 1, "store": {"enabled": False}}}
+    with patch("src.pipelines.pipeline_orchestrator.PipelineFactory.get_pipeline", return_value=mock_pipeline):
+        PipelineOrchestrator(study_data, config).run()
+
+    assert list(tmp_path.iterdir()) == []
+    for name in ("a", "b", "c"):
+        assert isinstance(subject.get_session(name).processed.raw("ppg_processed"), pd.DataFrame)
@@ -144,7 +144,7 @@ class TestPPGPipeline:
             resample_freq=mock_config["ppg_preprocessing"]["resample_freq"],
             input_freq=50
         )
-        mock_preproc_instance.filter_cheby2.assert_called_once_with(
+        mock_preproc_instance.filter_sections.assert_called_once_with(
             "resampled_sections", mock_config["ppg_preprocessing"]["resample_freq"]
         )
 
@@ -168,5 +168,48 @@ class TestPPGPipeline:
         mock_sqi_instance.compute.assert_called_once_with("data_with_bpm")
 
         # Verify PulseWaveFeatures usage
-        mock_pwf_cls.assert_called_once_with("data_with_bpm")
+        mock_pwf_cls.assert_called_once_with("data_with_bpm", spline_order=4)
         mock_pwf_instance.compute.assert_called_once()
+
+@patch("src.pipelines.ppg_pipeline.CheckpointManager", autospec=True)
+def test_preprocess_streamed_sections_match_whole_frame(mock_checkpoint_mgr_cls):
+    """Streamed sections are resampled and filtered as they close, same result as the whole frame"""
+    import numpy as np
+    from src.preprocessors.ppg_preprocess import PPGPreProcessor
+
+    n = 3000
+    ppg = -10 + np.sin(np.arange(n) / 5.0)
+    ppg[1000:1050] = 10
+    data = pd.DataFrame({'timestamp_ms': np.arange(n) * 10.0, 'ppg': ppg})
+    config = {
+        "data_source": {"device": "polar-verity", "sensor": ["ppg"], "stream_chunk_size": 500},
+        "ppg_preprocessing": {"threshold": 0, "min_duration": 1, "resample_freq": 50},
+        "filter": {"sample_rate": 50, "lowcut": 0.5, "highcut": 9.0, "order": 4},
+        "checkpoint": {"pipeline_ppg": {"save": False}},
+    }
+    pipeline = PPGPipeline(config)
+    expected = pipeline._preprocess(data.copy())
+
+    read = []
+    def chunks():
+        for i in range(0, n, 500):
+            read.append(i)
+            yield data.iloc[i:i + 500]
+
+    class Stream:
+        def __iter__(self):
+            return chunks()
+
+    resample = PPGPreProcessor.resample
+    reads_at_resample = []
+    def tracking_resample(self, *args, **kwargs):
+        reads_at_resample.append(read[-1])
+        return resample(self, *args, **kwargs)
+
+    with patch.object(PPGPreProcessor, "resample", tracking_resample):
+        sections = pipeline._preprocess(Stream())
+
+    assert reads_at_resample[0] < read[-1], "First section was not processed before the input was read"
+    assert len(sections) == len(expected) == 2
+    for section, expected_section in zip(sections, expected):
+        pd.testing.assert_frame_equal(section, expected_section)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessors.compliance_engine import ComplianceEngine
+from src.preprocessors.compliance_check_corsano_2872b import ComplianceCheckCorsano2872b
+from src.preprocessors.compliance_check_polar_verity import ComplianceCheckPolarVerity
+
+def reference_sections(data, mask, min_duration, max_length):
+    """ groupby sectioning the engine replaced """
+    section_id = (pd.Series(mask) != pd.Series(mask).shift()).cumsum()
+    sections = [df for _, df in data[mask].groupby(section_id[mask].to_numpy())]
+    spans = []
+    for section in sections:
+        if section['timestamp_ms'].iloc[-1] - section['timestamp_ms'].iloc[0] >= min_duration:
+            for i in range(0, len(section), max_length):
+                start = section.index[i]
+                spans.append((start, start + len(section.iloc[i:i + max_length])))
+    return spans
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_spans_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = 20000
+    ppg = np.where(rng.random(n) < 0.003, 1.0, -1.0)
+    ppg[:50] = -1.0     # run at the start
+    ppg[-50:] = -1.0    # and at the end
+    data = pd.DataFrame({'timestamp_ms': np.arange(n) * 18.0, 'ppg': ppg})
+    engine = ComplianceEngine(lambda values: values < 0, min_duration_ms=2000, max_length=300)
+
+    spans = engine.spans(data['ppg'].to_numpy(), data['timestamp_ms'].to_numpy())
+    assert [tuple(span) for span in spans] == reference_sections(data, ppg < 0, 2000, 300)
+
+def test_no_compliant_rows():
+    engine = ComplianceEngine(lambda values: values < 0, min_duration_ms=0)
+    assert engine.spans(np.ones(10), np.arange(10)).shape == (0, 2)
+
+def test_sections_leave_data_unchanged():
+    data = pd.DataFrame({'timestamp_ms': np.arange(10) * 1000.0,
+                         'ppg': [5, 5, 5, 0, 0, 5, 5, 5, 5, 0]})
+    config = {'ppg_preprocessing': {'threshold': 1, 'min_duration': 2}}
+
+    check = ComplianceCheckCorsano2872b()
+    sections = check.create_compliance_sections(data, config)
+
+    assert list(data.columns) == ['timestamp_ms', 'ppg']
+    assert [section.index.tolist() for section in sections] == [[0, 1, 2], [5, 6, 7, 8]]
+    assert [section['section_id'].iloc[0] for section in sections] == [1, 2]
+    assert check.compliance_spans(data, config).tolist() == [[0, 3], [5, 9]]
+
+def test_device_predicates():
+    config = {'ppg_preprocessing': {'threshold': 1, 'min_duration': 0}}
+    ppg = np.array([-2.0, 0.0, 2.0])
+
+    assert ComplianceCheckPolarVerity().is_compliant(ppg, config).tolist() == [True, False, False]
+    assert ComplianceCheckCorsano2872b().is_compliant(ppg, config).tolist() == [False, False, True]
+
+def test_device_rule_is_required():
+    from src.preprocessors.base_compliance_check import BaseComplianceCheck
+
+    class NoRule(BaseComplianceCheck):
+        pass
+
+    with pytest.raises(TypeError):
+        NoRule()
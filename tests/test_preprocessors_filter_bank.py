@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from src.preprocessors.filter_bank import FilterBank, design_filter
+
+def test_designs_are_cached_and_read_only():
+    first = design_filter("cheby2", 4, (0.5, 8.0), 40.0)
+    assert design_filter("cheby2", 4, (0.5, 8.0), 40.0) is first
+    with pytest.raises(ValueError):
+        first.sos[0, 0] = 1.0
+
+def test_unknown_type():
+    with pytest.raises(ValueError):
+        FilterBank(0.5, 8.0, 40.0, kind="bessel")
+
+@pytest.mark.parametrize("kind, order", [("butter", 4), ("cheby1", 4), ("cheby2", 4), ("fir", 400)])
+def test_band_pass(kind, order):
+    # Low pass band ripple for cheby1, it is applied twice
+    fs = 100.0
+    t = np.arange(4000) / fs
+    in_band = np.sin(2 * np.pi * 2.0 * t)
+    signal = in_band + np.sin(2 * np.pi * 30.0 * t) + 5.0
+
+    (filtered,) = FilterBank(0.5, 8.0, fs, kind=kind, order=order, ripple_db=0.1).filtfilt([signal])
+
+    # Drift and the 30 Hz tone are removed, the 2 Hz tone kept in phase
+    np.testing.assert_allclose(filtered[500:-500], in_band[500:-500], atol=0.1)
+
+def test_batches_match_single_calls():
+    rng = np.random.default_rng(0)
+    signals = [rng.normal(size=n) for n in (300, 500, 300, 300)]
+    bank = FilterBank(0.5, 8.0, 40.0)
+
+    batched = bank.filtfilt(signals)
+    for signal, result in zip(signals, batched):
+        np.testing.assert_allclose(result, bank.filtfilt([signal])[0], rtol=1e-12, atol=1e-12)
+
+def test_high_order_narrow_band_stays_stable():
+    rng = np.random.default_rng(0)
+    (filtered,) = FilterBank(0.5, 0.8, 100.0, kind="butter", order=10).filtfilt([rng.normal(size=5000)])
+    assert np.isfinite(filtered).all() and np.abs(filtered).max() < 10
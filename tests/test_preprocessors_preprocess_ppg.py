@@ -184,3 +184,74 @@ def test_filter_cheby2_basic(single_section_df):
         assert out_sec['filtered_value'].dtype.kind in ('f', 'd')
 
 
+
+def test_create_compliance_sections_streamed(sample_polar_config):
+    """Chunked data gives the same sections as the whole frame"""
+    from src.preprocessors.compliance_check_polar_verity import ComplianceCheckPolarVerity
+
+    rng = np.random.default_rng(0)
+    n = 5000
+    ppg = np.where(rng.random(n) < 0.002, 10, -10).astype(float)
+    ppg[1200:1300] = 10
+    data = pd.DataFrame({'timestamp_ms': np.arange(n) * 10.0, 'ppg': ppg})
+    config = dict(sample_polar_config, ppg_preprocessing={'threshold': 0, 'min_duration': 2})
+
+    expected = ComplianceCheckPolarVerity().create_compliance_sections(data.copy(), config)
+    chunks = [data.iloc[i:i + 700] for i in range(0, n, 700)]
+    preprocessor = PPGPreProcessor(iter(chunks), config)
+    sections = preprocessor.create_compliance_sections()
+
+    assert len(sections) == len(expected)
+    for section, expected_section in zip(sections, expected):
+        pd.testing.assert_frame_equal(section, expected_section)
+
+def test_compliance_sections_streamed_max_length(sample_polar_config):
+    """Long runs are split into max_length sections across chunks"""
+    from src.preprocessors.compliance_check_polar_verity import ComplianceCheckPolarVerity
+
+    n = 130000
+    data = pd.DataFrame({'timestamp_ms': np.arange(n) * 10.0, 'ppg': -np.ones(n)})
+    expected = ComplianceCheckPolarVerity().create_compliance_sections(data.copy(), sample_polar_config)
+    chunks = (data.iloc[i:i + 25000] for i in range(0, n, 25000))
+    sections = list(ComplianceCheckPolarVerity().iter_compliance_sections(chunks, sample_polar_config))
+
+    assert [len(s) for s in sections] == [len(s) for s in expected] == [60000, 60000, 10000]
+    for section, expected_section in zip(sections, expected):
+        pd.testing.assert_frame_equal(section, expected_section)
+
+def test_iter_compliance_sections_is_lazy(sample_polar_config):
+    """Sections are yielded before later chunks are read"""
+    n = 1000
+    ppg = -np.ones(n)
+    ppg[400:420] = 10
+    data = pd.DataFrame({'timestamp_ms': np.arange(n) * 10.0, 'ppg': ppg})
+    config = dict(sample_polar_config, ppg_preprocessing={'threshold': 0, 'min_duration': 1})
+
+    read = []
+    def chunks():
+        for i in range(0, n, 100):
+            read.append(i)
+            yield data.iloc[i:i + 100]
+
+    sections = PPGPreProcessor(chunks(), config).iter_compliance_sections()
+    first = next(sections)
+    assert len(first) == 400
+    assert read[-1] == 400
+    assert len(list(sections)) == 1
+
+def test_filter_sections_matches_transfer_function_filtfilt(sample_polar_config):
+    """SOS filtering gives the transfer function result, sections are updated in place"""
+    from scipy.signal import cheby2, filtfilt
+
+    rng = np.random.default_rng(1)
+    sections = [pd.DataFrame({'timestamp_ms': np.arange(n) * 25.0, 'ppg': rng.normal(size=n)})
+                for n in (400, 400, 250)]
+    preprocessor = PPGPreProcessor(sections[0], sample_polar_config)
+
+    filtered = preprocessor.filter_sections(sections, 40)
+
+    assert all(out is section for out, section in zip(filtered, sections))
+    conf = sample_polar_config['filter']
+    b, a = cheby2(conf['order'], 20, [conf['lowcut'] / 20, conf['highcut'] / 20], btype='band')
+    for section in sections:
+        np.testing.assert_allclose(section['filtered_value'], filtfilt(b, a, section['ppg']), atol=1e-8)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessors.resampler import SectionResampler
+
+def section(n, period_ms, start_ms=0.0, f_hz=1.0):
+    times = start_ms + np.arange(n) * period_ms
+    return pd.DataFrame({'timestamp_ms': times, 'ppg': np.sin(2 * np.pi * f_hz * times / 1000)})
+
+def test_exact_grid_at_55_hz():
+    data = section(1000, 7.4, start_ms=12.5)
+    out = SectionResampler(55).resample_sections([data])[0]
+
+    span = data['timestamp_ms'].iloc[-1] - data['timestamp_ms'].iloc[0]
+    assert len(out) == int(np.ceil(span / (1000 / 55)))
+    np.testing.assert_allclose(np.diff(out['timestamp_ms']), 1000 / 55)
+    assert out['timestamp_ms'].iloc[-1] == pytest.approx(12.5 + (len(out) - 1) * 1000 / 55)
+
+def test_linear_matches_interp_per_section():
+    sections = [section(200, 10.0), section(50, 10.0, start_ms=5000.0), section(1, 10.0)]
+    out = SectionResampler(40).resample_sections(sections)
+
+    assert [len(s) for s in out] == [80, 20, 0]
+    for resampled, original in zip(out, sections):
+        expected = np.interp(resampled['timestamp_ms'], original['timestamp_ms'], original['ppg'])
+        np.testing.assert_array_equal(resampled['ppg'], expected)
+
+def test_sections_share_one_buffer():
+    out = SectionResampler(40).resample_sections([section(200, 10.0), section(200, 10.0)])
+    assert out[0]['ppg'].to_numpy().base is out[1]['ppg'].to_numpy().base
+
+def test_array_api_offsets():
+    times = np.concatenate([np.arange(10) * 100.0, 5000 + np.arange(5) * 100.0])
+    values = np.arange(15, dtype=float)
+    out, offsets = SectionResampler(5).resample(times, values, [0, 10, 15])
+
+    assert offsets.tolist() == [0, 5, 7]
+    assert out.shape == (2, 7)
+    assert out[0, 5:].tolist() == [5000.0, 5200.0]
+
+@pytest.mark.parametrize("method, atol", [("cubic", 1e-3), ("poly", 5e-3)])
+def test_smooth_methods(method, atol):
+    data = section(1000, 10.0, f_hz=2.0)
+    out = SectionResampler(40, method=method, input_freq=100).resample_sections([data])[0]
+    expected = np.sin(2 * np.pi * 2.0 * out['timestamp_ms'] / 1000)
+
+    # Away from the edges where polyphase filtering rings
+    np.testing.assert_allclose(out['ppg'][20:-20], expected[20:-20], atol=atol)
+
+def test_cubic_beats_linear():
+    data = section(100, 50.0, f_hz=2.0)
+    errors = {}
+    for method in ("linear", "cubic"):
+        out = SectionResampler(100, method=method).resample_sections([data])[0]
+        errors[method] = np.abs(out['ppg'] - np.sin(2 * np.pi * 2.0 * out['timestamp_ms'] / 1000)).max()
+
+    assert errors["cubic"] < errors["linear"] / 10
+
+def test_unordered_timestamps():
+    data = pd.DataFrame({'timestamp_ms': [0.0, 20.0, 10.0, 30.0, 30.0, 40.0],
+                         'ppg': [0.0, 2.0, 1.0, 3.0, 3.0, 4.0]})
+    out = SectionResampler(100).resample_sections([data])[0]
+    assert out['ppg'].tolist() == [0.0, 1.0, 2.0, 3.0]
+
+def test_invalid_method():
+    with pytest.raises(ValueError):
+        SectionResampler(40, method="nearest")
+    with pytest.raises(ValueError):
+        SectionResampler(40, method="poly")
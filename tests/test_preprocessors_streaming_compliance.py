@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessors.compliance_engine import ComplianceEngine
+from src.preprocessors.streaming_compliance import StreamingComplianceDetector
+from src.preprocessors.compliance_check_polar_verity import ComplianceCheckPolarVerity
+
+def worn(values):
+    return values < 0
+
+def frame(ppg, period_ms=1000.0):
+    ppg = np.asarray(ppg, dtype=float)
+    return pd.DataFrame({'timestamp_ms': np.arange(len(ppg)) * period_ms, 'ppg': ppg})
+
+def run_chunks(detector, data, chunk_size):
+    sections = []
+    for i in range(0, len(data), chunk_size):
+        sections += detector.feed(data.iloc[i:i + chunk_size])
+    return sections + detector.flush()
+
+def indices(sections):
+    return [section.index.tolist() for section in sections]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 250, 5000])
+def test_matches_engine_without_hysteresis(chunk_size):
+    rng = np.random.default_rng(3)
+    data = frame(np.where(rng.random(5000) < 0.01, 1.0, -1.0), period_ms=18.0)
+    engine = ComplianceEngine(worn, min_duration_ms=500, max_length=120)
+    detector = StreamingComplianceDetector(worn, min_duration_ms=500, max_length=120)
+
+    expected = engine.sections(data)
+    sections = run_chunks(detector, data, chunk_size)
+
+    assert len(sections) == len(expected)
+    for section, expected_section in zip(sections, expected):
+        pd.testing.assert_frame_equal(section, expected_section)
+
+def test_exit_hysteresis_keeps_short_dropout():
+    data = frame([-1] * 10 + [1] + [-1] * 10 + [1] * 5)
+    detector = StreamingComplianceDetector(worn, min_duration_ms=0, exit_ms=2000)
+
+    # The single sample dropout stays in the section, the trailing one ends it
+    assert indices(run_chunks(detector, data, 4)) == [list(range(21))]
+
+def test_enter_hysteresis_ignores_short_runs():
+    data = frame([1] * 5 + [-1] * 2 + [1] * 5 + [-1] * 6 + [1] * 2)
+    detector = StreamingComplianceDetector(worn, min_duration_ms=0, enter_ms=3000)
+
+    assert indices(run_chunks(detector, data, 3)) == [list(range(12, 18))]
+
+@pytest.mark.parametrize("merge_gap_ms, expected", [
+    (5000, [list(range(0, 16))]),
+    (4000, [list(range(0, 5)), list(range(8, 16))]),
+])
+def test_merge_gap(merge_gap_ms, expected):
+    data = frame([-1] * 5 + [1] * 3 + [-1] * 8 + [1] * 10)
+    detector = StreamingComplianceDetector(worn, min_duration_ms=0, merge_gap_ms=merge_gap_ms)
+
+    assert indices(run_chunks(detector, data, 5)) == expected
+
+def test_min_duration_applies_to_merged_section():
+    data = frame([-1] * 3 + [1] + [-1] * 3 + [1] * 10)
+    detector = StreamingComplianceDetector(worn, min_duration_ms=5000, merge_gap_ms=3000)
+
+    assert indices(run_chunks(detector, data, 100)) == [list(range(0, 7))]
+
+def test_sections_emitted_as_they_close():
+    detector = StreamingComplianceDetector(worn, min_duration_ms=0, exit_ms=1000)
+    data = frame([-1] * 5 + [1] * 3 + [-1] * 4)
+
+    assert detector.feed(data.iloc[:6]) == []
+    closed = detector.feed(data.iloc[6:8])
+    assert indices(closed) == [list(range(5))]
+    assert indices(detector.feed(data.iloc[8:]) + detector.flush()) == [list(range(8, 12))]
+    assert [s['section_id'].iloc[0] for s in closed] == [1]
+
+def test_device_check_uses_configured_hysteresis():
+    data = frame([-1] * 10 + [1] + [-1] * 10)
+    config = {'ppg_preprocessing': {'threshold': 0, 'min_duration': 0, 'exit_duration': 2}}
+
+    check = ComplianceCheckPolarVerity()
+    assert indices(check.create_compliance_sections(data, config)) == [list(range(21))]
+    assert indices(check.iter_compliance_sections(iter([data.iloc[:5], data.iloc[5:]]), config)) == [list(range(21))]
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi
+
+from src.preprocessors.filter_bank import FilterBank
+from src.preprocessors.streaming_filter import StreamingFilter
+from src.preprocessors.ppg_preprocess import PPGPreProcessor
+
+FS = 40.0
+
+@pytest.fixture
+def signal():
+    return np.random.default_rng(0).normal(size=2000)
+
+def chunked(stream, values, size):
+    return np.concatenate([stream.process(values[i:i + size]) for i in range(0, len(values), size)])
+
+def test_chunks_match_whole_signal(signal):
+    bank = FilterBank(0.5, 8.0, FS)
+    sos = np.array(bank.design.sos)
+    expected, _ = sosfilt(sos, signal, zi=sosfilt_zi(sos) * signal[0])
+
+    for size in (1, 37, 2000):
+        np.testing.assert_allclose(chunked(StreamingFilter(bank), signal, size), expected, atol=1e-12)
+
+def test_fir_delay_compensation(signal):
+    bank = FilterBank(0.5, 8.0, FS, kind="fir", order=100)
+    stream = StreamingFilter(bank, compensate_delay=True)
+    times = np.arange(len(signal)) * 1000 / FS
+
+    out_times, filtered = stream.process(signal, times)
+
+    assert stream.delay_ms == pytest.approx(50 * 1000 / FS)
+    # Linear phase, the shifted causal output is the centred convolution
+    centred = np.convolve(signal, bank.design.taps, mode="same")
+    np.testing.assert_allclose(filtered[500:-500], np.interp(times[500:-500] - stream.delay_ms, times, centred), atol=1e-12)
+    np.testing.assert_allclose(out_times, times - stream.delay_ms)
+
+def test_state_round_trip(signal, tmp_path):
+    bank = FilterBank(0.5, 8.0, FS)
+    expected = StreamingFilter(bank).process(signal)
+
+    first = StreamingFilter(bank)
+    head = first.process(signal[:700])
+    first.save_state(tmp_path / "state")
+
+    second = StreamingFilter(bank)
+    second.load_state(tmp_path / "state")
+    np.testing.assert_allclose(np.concatenate([head, second.process(signal[700:])]), expected, atol=1e-12)
+
+    other = StreamingFilter(FilterBank(0.5, 8.0, FS, kind="butter"))
+    with pytest.raises(ValueError):
+        other.load_state(tmp_path / "state")
+
+def test_preprocessor_stream_filter_resumes(signal, tmp_path):
+    config = {
+        'data_source': {'device': 'polar-verity'},
+        'filter': {'lowcut': 0.5, 'highcut': 8.0, 'order': 4}
+    }
+    data = pd.DataFrame({'timestamp_ms': np.arange(len(signal)) * 25.0, 'ppg': signal})
+    preprocessor = PPGPreProcessor(data, config)
+    state_path = tmp_path / "filter_state.npz"
+
+    runs = []
+    for part in (data.iloc[:1000], data.iloc[1000:]):
+        chunks = (part.iloc[i:i + 250] for i in range(0, len(part), 250))
+        runs += list(preprocessor.stream_filter(chunks, FS, state_path=str(state_path)))
+
+    whole = StreamingFilter(FilterBank(0.5, 8.0, FS)).process(signal)
+    out = pd.concat(runs, ignore_index=True)
+    np.testing.assert_allclose(out['filtered_value'], whole, atol=1e-12)
+    np.testing.assert_array_equal(out['timestamp_ms'], data['timestamp_ms'])
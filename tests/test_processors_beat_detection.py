@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.processors.beat_detectors.chunk_scheduler import ChunkScheduler
+from src.processors.beat_detectors.beat_detection import HeartBeatDetector
+from src.data_model.beat_index import BeatIndex
+
+
+@pytest.fixture
+def periodic_signal():
+    """ 60s of a ~72 bpm pulse-like signal at 40 Hz """
+    rng = np.random.default_rng(3)
+    t = np.arange(0, 60, 1 / 40)
+    return np.sin(2 * np.pi * 1.2 * t) + 0.3 * np.sin(4 * np.pi * 1.2 * t) + 0.02 * rng.normal(size=len(t))
+
+
+@pytest.fixture
+def config():
+    return {
+        "outputs": {"print_verbosity": 0},
+        "ppg_preprocessing": {"resample_freq": 40},
+        "ppg_processing": {
+            "beat_detector": "msptd",
+            "chunk_size": 500,
+            "chunk_overlap": 80,
+            "n_workers": 1,
+        },
+    }
+
+
+def test_plan_cores_tile_signal():
+    scheduler = ChunkScheduler("ampd", chunk_size=100, overlap=20)
+    chunks = scheduler.plan(250)
+
+    assert [c[:2] for c in chunks] == [(0, 100), (100, 200), (200, 250)]
+    assert [c[2:] for c in chunks] == [(0, 120), (80, 220), (180, 250)]
+
+
+def test_overlap_keeps_boundary_peaks(periodic_signal):
+    """ Overlapping chunks find the same peaks as one big chunk """
+    whole = ChunkScheduler("msptd", chunk_size=len(periodic_signal),
+                           detect_kwargs={"sample_rate": 40}).run(periodic_signal)
+    chunked = ChunkScheduler("msptd", chunk_size=500, overlap=80, seam_tolerance=10,
+                             detect_kwargs={"sample_rate": 40}).run(periodic_signal)
+
+    assert np.array_equal(whole, chunked)
+    assert np.all(np.diff(chunked) > 0), "Peaks should be unique and sorted"
+
+
+def test_seam_duplicates_removed():
+    scheduler = ChunkScheduler("ampd", chunk_size=10, seam_tolerance=2)
+    signal = np.zeros(20)
+    signal[9], signal[10] = 1.0, 2.0
+    chunks = scheduler.plan(len(signal))
+
+    peaks = scheduler._stitch(signal, chunks, [np.array([2, 9]), np.array([10, 15])])
+    assert peaks.tolist() == [2, 10, 15]
+
+
+def test_parallel_matches_sequential(periodic_signal):
+    kwargs = dict(chunk_size=400, overlap=80, seam_tolerance=10, detect_kwargs={"sample_rate": 40})
+    sequential = ChunkScheduler("msptd", n_workers=1, **kwargs).run(periodic_signal)
+    with ChunkScheduler("msptd", n_workers=2, **kwargs) as scheduler:
+        parallel = scheduler.run(periodic_signal)
+
+    assert np.array_equal(sequential, parallel)
+
+
+def test_process_sections_annotates(periodic_signal, config):
+    section = pd.DataFrame({
+        "timestamp_ms": np.arange(len(periodic_signal)) * 25.0,
+        "filtered_value": periodic_signal,
+    })
+    detector = HeartBeatDetector(config)
+    combined, beats = detector.process_sections([section, section.copy()])
+
+    assert len(combined) == 2 * len(section)
+    n_troughs = combined.groupby("section_id")["is_beat_trough"].sum()
+    assert n_troughs.tolist() == [71, 71]
+    # One peak per beat, beats lie between consecutive troughs
+    assert combined["is_beat_peak"].sum() == 2 * 70
+    assert len(beats) == 2 * 70
+
+
+def reference_annotate(section, troughs, section_id):
+    """ Original per-beat .loc loop annotation, for comparison """
+    section['section_id'] = section_id
+    section['beat'] = -1
+    section['is_beat_peak'] = False
+    section['is_beat_trough'] = False
+    section.loc[section.loc[troughs].index, 'is_beat_trough'] = True
+    for beat_id, (start, end) in enumerate(zip(troughs[:-1], troughs[1:])):
+        section.loc[start:end, 'beat'] = beat_id
+        peak_idx = section.iloc[start:end]['filtered_value'].idxmax()
+        section.loc[peak_idx, 'is_beat_peak'] = True
+    return section
+
+
+def test_annotate_matches_reference_loop(periodic_signal, config):
+    section = pd.DataFrame({
+        "timestamp_ms": np.arange(len(periodic_signal)) * 25.0,
+        "filtered_value": periodic_signal,
+    })
+    troughs = [5, 40, 41, 90, 300, 301, 302, 1000, 2300]
+    detector = HeartBeatDetector(config)
+
+    expected = reference_annotate(section.copy(), troughs, 3)
+    result = detector._annotate_heart_beats(section.copy(), troughs, 3)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    # Offset slices give the same beats as masking by beat id
+    starts, stops = detector._beat_offsets(troughs)
+    for beat_id, (start, stop) in enumerate(zip(starts, stops)):
+        pd.testing.assert_frame_equal(result.iloc[start:stop], result[result['beat'] == beat_id])
+
+
+def test_annotate_too_few_troughs(periodic_signal, config):
+    section = pd.DataFrame({"filtered_value": periodic_signal[:50]})
+    result = HeartBeatDetector(config)._annotate_heart_beats(section, [10], 0)
+
+    assert (result['beat'] == -1).all()
+    assert result['is_beat_trough'].sum() == 1
+    assert not result['is_beat_peak'].any()
+
+
+def test_process_sections_beat_index(periodic_signal, config):
+    section = pd.DataFrame({"filtered_value": periodic_signal})
+    combined, beats = HeartBeatDetector(config).process_sections([section, section.copy()])
+
+    # Offsets agree with the annotated columns of the combined sections
+    expected = BeatIndex.from_annotated(combined)
+    assert np.array_equal(beats.starts, expected.starts)
+    assert np.array_equal(beats.stops, expected.stops)
+    assert np.array_equal(beats.section_ids, expected.section_ids)
+
+
+def test_chunk_overlap_defaults_to_config_value(config):
+    del config["ppg_processing"]["chunk_overlap"]
+    assert HeartBeatDetector(config).chunk_overlap == 400
+
+    config["ppg_processing"]["chunk_overlap"] = 0
+    with pytest.raises(ValueError):
+        HeartBeatDetector(config)
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 from src.processors.periodic_peak_detectors.ampd import AMPDDetector
 
 """
@@ -72,3 +73,47 @@ def test_linear_signal():
     results = detector.detect(signal)
     assert len(results["peaks"]) == 0, "Peaks detected in a linear non-periodic signal"
 """
+
+def test_streaming_matches_dense_peaks():
+    # Synthetic periodic signal with noise, fixed seed
+    rng = np.random.default_rng(42)
+    t = np.linspace(0, 15, 1500)
+    signal = 5 + np.sin(np.pi * t) + np.sin(2 * np.pi * t) + 0.2 * t + 0.1 * rng.normal(size=len(t))
+
+    dense = AMPDDetector(implementation="dense").detect(signal)
+    streaming = AMPDDetector(implementation="streaming").detect(signal)
+
+    assert len(streaming["peaks"]) > 0, "No peaks detected"
+    assert np.array_equal(dense["peaks"], streaming["peaks"]), "Streaming peaks differ from dense"
+
+@pytest.mark.parametrize("signal", [
+    np.ones(100),
+    np.array([1.0, 2.0]),
+    np.array([1.0, 2.0, 1.0]),
+    np.array([3.0, 1.0, 2.0]),
+    np.array([1.0, 2.0, 3.0, 1.0]),
+])
+def test_streaming_matches_dense_on_flat_and_short_signals(signal):
+    np.random.seed(0) # dense LMS is random valued off the maxima
+    dense = AMPDDetector(implementation="dense").detect(signal)
+    streaming = AMPDDetector(implementation="streaming").detect(signal)
+
+    assert np.array_equal(dense["peaks"], streaming["peaks"]), "Streaming peaks differ from dense"
+
+def test_streaming_packed_lms_shape():
+    detector = AMPDDetector()
+    signal = np.sin(2 * np.pi * np.linspace(0, 5, 403))
+    results = detector.detect(signal)
+
+    lms, gamma, lambda_scale = results["lms"], results["gamma"], results["lambda_scale"]
+    assert lms.dtype == np.uint8
+    assert lms.shape == (lambda_scale + 1, (len(signal) + 7) // 8), "Packed LMS shape is incorrect"
+    assert len(gamma) == int(np.ceil(len(signal) / 2.0)) - 1, "Gamma should have one entry per scale"
+
+    # Every detected peak is a maxima at every retained scale
+    unpacked = np.unpackbits(lms, axis=1, count=len(signal)).astype(bool)
+    assert np.all(unpacked[:, results["peaks"]])
+
+def test_unknown_implementation():
+    with pytest.raises(ValueError):
+        AMPDDetector(implementation="sparse")
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.processors.periodic_peak_detectors.msptd import MSPTDDetector
+from src.processors.periodic_peak_detectors.factory import PeakDetectorFactory
+
+
+def reference_msptd(data, max_interval=None):
+    """ Pure python double loop version of MSPTD, for comparison """
+    data = np.asarray(data, dtype=float)
+    N = len(data)
+    L = int(np.ceil(N / 2)) - 1
+    if max_interval is not None:
+        L = min(L, int(np.ceil(max_interval / 2)) - 1)
+    data = data - np.mean(data)
+    Mx = np.zeros((N, L), dtype=bool)
+    Mn = np.zeros((N, L), dtype=bool)
+    for scale in range(L):
+        k = scale + 1
+        for i in range(k + 1, N - k + 1):
+            if data[i-1] > data[i - k - 1] and data[i-1] > data[i + k - 1]:
+                Mx[i - 1, scale] = True
+            if data[i-1] < data[i - k - 1] and data[i-1] < data[i + k - 1]:
+                Mn[i - 1, scale] = True
+    Mx = Mx[:, :np.argmax(np.sum(Mx, axis=0)) + 1]
+    Mn = Mn[:, :np.argmax(np.sum(Mn, axis=0)) + 1]
+    peaks = np.where(np.sum(~Mx, axis=1) == 0)[0]
+    troughs = np.where(np.sum(~Mn, axis=1) == 0)[0]
+    return peaks, troughs
+
+
+@pytest.fixture
+def noisy_ppg_like():
+    rng = np.random.default_rng(7)
+    t = np.arange(0, 10, 1 / 40)  # 10s at 40 Hz, ~72 bpm
+    return np.sin(2 * np.pi * 1.2 * t) + 0.3 * np.sin(4 * np.pi * 1.2 * t) + 0.05 * rng.normal(size=len(t))
+
+
+def test_matches_reference_loop(noisy_ppg_like):
+    detector = MSPTDDetector()
+    results = detector.detect(noisy_ppg_like)
+    ref_peaks, ref_troughs = reference_msptd(noisy_ppg_like)
+
+    assert np.array_equal(results["peaks"], ref_peaks)
+    assert np.array_equal(results["troughs"], ref_troughs)
+
+
+def test_sample_rate_caps_scales(noisy_ppg_like):
+    detector = MSPTDDetector(min_bpm=30)
+    results = detector.detect(noisy_ppg_like, sample_rate=40)
+
+    # 30 bpm at 40 Hz -> 80 sample max interval -> 39 scales
+    assert results["maximagram"].shape == (39, (len(noisy_ppg_like) + 7) // 8)
+    assert results["minimagram"].dtype == np.uint8
+
+    ref_peaks, ref_troughs = reference_msptd(noisy_ppg_like, max_interval=80)
+    assert np.array_equal(results["peaks"], ref_peaks)
+    assert np.array_equal(results["troughs"], ref_troughs)
+    # Roughly one peak per beat, 12 beats in 10s
+    assert 10 <= len(results["peaks"]) <= 14
+
+
+def test_dataframe_input(noisy_ppg_like):
+    detector = MSPTDDetector()
+    df = pd.DataFrame({"filtered_value": noisy_ppg_like})
+    peaks, troughs, _, _ = detector._beat_detect_msptd(df, column="filtered_value")
+    assert np.array_equal(peaks, detector.detect(noisy_ppg_like)["peaks"])
+
+
+def test_small_signal():
+    detector = MSPTDDetector()
+    results = detector.detect(np.array([1.0, 2.0]))
+    assert len(results["peaks"]) == 0
+    assert len(results["troughs"]) == 0
+
+
+def test_factory_creates_msptd():
+    detector = PeakDetectorFactory.create("msptd")
+    assert isinstance(detector, MSPTDDetector)
+    with pytest.raises(ValueError):
+        PeakDetectorFactory.create("unknown")
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from src.processors.biomarkers.beat_feature_table import BeatFeatureTable, FEATURE_SCHEMA
+
+
+def test_columns_preallocated_with_sentinels():
+    table = BeatFeatureTable([4, 7, 9])
+    frame = table.to_frame()
+
+    assert len(table) == 3
+    assert frame["global_beat_index"].tolist() == [4, 7, 9]
+    assert list(frame.columns[1:]) == list(FEATURE_SCHEMA)
+    assert (frame["d2ydx2.a_wave.idx_local"] == -1).all()
+    assert frame["d2ydx2.a_wave.time"].isna().all()
+    assert not frame["d2ydx2.a_wave.detected"].any()
+
+
+def test_set_row_flattens_nested_features():
+    table = BeatFeatureTable([0, 1])
+    table.set_row(1, {"d2ydx2": {
+        "detected": True,
+        "zero_crossings": {"sum": 2, "type": "both", "idxs": [3, 8], "times": [30.0, 80.0]},
+        "b_wave": {"detected": True, "idx_local": 6, "value": -0.4, "time": 60.0},
+        "c_wave": {"detected": False},
+    }})
+    table.set_row(1, {"dydx": {"detected": False, "ms": None, "systole": {"detected": False}}})
+    frame = table.to_frame()
+
+    assert frame["d2ydx2.b_wave.idx_local"].tolist() == [-1, 6]
+    assert frame["d2ydx2.b_wave.value"].iloc[1] == -0.4
+    assert frame["d2ydx2.zero_crossings.sum"].tolist() == [-1, 2]
+    assert frame["d2ydx2.detected"].tolist() == [False, True]
+    assert frame["dydx.ms"].iloc[1] == -1
+    assert frame["d2ydx2.b_wave.idx_local"].dtype == np.int64
+
+
+def test_to_nested_round_trip():
+    table = BeatFeatureTable([5])
+    features = {"y": {"systole": {"detected": True, "idx_local": 3, "idx_global": 103,
+                                  "time": 30.0, "time_global": 1030.0},
+                      "beat_duration": 800.0}}
+    table.set_row(0, features)
+    table.set_row(0, {"dydx": {"detected": False, "ms": None,
+                               "systole": {"detected": False}, "diastole": {"detected": False}}})
+    nested = BeatFeatureTable.to_nested(table.to_frame())
+
+    assert nested["global_beat_index"].iloc[0] == 5
+    assert nested["y"].iloc[0] == features["y"]
+    dydx = nested["dydx"].iloc[0]
+    assert dydx["detected"] is False
+    assert dydx["ms"] is None
+    assert dydx["systole"] == {"detected": False}
+    assert nested["d3ydx3"].iloc[0] == {"p0": None, "p1": None, "p2": None, "p3": None, "p4": None}
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.processors.biomarkers.bspline_smoother import BatchedBSplineSmoother
+from src.processors.biomarkers.signal_smoothing import SignalSmoothing
+
+
+@pytest.fixture
+def beats_frame():
+    """ Beats of varying length, global_beat_index groups, 25 ms samples """
+    rng = np.random.default_rng(11)
+    lengths = [30, 33, 30, 41, 12, 33]
+    groups = np.repeat(np.arange(len(lengths)), lengths)
+    n = len(groups)
+    return pd.DataFrame({
+        "timestamp_ms": np.arange(n) * 25.0,
+        "filtered_value": np.sin(np.arange(n) / 4) + 0.1 * rng.normal(size=n),
+        "global_beat_index": groups,
+    })
+
+
+def test_matches_skfda_group_apply(beats_frame):
+    pytest.importorskip("skfda")
+    expected = beats_frame.copy()
+    SignalSmoothing(expected, 'filtered_value', 'global_beat_index', 'sig_smooth') \
+        .group_apply(method="fda_bspline", n_basis=21, order=4)
+
+    result = beats_frame.copy()
+    SignalSmoothing(result, 'filtered_value', 'global_beat_index', 'sig_smooth') \
+        .batch_bspline(n_basis=21, order=4)
+
+    fitted = expected['sig_smooth'].notna()
+    assert np.allclose(result.loc[fitted, 'sig_smooth'],
+                       expected.loc[fitted, 'sig_smooth'].astype(float), atol=1e-9)
+    # Beat shorter than n_basis is not fitted by either
+    assert result.loc[~fitted, 'sig_smooth'].isna().all()
+    assert (beats_frame['global_beat_index'][~fitted] == 4).all()
+
+
+def test_irregular_index_matches_skfda(beats_frame):
+    pytest.importorskip("skfda")
+    frame = beats_frame.copy()
+    frame.index = np.arange(len(frame)) * 2  # index steps of 2, fitted per beat
+    expected = frame.copy()
+    SignalSmoothing(expected, 'filtered_value', 'global_beat_index', 'sig_smooth') \
+        .group_apply(method="fda_bspline", n_basis=21, order=4)
+    SignalSmoothing(frame, 'filtered_value', 'global_beat_index', 'sig_smooth') \
+        .batch_bspline(n_basis=21, order=4)
+
+    fitted = expected['sig_smooth'].notna()
+    assert np.allclose(frame.loc[fitted, 'sig_smooth'],
+                       expected.loc[fitted, 'sig_smooth'].astype(float), atol=1e-9)
+
+
+def test_analytic_derivatives_of_cubic():
+    # A cubic is reproduced exactly by a cubic spline, so are its derivatives
+    x = np.arange(40, dtype=float)
+    y = 0.01 * x**3 - 0.2 * x**2 + x
+    smoother = BatchedBSplineSmoother(n_basis=10, order=4, max_deriv=3)
+    out = smoother.smooth(y, [0], [40], dt=[0.5])
+
+    assert np.allclose(out[0], y)
+    assert np.allclose(out[1], (0.03 * x**2 - 0.4 * x + 1) / 0.5)
+    assert np.allclose(out[2], (0.06 * x - 0.4) / 0.5**2)
+    assert np.allclose(out[3], 0.06 / 0.5**3)
+
+
+def test_hat_matrix_cached_per_length():
+    smoother = BatchedBSplineSmoother(n_basis=8)
+    values = np.random.default_rng(0).normal(size=100)
+    smoother.smooth(values, [0, 20, 40, 70], [20, 40, 70, 100])
+
+    assert sorted(smoother._hat_cache) == [20, 30]
+
+
+def test_batch_writes_derivative_columns(beats_frame):
+    beats_frame['filtered_value'] = np.sin(np.arange(len(beats_frame)) / 8)
+    SignalSmoothing(beats_frame, 'filtered_value', 'global_beat_index', 'sig_smooth') \
+        .batch_bspline(n_basis=10, order=4, time_col='timestamp_ms',
+                       derivative_cols={1: 'sig_1deriv', 2: 'sig_2deriv'})
+
+    beat = beats_frame[beats_frame['global_beat_index'] == 0]
+    # Analytic derivative per ms of a smooth signal, d/dt sin(i / 8), i = t / 25
+    expected = np.cos(beat.index / 8) / (8 * 25)
+    assert np.allclose(beat['sig_1deriv'], expected, atol=1e-5)
+    assert beats_frame['sig_2deriv'].notna().all()
+
+
+def test_max_deriv_below_order():
+    with pytest.raises(ValueError):
+        BatchedBSplineSmoother(order=4, max_deriv=4)
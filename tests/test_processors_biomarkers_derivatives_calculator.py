@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.processors.biomarkers.derivatives_calculator import DerivativesCalculator
+
+
+@pytest.fixture
+def beats():
+    """ Three beats of sin(t), 10 ms samples, one beat rows out of order """
+    lengths = [60, 45, 80]
+    groups = np.repeat(np.arange(3), lengths)
+    t = np.arange(len(groups)) * 10.0
+    data = pd.DataFrame({
+        "timestamp_ms": t,
+        "sig_smooth": np.sin(t / 100),
+        "global_beat_index": groups,
+    })
+    return data
+
+
+def reference_derivative(data, column):
+    """ Original groupby diff/diff """
+    return data.groupby('global_beat_index').apply(
+        lambda group: group[column].diff() / group['timestamp_ms'].diff()
+    ).reset_index(level=0, drop=True)
+
+
+def _calculator(data):
+    return DerivativesCalculator(data, time_col='timestamp_ms',
+                                 signal_col='sig_smooth', group_col='global_beat_index')
+
+
+def test_diff_matches_groupby_reference(beats):
+    shuffled = beats.sample(frac=1, random_state=1)
+    calculator = _calculator(shuffled)
+    calculator.compute_third_derivative()
+
+    expected = shuffled.copy()
+    expected['sig_1deriv'] = reference_derivative(expected, 'sig_smooth')
+    expected['sig_2deriv'] = reference_derivative(expected, 'sig_1deriv')
+    expected['sig_3deriv'] = reference_derivative(expected, 'sig_2deriv')
+
+    pd.testing.assert_frame_equal(calculator.get_data(), expected, check_dtype=False)
+
+    all_orders = _calculator(shuffled.drop(columns=['sig_1deriv', 'sig_2deriv', 'sig_3deriv']))
+    all_orders.compute_all(max_order=3, mode="diff")
+    pd.testing.assert_frame_equal(all_orders.get_data(), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("mode, rel_tols", [
+    ("central", [0.05, 0.5]),  # one sided edges limit the accuracy
+    ("savgol", [1e-4, 1e-3, 1e-2, 0.1]),
+    ("exact", [1e-4, 1e-3, 1e-2, 0.1]),
+])
+def test_modes_recover_analytic_derivatives(beats, mode, rel_tols):
+    calculator = _calculator(beats)
+    calculator.compute_all(max_order=4, mode=mode)
+    data = calculator.get_data()
+    t = data['timestamp_ms'].to_numpy() / 100
+
+    # d^n/dt^n sin(t / 100) has amplitude 100^-n
+    expected = [np.cos(t), -np.sin(t), -np.cos(t), np.sin(t)]
+    for order, tol in enumerate(rel_tols, start=1):
+        error = np.abs(data[f'sig_{order}deriv'] * 100**order - expected[order - 1])
+        assert error.max() < tol, (order, error.max())
+
+    assert data['sig_4deriv'].notna().all()
+
+
+def test_savgol_short_group_is_nan():
+    data = pd.DataFrame({
+        "timestamp_ms": np.arange(5.0), "sig_smooth": np.arange(5.0),
+        "global_beat_index": [0, 0, 0, 0, 0],
+    })
+    calculator = _calculator(data)
+    calculator.compute_all(max_order=1, mode="savgol", window_length=9)
+    assert data['sig_1deriv'].isna().all()
+
+
+def test_invalid_mode(beats):
+    with pytest.raises(ValueError):
+        _calculator(beats).compute_all(mode="spline")
@@ -0,0 +1,89 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.processors.biomarkers.fiducial_detector import BatchedFiducialDetector
+from src.processors.biomarkers.beat_feature_table import BeatFeatureTable
+from src.processors.biomarkers.pulse_wave_features2 import (
+    FeatureExtractorY,
+    FeatureExtractorDydx,
+    FeatureExtractorD2ydx2,
+)
+
+
+def per_beat_features(data):
+    """ Per-beat extractors, the reference the batched detector must match """
+    groups = data.groupby('global_beat_index')
+    table = BeatFeatureTable(list(groups.groups.keys()))
+    for row, (_, beat) in enumerate(groups):
+        table.set_row(row, FeatureExtractorY().compute_features(beat))
+        features_dydx = FeatureExtractorDydx().compute_features(beat)
+        table.set_row(row, features_dydx)
+        table.set_row(row, FeatureExtractorD2ydx2().compute_features(beat, features_dydx=features_dydx))
+    return table.to_frame()
+
+
+def make_beats(seed, n_beats=300):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 70, size=n_beats)
+    lengths[:3] = [1, 2, 3]
+    frames = []
+    for beat_id, n in enumerate(lengths):
+        phase = np.linspace(0, 2 * np.pi, n)
+        d1 = np.sin(phase + rng.uniform(0, 1)) + 0.3 * rng.normal(size=n)
+        # Quantise so plateaus and ties occur
+        d2 = np.round(2 * np.sin(2 * phase) + rng.normal(size=n), 1)
+        d1[:1] = np.nan
+        d2[:2] = np.nan
+        if beat_id % 17 == 0:
+            d1[: n // 2 + 1] = np.nan  # mostly NaN, dydx not detected
+        if beat_id % 13 == 0 and n > 6:
+            d2[n // 2] = np.nan  # NaN inside the search regions
+        frames.append(pd.DataFrame({
+            "global_beat_index": beat_id,
+            "timestamp_ms": beat_id * 1000 + np.arange(n) * 25.0,
+            "filtered_value": np.round(np.sin(phase) + 0.1 * rng.normal(size=n), 1),
+            "sig_1deriv": d1,
+            "sig_2deriv": d2,
+        }))
+    data = pd.concat(frames, ignore_index=True)
+    data.index = data.index + 1000  # labels differ from positions
+    return data
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_per_beat_extractors(seed):
+    data = make_beats(seed)
+    expected = per_beat_features(data)
+    result = BatchedFiducialDetector(batch_size=64).detect(data).to_frame()
+
+    pd.testing.assert_frame_equal(result, expected)
+    # The data exercises every wave
+    for wave in "abcdef":
+        assert result[f"d2ydx2.{wave}_wave.detected"].any()
+
+
+def test_unsorted_rows_match(seed=4):
+    data = make_beats(seed, n_beats=60)
+    shuffled = data.sample(frac=1, random_state=0).sort_values('global_beat_index', kind='stable')
+    shuffled = pd.concat([shuffled[shuffled['global_beat_index'] >= 30],
+                          shuffled[shuffled['global_beat_index'] < 30]])
+    result = BatchedFiducialDetector().detect(shuffled).to_frame()
+
+    assert result['global_beat_index'].tolist() == list(range(60))
+    # Rows within a beat keep their order, so results match sorted input
+    pd.testing.assert_frame_equal(result, per_beat_features(shuffled))
+
+
+def test_find_peaks_matches_scipy():
+    from scipy.signal import find_peaks
+    rng = np.random.default_rng(5)
+    x = np.round(rng.normal(size=(200, 40)), 1)
+    x[rng.random(x.shape) < 0.05] = np.nan
+    lo = rng.integers(0, 20, size=200)
+    hi = lo + rng.integers(0, 21, size=200)
+
+    mask = BatchedFiducialDetector(prominence=0.3)._find_peaks(x, lo, hi)
+    for row in range(200):
+        peaks, _ = find_peaks(x[row, lo[row]:hi[row]], prominence=0.3)
+        assert np.flatnonzero(mask[row]).tolist() == (peaks + lo[row]).tolist()
@@ -195,6 +195,16 @@ def test_feature_extractor_d2ydx2_basic():
         assert wave in result["d2ydx2"]
 
 
+def test_feature_extractor_d2ydx2_f_wave():
+    # f wave is the first minimum after e, reported by position and value
+    sig = np.array([0.0, 1.0, 0.0, 1.0, 0.0, -1.0, 0.0, 0.5, 0.0])
+    df_beat = pd.DataFrame({"timestamp_ms": np.arange(len(sig)) * 10.0})
+    e_wave = {"detected": True, "idx_local": 3}
+    result = FeatureExtractorD2ydx2()._compute_f_wave(df_beat, sig, e_wave)
+
+    assert result == {"detected": True, "idx_local": 5, "value": -1.0, "time": 50.0}
+
+
 def test_feature_extractor_d2ydx2_no_ms():
     df_beat = pd.DataFrame({
         "timestamp_ms": [0, 1, 2, 3],
@@ -271,6 +281,77 @@ def test_pulse_wave_features_pipeline():
     for col in ["sig_smooth", "sig_1deriv", "sig_2deriv"]:
         assert col in processed_data.columns, f"{col} should be in the pipeline output"
 
+    # Flat typed feature columns, '.' joins the feature group and name
+    expected_cols = {"global_beat_index", "y.systole.idx_local", "dydx.ms",
+                     "d2ydx2.b_wave.idx_local", "d3ydx3.p0", "d4ydx4.q1"}
+    assert set(expected_cols).issubset(set(beat_features.columns)), "Missing expected feature columns"
+    assert beat_features["d2ydx2.b_wave.idx_local"].dtype == np.int64
+    assert beat_features["y.systole.detected"].dtype == bool
+    # Too short for the spline, derivative features are not detected
+    assert (beat_features["dydx.ms"] == -1).all()
+
+
+def test_pulse_wave_features_nested_layout():
+    data = pd.DataFrame({
+        "global_beat_index": [0, 0, 0, 1, 1, 1],
+        "timestamp_ms": [100, 101, 102, 200, 201, 202],
+        "filtered_value": [0.1, 0.5, 0.7, 0.2, 0.8, 0.6]
+    })
+    _, beat_features = PulseWaveFeatures(data, feature_layout="nested").compute()
+
     # Check that we have 'y', 'dydx', 'd2ydx2', 'd3ydx3', 'd4ydx4' in beat_features columns
     expected_cols = {"global_beat_index", "y", "dydx", "d2ydx2", "d3ydx3", "d4ydx4"}
     assert set(expected_cols).issubset(set(beat_features.columns)), "Missing expected feature columns"
+    assert beat_features["y"].iloc[1]["systole"]["idx_local"] == 1
+    assert beat_features["dydx"].iloc[0]["systole"] == {"detected": False}
+
+
+def _sine_beats():
+    """ Two beats of sin(t / 100), 10 ms samples """
+    lengths = [60, 80]
+    t = np.arange(sum(lengths)) * 10.0
+    return pd.DataFrame({
+        "global_beat_index": np.repeat([0, 1], lengths),
+        "timestamp_ms": t,
+        "filtered_value": np.sin(t / 100)
+    })
+
+
+@pytest.mark.parametrize("spline_order, rel_tols", [
+    (4, [1e-3, 0.05, 0.5]),           # cubic, the 3rd derivative is piecewise constant
+    (6, [1e-4, 1e-3, 1e-2, 0.1]),
+])
+def test_pulse_wave_features_derivatives_of_the_smoothing_fit(spline_order, rel_tols):
+    processed_data, _ = PulseWaveFeatures(_sine_beats(), spline_order=spline_order).compute()
+
+    # d^n/dt^n sin(t / 100) has amplitude 100^-n
+    x = processed_data["timestamp_ms"].to_numpy() / 100
+    expected = [np.cos(x), -np.sin(x), -np.cos(x), np.sin(x)]
+    for order, tol in enumerate(rel_tols, start=1):
+        error = np.abs(processed_data[f"sig_{order}deriv"] * 100**order - expected[order - 1])
+        assert error.max() < tol, (order, error.max())
+    # A cubic fit has no 4th derivative
+    assert ("sig_4deriv" in processed_data.columns) == (spline_order > 4)
+
+    # The 1st derivative is the slope of sig_smooth itself
+    beat = processed_data[processed_data["global_beat_index"] == 0]
+    slope = np.gradient(beat["sig_smooth"].to_numpy(), beat["timestamp_ms"].to_numpy())
+    np.testing.assert_allclose(slope[1:-1], beat["sig_1deriv"].to_numpy()[1:-1], atol=1e-2 / 100)
+
+
+def test_pulse_wave_features_smoothing_matches_cubic_fit():
+    """ sig_smooth is the per beat cubic fit the pipeline has always used """
+    pytest.importorskip("skfda")
+    from src.processors.biomarkers.signal_smoothing import SignalSmoothing
+
+    rng = np.random.default_rng(3)
+    data = _sine_beats()
+    data["filtered_value"] += 0.05 * rng.normal(size=len(data))
+    expected = data.copy()
+    SignalSmoothing(expected, 'filtered_value', 'global_beat_index', 'sig_smooth') \
+        .group_apply(method="fda_bspline", n_basis=21, order=4)
+
+    processed_data, _ = PulseWaveFeatures(data).compute()
+
+    np.testing.assert_allclose(processed_data["sig_smooth"].to_numpy(),
+                               expected["sig_smooth"].to_numpy(dtype=float), atol=1e-9)
@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.processors.sqi.beat_organiser import BeatOrganiser
+from src.processors.beat_detectors.beat_detection import HeartBeatDetector
+from src.processors.beat_detectors.chunk_scheduler import ChunkScheduler
+
+
+def reference_group(df, group_size):
+    """ Original per trough pair .loc loop, for comparison """
+    valid_data = df.loc[df['beat'] != -1].copy()
+    valid_data = valid_data.sort_values(by=['section_id', 'beat']).reset_index(drop=True)
+    trough_indices = valid_data.index[valid_data['is_beat_trough'] == True]
+    valid_data['global_beat_index'] = -1
+    for beat_num, (start_idx, end_idx) in enumerate(zip(trough_indices[:-1], trough_indices[1:])):
+        valid_data.loc[start_idx:end_idx, 'global_beat_index'] = beat_num
+    valid_data['group_id'] = valid_data['global_beat_index'] // group_size
+    return valid_data
+
+
+@pytest.fixture
+def annotated():
+    """ Three annotated sections of a noisy ~72 bpm signal at 40 Hz """
+    rng = np.random.default_rng(3)
+    config = {
+        "ppg_processing": {"beat_detector": "msptd"},
+        "ppg_preprocessing": {"resample_freq": 40},
+        "outputs": {"print_verbosity": 0},
+    }
+    detector = HeartBeatDetector(config)
+    scheduler = ChunkScheduler("msptd", detect_kwargs={"sample_rate": 40})
+    sections = []
+    for section_id, n in enumerate([1200, 900, 1500]):
+        t = np.arange(n) / 40
+        values = np.sin(2 * np.pi * 1.2 * t) + 0.05 * rng.normal(size=n)
+        section = pd.DataFrame({"timestamp_ms": 1e6 * section_id + t * 1000, "filtered_value": values})
+        troughs = detector._detect_peaks_chunked(-values, scheduler)
+        sections.append(detector._annotate_heart_beats(section, troughs, section_id))
+    return pd.concat(sections, ignore_index=True)
+
+
+def test_matches_reference_loop(annotated):
+    expected = reference_group(annotated, 10)
+    result = BeatOrganiser(group_size=10).group_n_beats_inplace(annotated)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_unordered_sections_are_sorted(annotated):
+    shuffled = pd.concat([annotated[annotated['section_id'] == i] for i in [2, 0, 1]])
+    expected = reference_group(annotated, 5)
+    result = BeatOrganiser(group_size=5).group_n_beats_inplace(shuffled)
+
+    assert np.array_equal(result['global_beat_index'], expected['global_beat_index'])
+    assert np.array_equal(result['group_id'], expected['group_id'])
+
+
+def test_too_few_troughs():
+    df = pd.DataFrame({
+        "section_id": [0, 0, 0], "beat": [-1, -1, -1],
+        "is_beat_trough": [False, True, False], "timestamp_ms": [0.0, 1.0, 2.0],
+    })
+    df.loc[1, "beat"] = 0
+    result = BeatOrganiser(group_size=5).group_n_beats_inplace(df)
+
+    assert result['global_beat_index'].tolist() == [-1]
+    assert result['group_id'].tolist() == [-1]
+
+
+def test_time_epoch_groups(annotated):
+    organiser = BeatOrganiser(group_size=10, group_by="time", epoch_ms=10000)
+    result = organiser.group_n_beats_inplace(annotated)
+
+    beats = result[result['global_beat_index'] >= 0]
+    starts = beats.groupby('global_beat_index')['timestamp_ms'].first()
+    groups = beats.groupby('global_beat_index')['group_id'].first()
+    # Beats starting in the same 10 s epoch share a group, groups count up
+    epoch = np.floor(starts / 10000)
+    assert (groups.groupby(epoch).nunique() == 1).all()
+    assert groups.is_monotonic_increasing
+    assert groups.iloc[0] == 0
+    assert groups.nunique() == epoch.nunique()
+
+
+def test_unknown_group_by():
+    with pytest.raises(ValueError):
+        BeatOrganiser(group_size=10, group_by="minutes")
@@ -17,3 +17,12 @@ def test_get_arguments():
 		assert args.device == "polar-verity"
 		assert args.sensor_type == "PPG"
 		assert args.threshold == 15000
+
+def test_convert_command():
+	""" Sub command defaults to run """
+	with patch("sys.argv", ["main.py"]):
+		assert get_arguments().command == "run"
+	with patch("sys.argv", ["main.py", "convert", "--native_dir", "out/"]):
+		args = get_arguments()
+		assert args.command == "convert"
+		assert args.native_dir == "out/"